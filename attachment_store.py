@@ -0,0 +1,239 @@
+import argparse
+import base64
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from submission_reader import SubmissionFormatError, iter_submission
+from validate_submissions import find_submissions
+
+STORE_DIR = 'attachments'
+
+# Raw bytes per base64 chunk when rehydrating (multiple of 3, so chunks concatenate without padding)
+BASE64_CHUNK = 3 * (1 << 16)
+
+# Stands in for the data URL while the rest of the submission is serialized
+PLACEHOLDER = '\x00attachment:{}\x00'
+
+
+def is_attachment(value):
+    return isinstance(value, dict) and value.get('_is_file') is True
+
+
+def is_reference(value):
+    # Dehydrated attachment: metadata and sha256, no payload
+    return is_attachment(value) and 'data' not in value and 'sha256' in value
+
+
+class AttachmentStore:
+    """
+    Content-addressed directory of attachment payloads: <root>/<sha256[:2]>/<sha256>.
+    Every distinct file is stored once, whatever the number of submissions using it.
+    """
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.tmp = os.path.join(root, 'tmp')
+        os.makedirs(self.tmp, exist_ok=True)
+
+    def path(self, sha256):
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def __contains__(self, sha256):
+        return os.path.exists(self.path(sha256))
+
+    def put_file(self, path, sha256):
+        """
+        Moves a decoded payload (with its known sha256) into the store.
+        Returns True if the content was new.
+        """
+        target = self.path(sha256)
+        if os.path.exists(target):
+            os.remove(path)
+            return False
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Atomic: concurrent writers of the same content leave one complete copy
+        os.replace(path, target)
+        return True
+
+    def put_bytes(self, data):
+        """
+        Stores a payload held in memory. Returns (sha256, new).
+        """
+        sha256 = hashlib.sha256(data).hexdigest()
+        if sha256 in self:
+            return sha256, False
+        fd, path = tempfile.mkstemp(dir=self.tmp, suffix='.part')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        return sha256, self.put_file(path, sha256)
+
+    def open(self, sha256):
+        return open(self.path(sha256), 'rb')
+
+
+def dehydrate_file(source, target, store):
+    """
+    Writes `source` (a saveForm JSON file) to `target` with every attachment payload
+    moved into the store. The attachment keeps its metadata (name, type, size,
+    lastModified, _is_file); 'sha256' takes the place of 'data'.
+    Returns (attachments, new objects, payload bytes replaced).
+    """
+    work = tempfile.mkdtemp(dir=store.tmp)
+    stats = [0, 0, 0]
+
+    def dehydrate(item):
+        if 'path' not in item:
+            return item
+        stats[0] += 1
+        stats[2] += item['data_size']
+        stats[1] += store.put_file(item['path'], item['sha256'])
+        # 'sha256' takes the place of 'data' (saveForm key order: ..., data, _is_file)
+        reference = {k: v for k, v in item.items() if k not in ('path', 'data_size', 'sha256', '_is_file')}
+        reference['sha256'] = item['sha256']
+        reference['_is_file'] = True
+        return reference
+
+    try:
+        data = {}
+        for field_id, value in iter_submission(source, work):
+            if isinstance(value, list):
+                value = [dehydrate(item) if is_attachment(item) else item for item in value]
+            elif is_attachment(value):
+                value = dehydrate(value)
+            data[field_id] = value
+    finally:
+        for name in os.listdir(work):
+            os.remove(os.path.join(work, name))
+        os.rmdir(work)
+
+    write_json(target, data)
+    return tuple(stats)
+
+
+def write_json(path, data, attachments=()):
+    """
+    Writes `data` like saveForm does (indent 2). Values equal to PLACEHOLDER.format(i)
+    are replaced by the data URL of attachments[i] = (media type, sha256, store),
+    streamed in chunks.
+    """
+    text = json.dumps(data, indent=2, ensure_ascii=False)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        rest = text
+        for i, (media_type, sha256, store) in enumerate(attachments):
+            marker = json.dumps(PLACEHOLDER.format(i))
+            before, _, rest = rest.partition(marker)
+            f.write(before)
+            f.write(f'"data:{media_type or "application/octet-stream"};base64,')
+            with store.open(sha256) as src:
+                while chunk := src.read(BASE64_CHUNK):
+                    f.write(base64.b64encode(chunk).decode('ascii'))
+            f.write('"')
+        f.write(rest)
+    os.replace(tmp, path)
+
+
+def rehydrate_file(source, target, store):
+    """
+    Inverse of dehydrate_file: writes `source` with the attachment references
+    replaced by base64 data URLs, as saved by the form. Returns the number of attachments.
+    """
+    with open(source, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    attachments = []
+
+    def rehydrate(item):
+        if not is_reference(item):
+            return item
+        if item['sha256'] not in store:
+            raise FileNotFoundError(f"attachment {item['sha256']} is not in {store.root}")
+        attachments.append((item.get('type'), item['sha256'], store))
+        placeholder = PLACEHOLDER.format(len(attachments) - 1)
+        # 'data' takes the place of 'sha256' (saveForm key order)
+        return {k if k != 'sha256' else 'data': v if k != 'sha256' else placeholder for k, v in item.items()}
+
+    for field_id, value in data.items():
+        if isinstance(value, list):
+            data[field_id] = [rehydrate(item) for item in value]
+        else:
+            data[field_id] = rehydrate(value)
+
+    write_json(target, data, attachments)
+    return len(attachments)
+
+
+# --- Batch processing ---
+
+_worker_store = None
+
+
+def init_worker(root):
+    global _worker_store
+    _worker_store = AttachmentStore(root)
+
+
+def process_file(task):
+    mode, source, target = task
+    try:
+        if mode == 'rehydrate':
+            return source, (rehydrate_file(source, target, _worker_store), 0, 0), None
+        return source, dehydrate_file(source, target, _worker_store), None
+    except (OSError, ValueError, SubmissionFormatError) as e:
+        return source, None, str(e)
+
+
+def target_path(path, output):
+    if output is None:
+        return path
+    return os.path.join(output, os.path.basename(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move submission attachments into a content-addressed store "
+                                                 "(or put them back with --rehydrate).")
+    parser.add_argument("paths", nargs='+', help="Submission files or directories")
+    parser.add_argument("--store", default=STORE_DIR, help=f"Attachment store directory (default: {STORE_DIR})")
+    parser.add_argument("--output", help="Write the results into this directory (default: replace the files)")
+    parser.add_argument("--rehydrate", action="store_true", help="Replace the references by the attachment data")
+    parser.add_argument("--pattern", default='*.json', help="File pattern inside directories (default: *.json)")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    files = find_submissions(args.paths, args.pattern)
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+    mode = 'rehydrate' if args.rehydrate else 'dehydrate'
+    tasks = [(mode, path, target_path(path, args.output)) for path in files]
+
+    start = time.perf_counter()
+    AttachmentStore(args.store)
+    if args.jobs == 1:
+        init_worker(args.store)
+        results = list(map(process_file, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs or os.cpu_count() or 1,
+                                 initializer=init_worker, initargs=(args.store,)) as pool:
+            results = list(pool.map(process_file, tasks, chunksize=max(1, min(64, len(tasks) // 32 or 1))))
+    elapsed = time.perf_counter() - start
+
+    failed = [(path, error) for path, _, error in results if error]
+    totals = [sum(stats[i] for _, stats, error in results if not error) for i in range(3)]
+    if args.rehydrate:
+        print(f"Rehydrated {totals[0]} attachments in {len(files) - len(failed)} files in {elapsed:.2f} s")
+    else:
+        print(f"Dehydrated {len(files) - len(failed)} files in {elapsed:.2f} s: {totals[0]} attachments, "
+              f"{totals[1]} new in {args.store}, {totals[2] / 1e6:.1f} MB of payload replaced by references")
+    for path, error in failed:
+        print(f"  {path}: {error}", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env -S uv run --script
+#
+# /// script
+# requires-python = ">=3.12"
+# dependencies = ["pandas", "openpyxl"]
+# ///
+"""
+Compares wall time of the codelist extraction: the previous approach
+(one pd.read_excel call per codelist) versus extract_enums() with a single
+parse per workbook, optionally fanned out over a process pool.
+
+Run from the repository root: python benchmarks/bench_extract_enums.py
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import extract_regzec_enums as ere
+
+
+def legacy_extract():
+    # Mirrors the previous implementation: every codelist re-opens its workbook
+    enums = {}
+    for spec in ere.ENUM_SPECS:
+        if not os.path.exists(spec['workbook']):
+            continue
+        df = pd.read_excel(spec['workbook'], sheet_name=spec['sheet'], header=None)
+        enums[spec['key']] = ere.sheet_to_records(df, spec)
+    return enums
+
+
+def timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), sum(times) / len(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark codelist extraction.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per variant (default: 3)")
+    parser.add_argument("--jobs", type=int, default=4, help="Workers for the pooled variant (default: 4)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'regzec_enums.json')
+        cache_dir = os.path.join(tmp, 'cache')
+        variants = [
+            ("legacy (read_excel per sheet)", legacy_extract),
+            ("single parse per workbook", lambda: ere.extract_enums(output_file=output, cache_dir=None)),
+            (f"process pool ({args.jobs} jobs)",
+             lambda: ere.extract_enums(output_file=output, jobs=args.jobs, cache_dir=None)),
+            # The first repetition fills the cache, best is a warm run
+            ("workbook cache", lambda: ere.extract_enums(output_file=output, cache_dir=cache_dir)),
+        ]
+
+        results = []
+        for label, func in variants:
+            best, mean, enums = timed(func, args.repeat)
+            results.append((label, best, mean, enums))
+
+    reference = results[0][3]
+    baseline = results[0][1]
+    print(f"{'Variant':<34} | {'best [s]':>9} | {'mean [s]':>9} | {'speedup':>7} | output")
+    print("-" * 80)
+    for label, best, mean, enums in results:
+        # Static enums are not part of the legacy variant
+        same = all(enums.get(k) == v for k, v in reference.items())
+        print(f"{label:<34} | {best:>9.3f} | {mean:>9.3f} | {baseline / best:>6.2f}x | {'same' if same else 'DIFFERS'}")
+
+
+if __name__ == "__main__":
+    main()
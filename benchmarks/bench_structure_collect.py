@@ -0,0 +1,147 @@
+#!/usr/bin/env -S uv run --script
+#
+# /// script
+# requires-python = ">=3.12"
+# dependencies = ["pandas", "openpyxl"]
+# ///
+"""
+Compares row selection of the structure extractor: the previous per-row
+iterrows() loop versus the columnar pipeline, and peak RSS of reading the
+Slovník sheet with pd.read_excel versus the streaming row reader.
+
+Run from the repository root: python benchmarks/bench_structure_collect.py
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import extract_regzec_structure as ers
+from synthetic import make_slovnik_frame, write_slovnik_workbook
+
+
+def legacy_collect_items(df):
+    # Previous implementation: one pandas Series per row
+    headers_keys = [ers.normalize_key(h) for h in df.iloc[ers.HEADER_ROW].tolist()]
+    name_idx = headers_keys.index('nazev_atributu')
+    a1_idx = headers_keys.index('a1_ost')
+    id_idx = headers_keys.index('id_polozky_ds')
+
+    def get_val(row, identifier):
+        idx = identifier if isinstance(identifier, int) else (
+            headers_keys.index(identifier) if identifier in headers_keys else -1)
+        if 0 <= idx < len(row):
+            val = row.iloc[idx]
+            return str(val).strip() if not pd.isna(val) else ""
+        return ""
+
+    flat_items = []
+    for _, row in df.iloc[ers.HEADER_ROW + 1:].iterrows():
+        a1_val = row.iloc[a1_idx]
+        if pd.isna(a1_val): continue
+        a1_str = str(a1_val).strip().upper()
+        if a1_str not in ['P', 'N', 'PP']: continue
+        raw_name = row.iloc[name_idx]
+        if pd.isna(raw_name): continue
+        name = str(raw_name).strip().lower()
+        if not name.startswith('employee.'): continue
+        row_id = str(row.iloc[id_idx] if id_idx < len(row) else "").strip()
+        item = {
+            'path': name,
+            '_excel_description': get_val(row, 'popis'),
+            'dat_typ': get_val(row, 'dat_typ'),
+            'delka': get_val(row, 'delka'),
+            'specificke_povinnosti': get_val(row, 'specificke_povinnosti_pro_jednotlive_akce'),
+            'logicke_kontroly': get_val(row, 'logicke_kontroly'),
+            'vysvetlivky': get_val(row, 'vysvetlivky_kvyplneni'),
+            'mandatory': a1_str,
+            'p': get_val(row, 24), 'n': get_val(row, 25), 'z': get_val(row, 26),
+            'id': row_id,
+        }
+        if '10057' in row_id and '10058' in row_id:
+            for path, desc, split_id in ers.SPLIT_ITEMS:
+                flat_items.append({**item, 'path': path, '_excel_description': desc, 'id': split_id})
+        else:
+            flat_items.append(item)
+    return flat_items
+
+
+def first_difference(legacy, items):
+    # Item count, key sets (an added or dropped key is a changed output) and values, in order
+    if len(items) != len(legacy):
+        return f"{len(items)} items instead of {len(legacy)}"
+    for i, (old, new) in enumerate(zip(legacy, items)):
+        if new.keys() != old.keys():
+            return (f"item {i} ({old['path']}): extra keys {sorted(new.keys() - old.keys())}, "
+                    f"missing keys {sorted(old.keys() - new.keys())}")
+        if json.dumps(new, sort_keys=True) != json.dumps(old, sort_keys=True):
+            return f"item {i} ({old['path']}): values differ"
+    return None
+
+
+def peak_rss_of_read(path, stream):
+    # Separate process per reader, so peak RSS is not shared between them
+    code = (
+        "import sys, resource, pandas as pd; sys.path.insert(0, sys.argv[1]);"
+        "import extract_regzec_structure as ers;"
+        "df = ers.read_slovnik_streaming(sys.argv[2]) if sys.argv[3] == '1' else "
+        "pd.read_excel(sys.argv[2], sheet_name=ers.SHEET_NAME, header=None);"
+        "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+    )
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code, ROOT, path, '1' if stream else '0'],
+                         check=True, capture_output=True, text=True).stdout
+    return int(out.strip()) / 1024, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Slovník row selection and reading.")
+    parser.add_argument("--sizes", default="10000,50000", help="Comma separated row counts for row selection")
+    parser.add_argument("--workbook-rows", type=int, default=20000, help="Rows of the synthetic workbook (0 to skip)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} | {'iterrows [s]':>12} | {'columnar [s]':>12} | {'speedup':>7} | output")
+    print("-" * 62)
+    failures = []
+    for rows in [int(s) for s in args.sizes.split(',')]:
+        df = make_slovnik_frame(rows)
+        start = time.perf_counter()
+        legacy = legacy_collect_items(df)
+        legacy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        items = ers.collect_items(df)
+        new_time = time.perf_counter() - start
+        difference = first_difference(legacy, items)
+        if difference:
+            failures.append(f"{rows} rows: {difference}")
+        print(f"{rows:>8} | {legacy_time:>12.3f} | {new_time:>12.3f} | {legacy_time / new_time:>6.1f}x | "
+              f"{'DIFFERS' if difference else 'same'}")
+
+    if args.workbook_rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'slovnik.xlsx')
+            write_slovnik_workbook(path, args.workbook_rows)
+            print()
+            print(f"{'reader':<24} | {'peak RSS [MB]':>13} | {'time [s]':>8}")
+            print("-" * 52)
+            for label, stream in (("pd.read_excel", False), ("streaming row reader", True)):
+                rss, elapsed = peak_rss_of_read(path, stream)
+                print(f"{label:<24} | {rss:>13.1f} | {elapsed:>8.2f}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env -S uv run --script
+#
+# /// script
+# requires-python = ">=3.12"
+# dependencies = ["pandas", "openpyxl"]
+# ///
+"""
+Scaling test for the structure extractor on synthetic Slovník sheets with
+10k-100k attribute rows. Checks that the indexed tree builder produces the
+same tree as the previous sibling-scanning builder and that its run time
+grows linearly with the number of rows.
+
+Run from the repository root: python benchmarks/bench_structure_scaling.py
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import extract_regzec_structure as ers
+from synthetic import make_slovnik_frame
+
+
+def legacy_build_tree(flat_items):
+    # Previous implementation: linear scan of the sibling list per path segment
+    tree = []
+
+    def get_or_create_node(node_list, key):
+        for node in node_list:
+            if node['key'] == key:
+                return node
+        node = ers.new_node(key)
+        node_list.append(node)
+        return node
+
+    for item in sorted(flat_items, key=lambda x: x['path']):
+        parts = item['path'].split('.')
+        current_level = tree
+        for i, part in enumerate(parts):
+            node = get_or_create_node(current_level, part)
+            node['original_path'] = '.'.join(parts[:i + 1])
+            if i == len(parts) - 1:
+                ers.fill_leaf(node, item)
+            current_level = node['children']
+
+    ers.clean_tree(tree)
+    return tree
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling test of the structure tree builder.")
+    parser.add_argument("--sizes", default="10000,30000,100000", help="Comma separated row counts")
+    parser.add_argument("--groups", type=int, default=20, help="Number of top level sections (default: 20)")
+    parser.add_argument("--depth", type=int, default=2, help="Depth of attribute paths, 2 or 3 (default: 2)")
+    parser.add_argument("--max-growth", type=float, default=2.5,
+                        help="Allowed growth of time per row between the smallest and largest size (default: 2.5)")
+    parser.add_argument("--legacy", action="store_true", help="Also time the previous builder (quadratic, slow)")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',')]
+    print(f"{'rows':>8} | {'items':>8} | {'collect [s]':>11} | {'build [s]':>9} | {'us/row':>7} | {'legacy [s]':>10}")
+    print("-" * 72)
+
+    per_row = []
+    failed = False
+    for rows in sizes:
+        df = make_slovnik_frame(rows, groups=args.groups, depth=args.depth)
+
+        start = time.perf_counter()
+        flat_items = ers.collect_items(df)
+        collect_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        tree = ers.build_tree(flat_items)
+        build_time = time.perf_counter() - start
+        per_row.append(build_time / rows)
+
+        legacy_col = "-"
+        if args.legacy or rows == sizes[0]:
+            start = time.perf_counter()
+            legacy_tree = legacy_build_tree(flat_items)
+            legacy_col = f"{time.perf_counter() - start:.3f}"
+            if json.dumps(tree) != json.dumps(legacy_tree):
+                print(f"FAIL: tree for {rows} rows differs from the previous builder")
+                failed = True
+
+        print(f"{rows:>8} | {len(flat_items):>8} | {collect_time:>11.3f} | {build_time:>9.3f} | "
+              f"{build_time / rows * 1e6:>7.2f} | {legacy_col:>10}")
+
+    growth = per_row[-1] / per_row[0]
+    if growth > args.max_growth:
+        print(f"FAIL: time per row grew {growth:.2f}x between {sizes[0]} and {sizes[-1]} rows")
+        failed = True
+    else:
+        print(f"PASS: time per row grew {growth:.2f}x between {sizes[0]} and {sizes[-1]} rows")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env -S uv run --script
+#
+# /// script
+# requires-python = ">=3.12"
+# dependencies = ["pandas", "openpyxl"]
+# ///
+"""
+Benchmark suite of the toolchain hot paths on synthetic inputs at 1x, 10x and
+100x the size of the current regzec.xlsx / docs/regzec_form.json:
+
+  extract_enums          codelist extraction from synthetic workbooks
+  collect_items          Slovník row selection of the structure extractor
+  build_tree             structure tree build
+  check_json             ID checks of tests/check_ids.py
+  extract_ids_and_desc   list_all_ids.py
+  traverse_and_fill      scenario generation of tests/create_scenarios.py
+  deep_compare           tests/compare_jsons.py on two equal trees
+
+Results are written in the profile report format of profiling.py (one stage per
+case and scale) and compared with a stored baseline; cases slower than the
+threshold fail the run.
+
+Run from the repository root:
+  python benchmarks/bench_suite.py                   # compare with benchmarks/baseline.json
+  python benchmarks/bench_suite.py --save-baseline   # record a new baseline
+"""
+
+import argparse
+import contextlib
+import copy
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+import extract_regzec_enums as ere
+import extract_regzec_structure as ers
+from check_ids import check_json
+from compare_jsons import deep_compare
+from create_scenarios import traverse_and_fill
+from list_all_ids import extract_ids_and_desc
+from profiling import REPORT_VERSION, compare_reports
+from synthetic import make_slovnik_frame, scale_form, write_dictionary_workbooks
+
+BASELINE_FILE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+FORM_FILE = os.path.join(ROOT, 'docs', 'regzec_form.json')
+ENUMS_FILE = os.path.join(ROOT, 'docs', 'regzec_enums.json')
+
+# Data rows of the Slovník sheet in regzec.xlsx (158 rows, 16 of them title and header)
+SLOVNIK_ROWS = 142
+
+SCALES = [1, 10, 100]
+CASES = ['extract_enums', 'collect_items', 'build_tree', 'check_json',
+         'extract_ids_and_desc', 'traverse_and_fill', 'deep_compare']
+
+# Differences below this many seconds are noise, whatever the percentage
+MIN_DELTA = 0.02
+
+
+def timed(func, repeat, warmup=False):
+    if warmup:
+        # First call pays for lazy imports and caches
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+    times = []
+    for _ in range(repeat):
+        # Like timeit: collector pauses land on random cases otherwise
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                func()
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return min(times), sum(times) / len(times)
+
+
+def count_nodes(structure):
+    count, stack = 0, list(structure)
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.get('children') or [])
+    return count
+
+
+def prepare(scale, tmp, form, enums):
+    """
+    Builds the inputs of one scale. Returns {case: (function, size)}.
+    """
+    counts = {key: len(options) for key, options in enums.items()}
+    specs = write_dictionary_workbooks(tmp, ere.ENUM_SPECS, counts, scale=scale,
+                                       slovnik_size=SLOVNIK_ROWS * scale)
+    output = os.path.join(tmp, 'regzec_enums.json')
+    index = os.path.join(tmp, 'regzec_enums.index.json')
+
+    frame = make_slovnik_frame(SLOVNIK_ROWS * scale, groups=22)
+    items = ers.collect_items(frame)
+
+    scaled = scale_form(form, scale)
+    form_file = os.path.join(tmp, 'regzec_form.json')
+    with open(form_file, 'w', encoding='utf-8') as f:
+        json.dump(scaled, f, ensure_ascii=False, indent=2)
+    other = copy.deepcopy(scaled)
+    nodes = count_nodes(scaled)
+
+    return {
+        'extract_enums': (lambda: ere.extract_enums(output_file=output, index_file=index, specs=specs,
+                                                            cache_dir=None),
+                          sum(counts.get(s['key'], 10) * scale for s in specs)),
+        'collect_items': (lambda: ers.collect_items(frame), SLOVNIK_ROWS * scale),
+        'build_tree': (lambda: ers.build_tree(items), len(items)),
+        'check_json': (lambda: check_json(form_file), nodes),
+        'extract_ids_and_desc': (lambda: extract_ids_and_desc(scaled, []), nodes),
+        'traverse_and_fill': (lambda: traverse_and_fill(scaled, enums, {}, 'non_default'), nodes),
+        'deep_compare': (lambda: deep_compare(scaled, other), nodes),
+    }
+
+
+def run_suite(scales, cases, repeat):
+    with open(FORM_FILE, 'r', encoding='utf-8') as f:
+        form = json.load(f)
+    with open(ENUMS_FILE, 'r', encoding='utf-8') as f:
+        enums = json.load(f)
+
+    stages = []
+    warmed = set()
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            prepared = prepare(scale, tmp, form, enums)
+            for case in cases:
+                func, size = prepared[case]
+                best, mean = timed(func, repeat, warmup=case not in warmed)
+                warmed.add(case)
+                stages.append({'stage': f"{case}@{scale}x", 'count': repeat, 'wall_s': round(best, 4),
+                               'mean_s': round(mean, 4), 'size': size})
+                print(f"{case:<22} {scale:>4}x {size:>9} {best:>9.4f} {mean:>9.4f}", file=sys.stderr)
+
+    return {
+        'version': REPORT_VERSION,
+        'script': 'bench_suite',
+        'argv': sys.argv[1:],
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'options': {'scales': scales, 'repeat': repeat},
+        'total': None,
+        'stages': stages,
+    }
+
+
+def regressions(baseline, report, threshold):
+    found = []
+    for row in compare_reports(baseline, report):
+        if row['change'] is None:
+            continue
+        if row['change'] * 100 > threshold and row['new'] - row['old'] > MIN_DELTA:
+            found.append(row)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the toolchain hot paths at several input sizes.")
+    parser.add_argument("--scales", default=",".join(map(str, SCALES)),
+                        help=f"Comma separated size multipliers (default: {','.join(map(str, SCALES))})")
+    parser.add_argument("--cases", default=",".join(CASES), help="Comma separated cases (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per case, the best one counts (default: 3)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline report (default: benchmarks/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=25.0,
+                        help="Allowed slowdown against the baseline in percent (default: 25)")
+    parser.add_argument("--report", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(',')]
+    cases = [c for c in args.cases.split(',') if c]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    # The extractors and check_json expect the repository root as working directory
+    os.chdir(ROOT)
+    print(f"{'case':<22} {'scale':>5} {'size':>9} {'best [s]':>9} {'mean [s]':>9}", file=sys.stderr)
+    report = run_suite(scales, cases, args.repeat)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline first.")
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    slower = regressions(baseline, report, args.threshold)
+    for row in compare_reports(baseline, report):
+        if row['change'] is not None:
+            flag = ' REGRESSION' if row in slower else ''
+            print(f"{row['stage']:<30} {row['old']:>9.4f} {row['new']:>9.4f} {row['change'] * 100:>+8.1f}%{flag}")
+    if slower:
+        print(f"FAIL: {len(slower)} case(s) slower than the baseline by more than {args.threshold}%.")
+        sys.exit(1)
+    print("OK: no regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Synthetic inputs shaped like the real JMHZ dictionaries, for benchmarks.
+"""
+
+import copy
+import os
+import random
+
+import pandas as pd
+
+# Header row of the Slovník sheet (row 16 in regzec.xlsx)
+SLOVNIK_HEADERS = [
+    'ID položky DS', 'Název atributu', 'Popis', 'Dat. typ', 'Délka',
+    'Specifické povinnosti  pro jednotlivé akce', 'Logické kontroly', 'Vysvětlivky k\xa0vyplnění',
+    'A1-OST', 'A1 - 10', 'A1 - SPEC', 'A2-OST', 'A2 - 10', 'A2 - SPEC', 'A3-OST', 'A3 - 10',
+    'A3 - SPEC', 'A4-OST', 'A4 - 10', 'A4 - SPEC', 'A5', 'A6', 'A7', 'A8', 'P', 'N', 'Z',
+]
+HEADER_ROW = 15
+
+DAT_TYPY = ['A', 'N', 'NN', 'D', 'L', 'L2', 'A,NN,ZZ,SP']
+A1_VALUES = ['P', 'N', 'PP', None, 'X']
+
+
+def slovnik_rows(rows, groups=50, depth=3, seed=0):
+    """
+    Yields Slovník data rows. Attributes are spread over `groups` sections
+    `depth` levels deep, so sections get wide sibling lists like the full
+    JMHZ datová věta.
+    """
+    rnd = random.Random(seed)
+    for i in range(rows):
+        group = i % groups
+        sub = (i // groups) % max(1, groups // 5)
+        if depth >= 3:
+            path = f"employee.g{group}.s{sub}.attr{i}"
+        else:
+            path = f"employee.g{group}.attr{i}"
+        if i % 1000 == 0:
+            # Some rows outside of the employee entity and the combined BNO/ECP row
+            path = f"form.attr{i}"
+        row = [None] * len(SLOVNIK_HEADERS)
+        row[0] = "10057 10058" if i == 1 else str(20000 + i)
+        row[1] = path
+        row[2] = f"Popis atributu {i}"
+        row[3] = rnd.choice(DAT_TYPY)
+        row[4] = f"1-{rnd.randint(1, 100)}"
+        row[6] = "kontrola" if i % 7 == 0 else None
+        row[7] = "vysvětlivka" if i % 3 == 0 else None
+        row[8] = rnd.choice(A1_VALUES)
+        for col in range(9, 24):
+            row[col] = 'P'
+        yield row
+
+
+def make_slovnik_frame(rows, groups=50, depth=3, seed=0):
+    """
+    Builds a DataFrame equivalent to pd.read_excel(..., sheet_name='Slovník', header=None).
+    """
+    width = len(SLOVNIK_HEADERS)
+    data = [[f"titulek {i}"] + [None] * (width - 1) for i in range(HEADER_ROW)]
+    data.append(list(SLOVNIK_HEADERS))
+    data.extend(slovnik_rows(rows, groups=groups, depth=depth, seed=seed))
+    return pd.DataFrame(data, dtype=object)
+
+
+def write_slovnik_workbook(path, rows, groups=50, depth=3, seed=0):
+    """
+    Writes a workbook with a synthetic Slovník sheet (write-only mode, flat memory).
+    """
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('Slovník')
+    for i in range(HEADER_ROW):
+        ws.append([f"titulek {i}"])
+    ws.append(SLOVNIK_HEADERS)
+    for row in slovnik_rows(rows, groups=groups, depth=depth, seed=seed):
+        ws.append(row)
+    wb.save(path)
+
+
+def codelist_rows(rows, seed=0):
+    """
+    Yields codelist sheet rows (header first): code, name, label, like the CIS sheets.
+    """
+    rnd = random.Random(seed)
+    yield ['Kód', 'Název', 'Popis']
+    for i in range(rows):
+        name = f"Položka {i} {rnd.choice(['Česko', 'Žďár', 'Ústí', 'Plzeň'])}"
+        yield [f"C{i:05d}", name, name.upper()]
+
+
+def write_dictionary_workbooks(directory, specs, counts, scale=1, slovnik_size=0, seed=0):
+    """
+    Writes synthetic workbooks holding the sheets of the codelist specs
+    (`counts[key] * scale` rows each) and, when `slovnik_size` is given, a Slovník
+    sheet in the first workbook. Returns the specs pointing at the new files.
+    """
+    import openpyxl
+
+    workbooks = {}
+    for spec in specs:
+        workbooks.setdefault(spec['workbook'], []).append(spec)
+
+    new_specs = []
+    for n, (workbook, group) in enumerate(workbooks.items()):
+        path = os.path.join(directory, os.path.basename(workbook))
+        wb = openpyxl.Workbook(write_only=True)
+        if n == 0 and slovnik_size:
+            ws = wb.create_sheet('Slovník')
+            for i in range(HEADER_ROW):
+                ws.append([f"titulek {i}"])
+            ws.append(SLOVNIK_HEADERS)
+            for row in slovnik_rows(slovnik_size, seed=seed):
+                ws.append(row)
+        for spec in group:
+            ws = wb.create_sheet(spec['sheet'])
+            for row in codelist_rows(max(1, counts.get(spec['key'], 10) * scale), seed=seed):
+                ws.append(row)
+            new_specs.append({**spec, 'workbook': path})
+        wb.save(path)
+    return new_specs
+
+
+def scale_form(structure, scale):
+    """
+    Returns a form tree `scale` times the size of `structure`: the sections of the
+    root entity are repeated with renamed keys and shifted field IDs.
+    """
+    def shift(node, n):
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            field_id = current.get('id')
+            if field_id:
+                field_id = str(field_id)
+                current['id'] = str(int(field_id) + n * 1000000) if field_id.isdigit() else f"{field_id}_{n}"
+            stack.extend(current.get('children') or [])
+        return node
+
+    result = copy.deepcopy(structure)
+    for root in result:
+        if not root.get('key') or not root.get('children'):
+            continue
+        sections = list(root['children'])
+        for n in range(1, scale):
+            for section in sections:
+                clone = shift(copy.deepcopy(section), n)
+                clone['key'] = f"{section['key']}_{n}"
+                root['children'].append(clone)
+    return result
@@ -0,0 +1,340 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+STATE_FILE = '.build_state.json'
+STATE_VERSION = 1
+
+PYTHON = sys.executable
+
+# Pipeline stages. Dependencies follow from the files: a stage runs after the
+# stages producing its inputs. Scripts are inputs too, so code changes rebuild.
+# - explicit: only run when named on the command line (the merge overwrites
+#   form edits made in regzec_structure.html)
+# - optional: skipped when its inputs do not exist (ts-form lives in ../TSWebUI)
+STAGES = [
+    {
+        'name': 'enums',
+        'command': [PYTHON, 'extract_regzec_enums.py'],
+        'inputs': ['regzec.xlsx', 'jmhz datová věta.xlsx', 'extract_regzec_enums.py', 'enum_index.py', 'profiling.py',
+                   'workbook_cache.py'],
+        'outputs': ['docs/regzec_enums.json', 'docs/regzec_enums.index.json'],
+    },
+    {
+        'name': 'structure',
+        'command': [PYTHON, 'extract_regzec_structure.py'],
+        'inputs': ['regzec.xlsx', 'extract_regzec_structure.py', 'enum_index.py', 'profiling.py', 'workbook_cache.py'],
+        'outputs': ['regzec_structure.json'],
+    },
+    {
+        'name': 'merge',
+        'command': [PYTHON, 'merge_schema.py'],
+        'inputs': ['regzec_structure.json', 'docs/regzec_form.json', 'merge_schema.py'],
+        'outputs': ['docs/regzec_form.json'],
+        'explicit': True,
+    },
+    {
+        'name': 'scenarios',
+        'command': [PYTHON, 'create_scenarios.py'],
+        'cwd': 'tests',
+        'inputs': ['docs/regzec_form.json', 'docs/regzec_enums.json', 'tests/create_scenarios.py', 'build_form_bundle.py'],
+        'outputs': ['tests/test_scenarios.json'],
+    },
+    {
+        'name': 'bundle',
+        'command': [PYTHON, 'build_form_bundle.py'],
+        'inputs': ['docs/regzec_form.json', 'docs/regzec_enums.json', 'build_form_bundle.py'],
+        'outputs': ['docs/regzec_form.bundle.json', 'docs/new_regzec_form.bundle.json'],
+    },
+    {
+        'name': 'rules',
+        'command': [PYTHON, 'compile_rules.py'],
+        'inputs': ['docs/regzec_form.json', 'compile_rules.py'],
+        'outputs': ['docs/regzec_rules.json'],
+    },
+    {
+        'name': 'registry',
+        'command': [PYTHON, 'field_registry.py', '--index'],
+        'inputs': ['docs/regzec_form.json', 'field_registry.py'],
+        'outputs': ['field_registry.sqlite'],
+    },
+    {
+        'name': 'ts_form',
+        'command': ['bash', 'update_ts_form.sh'],
+        'inputs': ['../TSWebUI/dist/ts-form-bundle.js', '../TSWebUI/ts-form-readme.md',
+                   '../TSWebUI/packages/ts-form/src/*.js', 'update_ts_form.sh'],
+        'outputs': ['docs/ts-form-bundle.js', 'ts-form-readme.md', 'ts-form/*.js'],
+        'optional': True,
+    },
+    {
+        'name': 'publish',
+        'command': [PYTHON, 'publish_docs.py'],
+        'inputs': ['docs/regzec_form.bundle.json', 'docs/new_regzec_form.bundle.json', 'docs/regzec_form.json',
+                   'docs/regzec_enums.json', 'docs/regzec_enums.index.json', 'docs/regzec_rules.json',
+                   'docs/ts-form-bundle.js',
+                   'docs/regzec_form.js', 'docs/regzec_form.html', 'docs/new_regzec_form.html',
+                   'publish_docs.py', 'lint_schema.py'],
+        'outputs': ['dist/*'],
+    },
+]
+
+
+def expand(patterns):
+    # Plain paths are kept (missing or not), glob patterns become the matching files
+    paths = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern)))
+        else:
+            paths.append(pattern)
+    return paths
+
+
+class FileHashes:
+    """
+    sha256 of files, cached by (size, mtime) in the build state: an unchanged
+    tree is checked with stat() calls only.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def get(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        cached = self.cache.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while chunk := f.read(1 << 20):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.cache[path] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def snapshot(self, paths):
+        return {path: self.get(path) for path in paths}
+
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {'version': STATE_VERSION, 'files': {}, 'stages': {}}
+    if state.get('version') != STATE_VERSION:
+        return {'version': STATE_VERSION, 'files': {}, 'stages': {}}
+    return state
+
+
+def save_state(state, path=STATE_FILE):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def dependencies(stages):
+    """
+    Returns {stage name: set of upstream stage names}, from outputs used as inputs.
+    """
+    producers = {}
+    for stage in stages:
+        for output in stage['outputs']:
+            producers.setdefault(output, []).append(stage['name'])
+    order = {stage['name']: i for i, stage in enumerate(stages)}
+    deps = {}
+    for stage in stages:
+        # Only earlier stages count, so in-place stages (merge) do not form cycles
+        deps[stage['name']] = {p for i in stage['inputs'] for p in producers.get(i, [])
+                               if order[p] < order[stage['name']]}
+    return deps
+
+
+def select_stages(names, stages=STAGES):
+    """
+    Stages to build: the named ones with their upstream stages, or all non-explicit stages.
+    """
+    by_name = {s['name']: s for s in stages}
+    unknown = [n for n in names if n not in by_name]
+    if unknown:
+        raise ValueError(f"unknown stage(s): {', '.join(unknown)}")
+    if not names:
+        return [s for s in stages if not s.get('explicit')]
+
+    deps = dependencies(stages)
+    selected = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name in selected:
+            continue
+        selected.add(name)
+        pending.extend(d for d in deps[name] if not by_name[d].get('explicit'))
+    return [s for s in stages if s['name'] in selected]
+
+
+def stage_status(stage, state, hashes):
+    """
+    Returns (status, reason): 'fresh', 'dirty' or 'unavailable' (optional stage without inputs).
+    """
+    inputs = expand(stage['inputs'])
+    missing = [p for p in inputs if hashes.get(p) is None]
+    if missing or not inputs:
+        if stage.get('optional'):
+            return 'unavailable', f"missing {', '.join(missing) or 'inputs'}"
+        return 'dirty', f"missing input {missing[0]}"
+
+    record = state['stages'].get(stage['name'])
+    if record is None:
+        return 'dirty', "never built"
+    if record.get('command') != stage['command']:
+        return 'dirty', "command changed"
+    if record['inputs'] != hashes.snapshot(inputs):
+        changed = sorted(set(inputs) ^ set(record['inputs']) |
+                         {p for p in inputs if record['inputs'].get(p) != hashes.get(p)})
+        return 'dirty', f"changed {', '.join(changed)}"
+    outputs = expand(stage['outputs'])
+    if record['outputs'] != hashes.snapshot(outputs):
+        return 'dirty', "outputs modified or missing"
+    return 'fresh', "up to date"
+
+
+def run_stage(stage):
+    start = time.perf_counter()
+    proc = subprocess.run(stage['command'], cwd=stage.get('cwd') or None,
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return proc.returncode, proc.stdout, time.perf_counter() - start
+
+
+def build(stages, state, jobs=None, force=False, dry_run=False, verbose=False):
+    """
+    Runs the dirty stages in dependency order, independent ones in parallel.
+    Returns {stage name: result} with result one of fresh, built, failed, blocked,
+    unavailable or (dry run) dirty.
+    """
+    hashes = FileHashes(state.setdefault('files', {}))
+    deps = dependencies(stages)
+    names = {s['name'] for s in stages}
+    deps = {name: d & names for name, d in deps.items() if name in names}
+    results = {}
+    running = {}
+
+    def ready(stage):
+        return stage['name'] not in results and stage['name'] not in running.values() and \
+            all(results.get(d) in ('fresh', 'built', 'unavailable', 'dirty') for d in deps[stage['name']])
+
+    def blocked(stage):
+        return any(results.get(d) in ('failed', 'blocked') for d in deps[stage['name']])
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        while len(results) < len(stages):
+            for stage in stages:
+                name = stage['name']
+                if name in results or name in running.values():
+                    continue
+                if blocked(stage):
+                    results[name] = 'blocked'
+                    print(f"[{name}] skipped, upstream failed")
+                    continue
+                if not ready(stage):
+                    continue
+                # Upstream stages are done: their outputs are hashed as they are now
+                status, reason = stage_status(stage, state, hashes)
+                upstream = sorted(d for d in deps[name] if results[d] == 'dirty')
+                if upstream:
+                    status, reason = 'dirty', f"upstream {', '.join(upstream)}"
+                if status == 'dirty' and dry_run:
+                    results[name] = 'dirty'
+                    print(f"[{name}] would run: {reason}")
+                elif status == 'unavailable':
+                    results[name] = 'unavailable'
+                    print(f"[{name}] skipped, {reason}")
+                elif status == 'fresh' and not force:
+                    results[name] = 'fresh'
+                    if verbose:
+                        print(f"[{name}] up to date")
+                else:
+                    print(f"[{name}] running: {'forced' if status == 'fresh' else reason}")
+                    running[pool.submit(run_stage, stage)] = name
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                stage = next(s for s in stages if s['name'] == name)
+                code, output, elapsed = future.result()
+                if verbose or code != 0:
+                    print(output.rstrip())
+                if code != 0:
+                    results[name] = 'failed'
+                    state['stages'].pop(name, None)
+                    print(f"[{name}] FAILED (exit {code}) after {elapsed:.2f} s")
+                    continue
+                results[name] = 'built'
+                state['stages'][name] = {
+                    'command': stage['command'],
+                    'inputs': hashes.snapshot(expand(stage['inputs'])),
+                    'outputs': hashes.snapshot(expand(stage['outputs'])),
+                    'built': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'seconds': round(elapsed, 3),
+                }
+                print(f"[{name}] done in {elapsed:.2f} s")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the generated files of the schema pipeline, skipping up-to-date stages.")
+    parser.add_argument("stages", nargs='*', help="Stages to build with their upstream stages (default: all but explicit ones)")
+    parser.add_argument("--force", action="store_true", help="Run the selected stages even if up to date")
+    parser.add_argument("--dry-run", action="store_true", help="Only show which stages would run")
+    parser.add_argument("--jobs", type=int, default=None, help="Stages run in parallel (default: CPU count)")
+    parser.add_argument("--list", action="store_true", help="List the stages and their dependencies")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print the output of every stage")
+    args = parser.parse_args()
+
+    # Paths in STAGES are relative to the repository root
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    if args.list:
+        deps = dependencies(STAGES)
+        for stage in STAGES:
+            flags = ''.join(f" ({flag})" for flag in ('explicit', 'optional') if stage.get(flag))
+            after = ', '.join(sorted(deps[stage['name']])) or '-'
+            print(f"{stage['name']:<10} after: {after:<20} -> {', '.join(stage['outputs'])}{flags}")
+        return
+
+    try:
+        stages = select_stages(args.stages)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    state = load_state()
+    results = build(stages, state, jobs=args.jobs, force=args.force, dry_run=args.dry_run, verbose=args.verbose)
+    if not args.dry_run:
+        save_state(state)
+    elapsed = time.perf_counter() - start
+
+    counts = {}
+    for result in results.values():
+        counts[result] = counts.get(result, 0) + 1
+    print(f"Build: {', '.join(f'{n} {r}' for r, n in sorted(counts.items()))} in {elapsed * 1000:.0f} ms")
+    if counts.get('failed') or counts.get('blocked'):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
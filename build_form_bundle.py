@@ -0,0 +1,249 @@
+#!/usr/bin/env -S uv run --script
+#
+# /// script
+# requires-python = ">=3.12"
+# dependencies = []
+# ///
+
+import argparse
+import json
+import os
+import re
+
+FORM_FILE = 'docs/regzec_form.json'
+ENUMS_FILE = 'docs/regzec_enums.json'
+
+# Output file -> show new_only fields (new_regzec_form.html)
+VARIANTS = [
+    ('docs/regzec_form.bundle.json', False),
+    ('docs/new_regzec_form.bundle.json', True),
+]
+
+
+def should_skip(node, show_new_only):
+    if node.get('skip'):
+        return True
+    # If Standard Mode (show_new_only = False), skip if node is 'new_only'
+    if not show_new_only and node.get('new_only'):
+        return True
+    return False
+
+
+def parse_width(value):
+    # Same as parseInt(node.width || 12, 10) in the browser
+    match = re.match(r'\s*([+-]?\d+)', str(value or 12))
+    return int(match.group(1)) if match else 12
+
+
+def build_metadata(structure, enums, show_new_only):
+    """
+    Python port of the former client-side buildMetadata() in docs/regzec_form.js.
+    Returns the {layout, fields, values} object ts-form consumes.
+    """
+    # Assume structure is array [ { key: 'employee', children: [...] } ]
+    root = next((n for n in structure if n.get('key') == 'employee'), None)
+    if root is None:
+        raise ValueError("Root 'employee' node not found")
+
+    fields = {}
+    values = {}
+    tabs = []
+
+    # Process Root Children as Tabs
+    for child in root.get('children') or []:
+        if should_skip(child, show_new_only):
+            continue
+        tab = build_tab(child, fields, enums, values, show_new_only)
+        if tab:
+            tabs.append(tab)
+
+    return {
+        'layout': {'tabs': tabs},
+        'fields': fields,
+        'values': values
+    }
+
+
+def build_tab(node, fields, enums, values, show_new_only):
+    # Flatten the node's subtree into a list of Items (Fields or Separators)
+    flat_items = flatten_node(node, fields, enums, values, show_new_only)
+    if not flat_items:
+        return None
+
+    return {
+        'label': node.get('description') or node.get('key'),
+        'rows': pack_rows(flat_items)
+    }
+
+
+def flatten_node(node, fields, enums, values, show_new_only):
+    items = []
+    # Explicit stack instead of recursion: (children, next index)
+    stack = [(node.get('children') or [], 0)]
+    while stack:
+        children, idx = stack.pop()
+        if idx >= len(children):
+            continue
+        stack.append((children, idx + 1))
+
+        child = children[idx]
+        if should_skip(child, show_new_only):
+            continue
+
+        if child.get('children'):
+            # Group: Separator + its items
+            if child.get('description'):
+                items.append({'type': 'separator', 'label': child['description'], 'width': 12})
+            stack.append((child['children'], 0))
+        else:
+            # Leaf
+            items.append(create_field_item(child, fields, enums, values))
+
+    return items
+
+
+def create_field_item(node, fields, enums, values):
+    # Use ID if available, otherwise fallback to path/key
+    field_name = node.get('id') or node.get('original_path') or node.get('key')
+    widget = node.get('widget')
+
+    # Default config
+    config = {
+        'type': widget or 'input',
+        'label': node.get('description') or node.get('key'),
+    }
+
+    # Handle Selection -> Combobox
+    if widget == 'selection':
+        config['type'] = 'combobox'
+        config['allowCustom'] = False
+        config['allowEmpty'] = True
+        config['placeholder'] = 'Vyberte...'
+
+        ciselnik = node.get('ciselnik')
+        if ciselnik and ciselnik in enums:
+            config['options'] = enums[ciselnik]
+        else:
+            config['options'] = []  # Fallback empty
+            print(f"Warning: Enum not found for {field_name} (ciselnik: {ciselnik})")
+
+    # Handle Markdown
+    if widget == 'markdown':
+        config['type'] = 'markdown'
+        if node.get('content'):
+            config['content'] = node['content']
+        # Markdown fields often span full width
+        config['width'] = '12'
+
+    # Handle Separator: not a field
+    if widget == 'separator':
+        item = {'type': 'separator', 'width': 12}
+        label = node.get('description') or node.get('label')
+        if label is not None:
+            item['label'] = label
+        return item
+
+    # Handle File
+    if widget == 'file':
+        config['type'] = 'file'
+        if node.get('multiple'):
+            config['multiple'] = True
+        if node.get('label'):
+            config['innerLabel'] = node['label']
+
+    # Handle Textarea
+    if widget == 'textarea':
+        config['type'] = 'textarea'
+        if node.get('rows'):
+            config['rows'] = node['rows']
+
+    # Handle Mandatory
+    if node.get('mandatory') == 'P':
+        config['required'] = True
+
+    # Handle Default Value
+    if node.get('default_value') not in (None, ""):
+        values[field_name] = node['default_value']
+
+    # Handle Placeholder
+    if node.get('placeholder'):
+        config['placeholder'] = node['placeholder']
+
+    fields[field_name] = config
+
+    return {
+        'type': 'field',
+        'field': field_name,
+        'width': parse_width(node.get('width')),
+    }
+
+
+def pack_rows(items):
+    rows = []
+    current_row = []
+    current_width = 0
+
+    for item in items:
+        if current_width + item['width'] > 12:
+            # Finish current row
+            if current_row:
+                rows.append(finish_row(current_row, current_width))
+            current_row = []
+            current_width = 0
+
+        current_row.append(item)
+        current_width += item['width']
+
+    if current_row:
+        rows.append(finish_row(current_row, current_width))
+
+    return rows
+
+
+def finish_row(row_items, width_sum):
+    # Pad to the full width and convert widths to fr units
+    if width_sum < 12:
+        row_items = row_items + [{'type': 'empty', 'width': 12 - width_sum}]
+
+    row = []
+    for item in row_items:
+        if item['type'] == 'separator':
+            sep = {'type': 'separator'}
+            if 'label' in item:
+                sep['label'] = item['label']
+            sep['width'] = '12fr'  # Full width
+            row.append(sep)
+        elif item['type'] == 'empty':
+            row.append({'type': 'empty', 'width': f"{item['width']}fr"})
+        else:
+            rest = {k: v for k, v in item.items() if k != 'width'}
+            rest['width'] = f"{item['width']}fr"
+            row.append(rest)
+    return row
+
+
+def build_bundles(form_file=FORM_FILE, enums_file=ENUMS_FILE, variants=VARIANTS):
+    with open(form_file, 'r', encoding='utf-8') as f:
+        structure = json.load(f)
+    with open(enums_file, 'r', encoding='utf-8') as f:
+        enums = json.load(f)
+
+    for output_file, show_new_only in variants:
+        bundle = build_metadata(structure, enums, show_new_only)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(bundle, f, ensure_ascii=False, separators=(',', ':'))
+        print(f"Saved {output_file} ({len(bundle['fields'])} fields, "
+              f"{len(bundle['layout']['tabs'])} tabs, {os.path.getsize(output_file)} bytes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompile the form layout/fields/values bundles for ts-form.")
+    parser.add_argument("--form", default=FORM_FILE, help=f"Form structure JSON (default: {FORM_FILE})")
+    parser.add_argument("--enums", default=ENUMS_FILE, help=f"Enums JSON (default: {ENUMS_FILE})")
+    args = parser.parse_args()
+
+    build_bundles(args.form, args.enums)
+
+
+if __name__ == "__main__":
+    main()
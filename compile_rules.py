@@ -0,0 +1,424 @@
+import argparse
+import json
+import re
+import sys
+
+FORM_FILE = 'docs/regzec_form.json'
+RULES_FILE = 'docs/regzec_rules.json'
+
+RULES_VERSION = 1
+
+# Source columns of the Slovník (kept on the form nodes by extract_regzec_structure.py)
+COLUMNS = ('specificke_povinnosti', 'logicke_kontroly')
+
+# Fields the texts refer to by name
+NAMED_FIELDS = {
+    'státní občanství': '10067',
+    'kód státu rezidentství': '10068',
+    'datum nástupu': '10223',
+    'datum vyplnění': '10005',
+    'druh zaměstnání': '10525',
+}
+
+YES_NO = {'ANO': 'A', 'NE': 'N', 'A': 'A', 'N': 'N'}
+
+# Severities: 'error' rules decide what has to be filled (the form enforces them),
+# 'warning' rules check relations between filled values
+ERROR, WARNING = 'error', 'warning'
+
+SENTENCE_SPLIT_RE = re.compile(r'(?<=\.)\s+(?=[A-ZÁČĎÉĚÍŇÓŘŠŤÚŮÝŽ„"])|\n+|;\s*')
+
+# Texts that would compile to a wrong rule: {(field, sentence): reason}
+EXCEPTIONS = {
+    ('10058', 'Nepovinný u všech akcí A1, je-li státní občanství různé od CZ'):
+        'copied from 10057, EČP is not required from CZ citizens',
+}
+
+KONTROLA_PREFIX_RE = re.compile(r'^Kontrola \d+(?=[A-ZÁČĎÉĚÍŇÓŘŠŤÚŮÝŽ])')
+
+# Texts that only restate what the form schema already checks (codelist, A/N, data type)
+COVERED_RE = re.compile(r'^(?:„A“ nebo „N“|[Čč]íselník\b.*|CIS\b.*|Kontrola \d.*|Formát Unicode RRRR-MM-DD)$')
+
+
+def normalize(text):
+    return re.sub(r'\s+', ' ', (text or '').replace('\xa0', ' ')).strip()
+
+
+def sentences(text):
+    for part in SENTENCE_SPLIT_RE.split(text or ''):
+        # 'Kontrola 3Je-li vyplněno ...': check number glued to the text
+        part = KONTROLA_PREFIX_RE.sub('', normalize(part)).rstrip('.').strip()
+        if part:
+            yield part
+
+
+# --- Conditions ---
+
+def cond(field, op, value=None):
+    c = {'field': field, 'op': op}
+    if value is not None:
+        c['value'] = value
+    return c
+
+
+def condition_fields(c):
+    if 'field' in c:
+        return {c['field']}
+    if 'not' in c:
+        return condition_fields(c['not'])
+    return set().union(*(condition_fields(x) for x in c.get('all', c.get('any', []))))
+
+
+def compile_condition(c):
+    """
+    Returns a predicate over submitted data for a condition: {'field', 'op': eq|ne|filled|empty, 'value'},
+    {'all': [...]}, {'any': [...]}, {'not': c}. 'ne' needs a filled value.
+    """
+    if 'all' in c:
+        parts = [compile_condition(x) for x in c['all']]
+        return lambda data: all(p(data) for p in parts)
+    if 'any' in c:
+        parts = [compile_condition(x) for x in c['any']]
+        return lambda data: any(p(data) for p in parts)
+    if 'not' in c:
+        part = compile_condition(c['not'])
+        return lambda data: not part(data)
+    field, op, expected = c['field'], c['op'], c.get('value')
+    if op == 'filled':
+        return lambda data: not is_empty(data.get(field))
+    if op == 'empty':
+        return lambda data: is_empty(data.get(field))
+    if op == 'eq':
+        return lambda data: data.get(field) == expected
+    if op == 'ne':
+        return lambda data: not is_empty(data.get(field)) and data.get(field) != expected
+    raise ValueError(f"Unknown condition operator {op!r}")
+
+
+def is_empty(value):
+    return value is None or value == '' or (isinstance(value, list) and len(value) == 0)
+
+
+# --- Sentence templates ---
+# Every template is (regex matched against the whole sentence, builder(match, node, context) -> rules)
+
+def field_ref(match_id, name):
+    return match_id or NAMED_FIELDS[name]
+
+
+def required_when(when):
+    return lambda m, node, ctx: [{'kind': 'required', 'targets': [node['id']], 'when': when(m, ctx),
+                                  'severity': ERROR}]
+
+
+def sibling(node, ctx, key):
+    # 'employee.job.to' -> id of 'employee.job.fro'
+    path = node.get('original_path') or ''
+    return ctx['paths'].get(path.rsplit('.', 1)[0] + '.' + key)
+
+
+def compare_with(op, other):
+    def build(m, node, ctx):
+        target = other(m, node, ctx)
+        if not target:
+            return []
+        return [{'kind': 'compare', 'targets': [node['id']], 'op': op, 'other': target, 'severity': WARNING}]
+    return build
+
+
+TEMPLATES = [
+    # Mandatory depending on the citizenship / tax residence
+    (r'Pokud státní občanství (\d{5}) ?<> ?CZ(?:,| a)? pokud (\d{5}) = (ANO|NE), pak P',
+     required_when(lambda m, ctx: {'all': [cond(m[1], 'ne', 'CZ'), cond(m[2], 'eq', YES_NO[m[3]])]})),
+    (r'Pokud státní občanství (\d{5}) ?<> ?CZ(?:,)? pokud Druh pracovního oprávnění \((\d{5})\) = Povolení k zaměstnání, pak P',
+     required_when(lambda m, ctx: {'all': [cond(m[1], 'ne', 'CZ'), cond(m[2], 'eq', '1')]})),
+    (r'Pokud státní občanství (\d{5}) ?<> ?CZ',
+     required_when(lambda m, ctx: cond(m[1], 'ne', 'CZ'))),
+    (r'Povinn[éý],? pokud [Ss]tátní občanství \(?(\d{5}) ?\)? ?<> ?CZ',
+     required_when(lambda m, ctx: cond(m[1], 'ne', 'CZ'))),
+    (r'Pokud kód státu státního občanství(?: \((\d{5})\))? je odlišný od CZ,? pak je údaj povinný',
+     required_when(lambda m, ctx: cond(field_ref(m[1], 'státní občanství'), 'ne', 'CZ'))),
+    (r'Nepovinný u všech akcí A1, je-li státní občanství různé od CZ',
+     required_when(lambda m, ctx: {'not': cond(NAMED_FIELDS['státní občanství'], 'ne', 'CZ')})),
+    (r'Povinné v případě, že (\d{5}) Kód státu rezidenství je odlišný od CZ',
+     required_when(lambda m, ctx: cond(m[1], 'ne', 'CZ'))),
+    (r'Pokud kód státu rezidentství je odlišný od CZ(?: u akcí A1)?, pak je údaj povinný',
+     required_when(lambda m, ctx: cond(NAMED_FIELDS['kód státu rezidentství'], 'ne', 'CZ'))),
+    (r'(?:A1-OST, A1-SPEC )?je povinný pokud je vyplněn (\d{5})',
+     required_when(lambda m, ctx: cond(m[1], 'filled'))),
+
+    # Values that must not be filled
+    (r'Pokud je kód státu rezidentství CZ, nesmí být vyplněno',
+     lambda m, node, ctx: [{'kind': 'forbidden', 'targets': [node['id']],
+                            'when': cond(NAMED_FIELDS['kód státu rezidentství'], 'eq', 'CZ'), 'severity': WARNING}]),
+    (r'Může být vyplněno pouze pokud Druh zaměstnání = (\d)',
+     lambda m, node, ctx: [{'kind': 'forbidden', 'targets': [node['id']],
+                            'when': {'not': cond(NAMED_FIELDS['druh zaměstnání'], 'eq', m[1])}, 'severity': WARNING}]),
+
+    # Groups: all or none, one of
+    (r'Je-li uvedena hodnota některého údaje ze skupiny .*?\(\(?([\d,\s]+?)\s*(?:-[^)]*)?\)\s*\)? u daného typu adresy, '
+     r'stávají se všechny údaje skupiny .*povinnými.*',
+     lambda m, node, ctx: [{'kind': 'group', 'targets': sorted(re.findall(r'\d{5}', m[1])), 'severity': ERROR}]),
+    (r'Je-li vyplněno "[^"]*" \((\d{5}) = (A|N)\), je pro uvedené akce povinné vyplnění jednoho z údajů ve skupině \(([\d,\s]+)\)',
+     lambda m, node, ctx: [{'kind': 'one_of', 'targets': re.findall(r'\d{5}', m[3]),
+                            'when': cond(m[1], 'eq', m[2]), 'severity': ERROR}]),
+
+    # Relations between values (dates are ISO strings, compared as text)
+    (r'Datum do musí být větší než datum od', compare_with('gt', lambda m, node, ctx: sibling(node, ctx, 'fro'))),
+    (r'Nesmí být < (?:než )?odpovídající .* od', compare_with('gte', lambda m, node, ctx: sibling(node, ctx, 'fro'))),
+    (r'Nesmí být < Datum nástupu a nesmí být > Datum vyplnění',
+     lambda m, node, ctx: compare_with('gte', lambda *a: NAMED_FIELDS['datum nástupu'])(m, node, ctx) +
+     compare_with('lte', lambda *a: NAMED_FIELDS['datum vyplnění'])(m, node, ctx)),
+    (r'Nesmí být > Datum vyplnění', compare_with('lte', lambda m, node, ctx: NAMED_FIELDS['datum vyplnění'])),
+    (r'Datum od musí být menší nebo rovno datu vyplnění formuláře',
+     compare_with('lte', lambda m, node, ctx: NAMED_FIELDS['datum vyplnění'])),
+    (r'Datum od musí být menší než datum vyplnění formuláře',
+     compare_with('lt', lambda m, node, ctx: NAMED_FIELDS['datum vyplnění'])),
+    (r'Nemůže být vyplněné pokud není uvedené "[^"]*"',
+     lambda m, node, ctx: [{'kind': 'requires', 'targets': [node['id']], 'other': sibling(node, ctx, 'fro'),
+                            'severity': WARNING}] if sibling(node, ctx, 'fro') else []),
+    (r'(\d{5}) ?<> ?CZ and (\d{5}) ?= ?(\d{5})',
+     lambda m, node, ctx: [{'kind': 'equals', 'targets': [m[3]], 'other': m[2],
+                            'when': cond(m[1], 'ne', 'CZ'), 'severity': WARNING}]),
+]
+TEMPLATES = [(re.compile(pattern), build) for pattern, build in TEMPLATES]
+
+
+def rule_fields(rule):
+    fields = set(rule['targets'])
+    if rule.get('other'):
+        fields.add(rule['other'])
+    if rule.get('when'):
+        fields |= condition_fields(rule['when'])
+    return fields
+
+
+def form_fields(structure):
+    """
+    Returns ({field_id: node}, {original_path: field_id}) of the form fields that are not skipped.
+    """
+    nodes, paths = {}, {}
+    stack = [n for n in structure if n.get('key')]
+    while stack:
+        node = stack.pop()
+        if node.get('skip'):
+            continue
+        stack.extend(node.get('children') or [])
+        if node.get('id') and not node.get('children'):
+            nodes[node['id']] = node
+            if node.get('original_path'):
+                paths[node['original_path']] = node['id']
+    return nodes, paths
+
+
+def compile_rules(structure):
+    """
+    Compiles the Slovník rule texts of the form fields into a rule table.
+    Returns (table, notes); notes list the texts no template understood.
+    """
+    nodes, paths = form_fields(structure)
+    ctx = {'paths': paths}
+    rules, seen, notes = [], set(), []
+
+    for field_id in sorted(nodes):
+        node = nodes[field_id]
+        for column in COLUMNS:
+            for sentence in sentences(node.get(column)):
+                if COVERED_RE.match(sentence):
+                    continue
+                if (field_id, sentence) in EXCEPTIONS:
+                    notes.append({'field': field_id, 'column': column, 'text': sentence,
+                                  'reason': EXCEPTIONS[field_id, sentence]})
+                    continue
+                for regex, build in TEMPLATES:
+                    match = regex.fullmatch(sentence)
+                    if match:
+                        break
+                else:
+                    notes.append({'field': field_id, 'column': column, 'text': sentence, 'reason': 'not understood'})
+                    continue
+
+                for rule in build(match, node, ctx):
+                    missing = sorted(f for f in rule_fields(rule) if f not in nodes)
+                    if missing:
+                        notes.append({'field': field_id, 'column': column, 'text': sentence,
+                                      'reason': f"refers to fields not in the form: {', '.join(missing)}"})
+                        continue
+                    # Group rules are repeated on every member
+                    key = json.dumps(rule, sort_keys=True)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    rule['message'] = sentence
+                    rule['source'] = f"{field_id} {column}"
+                    rules.append(rule)
+
+    return build_table(rules), notes
+
+
+def build_table(rules):
+    """
+    Adds the rule IDs and the dependency graph: field -> indices of the rules
+    that have to be re-evaluated when the field changes.
+    """
+    dependents = {}
+    for i, rule in enumerate(rules):
+        rule['id'] = f"R{i + 1}"
+        for field in sorted(rule_fields(rule)):
+            dependents.setdefault(field, []).append(i)
+    return {
+        'version': RULES_VERSION,
+        'rules': rules,
+        'dependents': dict(sorted(dependents.items())),
+    }
+
+
+# Rules the form and the validators rely on; a Slovník wording change that stops
+# a template from matching them fails the compile instead of dropping them
+EXPECTED_RULES = [
+    # Rodné číslo is required unless the citizenship is other than CZ
+    {'kind': 'required', 'targets': ['10057'], 'when': {'not': cond('10067', 'ne', 'CZ')}},
+]
+
+
+def missing_rules(table):
+    """
+    Returns the EXPECTED_RULES with no matching rule in the table.
+    """
+    return [expected for expected in EXPECTED_RULES
+            if not any(all(rule.get(k) == v for k, v in expected.items()) for rule in table['rules'])]
+
+
+# --- Evaluation (same semantics as the RuleEngine in docs/regzec_form.js) ---
+
+COMPARE = {
+    'gt': lambda a, b: a > b,
+    'gte': lambda a, b: a >= b,
+    'lt': lambda a, b: a < b,
+    'lte': lambda a, b: a <= b,
+}
+
+
+class RuleTable:
+    """
+    Rule table for server-side checks, with the conditions compiled once.
+
+        table = RuleTable.load()
+        required = table.required_fields(data)    # fields made mandatory by the rules
+        for issue in table.check(data): ...       # {'rule', 'field', 'severity', 'message'}
+
+    Both take the rule indices to evaluate, e.g. table.affected(field) after one change.
+    """
+
+    def __init__(self, table):
+        if table.get('version') != RULES_VERSION:
+            raise ValueError(f"Unsupported rules version {table.get('version')!r}")
+        self.table = table
+        self.rules = table['rules']
+        self.dependents = table['dependents']
+        self.when = [compile_condition(rule['when']) if rule.get('when') else None for rule in self.rules]
+
+    def __reduce__(self):
+        # The compiled conditions are closures: rebuild them from the table (spawn workers)
+        return RuleTable, (self.table,)
+
+    @classmethod
+    def load(cls, path=RULES_FILE):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def affected(self, field):
+        # Rules to re-evaluate after `field` changed
+        return self.dependents.get(field, [])
+
+    def applies(self, index, data):
+        when = self.when[index]
+        return when is None or when(data)
+
+    def required_fields(self, data, indices=None):
+        required = set()
+        for i in range(len(self.rules)) if indices is None else indices:
+            rule = self.rules[i]
+            if rule['kind'] == 'required' and self.applies(i, data):
+                required.update(rule['targets'])
+            elif rule['kind'] == 'group' and any(not is_empty(data.get(f)) for f in rule['targets']):
+                required.update(rule['targets'])
+        return required
+
+    def check(self, data, indices=None):
+        """
+        Returns the issues of the value rules (required fields are left to the caller,
+        see required_fields).
+        """
+        issues = []
+
+        def issue(rule, field):
+            issues.append({'rule': rule['id'], 'field': field, 'severity': rule['severity'],
+                           'message': rule['message']})
+
+        for i in range(len(self.rules)) if indices is None else indices:
+            rule = self.rules[i]
+            kind = rule['kind']
+            if kind in ('required', 'group') or not self.applies(i, data):
+                continue
+            if kind == 'one_of':
+                if all(is_empty(data.get(f)) for f in rule['targets']):
+                    for field in rule['targets']:
+                        issue(rule, field)
+                continue
+            other = data.get(rule.get('other'))
+            for field in rule['targets']:
+                value = data.get(field)
+                if is_empty(value):
+                    continue
+                if kind == 'forbidden':
+                    issue(rule, field)
+                elif kind == 'requires' and is_empty(other):
+                    issue(rule, field)
+                elif kind == 'compare' and not is_empty(other) and not COMPARE[rule['op']](value, other):
+                    issue(rule, field)
+                elif kind == 'equals' and not is_empty(other) and value != other:
+                    issue(rule, field)
+        return issues
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the Slovník rule texts of the form into a rule table.")
+    parser.add_argument("--form", default=FORM_FILE, help=f"Form structure JSON (default: {FORM_FILE})")
+    parser.add_argument("--output", default=RULES_FILE, help=f"Rule table JSON (default: {RULES_FILE})")
+    parser.add_argument("--notes", action="store_true", help="List the texts that were not compiled")
+    args = parser.parse_args()
+
+    try:
+        with open(args.form, 'r', encoding='utf-8') as f:
+            structure = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+
+    table, notes = compile_rules(structure)
+    missing = missing_rules(table)
+    if missing:
+        for rule in missing:
+            print(f"Error: expected rule not compiled: {json.dumps(rule, ensure_ascii=False)}")
+        print(f"{len(notes)} texts were not compiled:")
+        for note in notes:
+            print(f"  {note['field']} {note['column']}: {note['text']} [{note['reason']}]")
+        sys.exit(1)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(table, f, indent=2, ensure_ascii=False)
+
+    counts = {}
+    for rule in table['rules']:
+        counts[rule['kind']] = counts.get(rule['kind'], 0) + 1
+    summary = ', '.join(f"{n} {kind}" for kind, n in sorted(counts.items()))
+    print(f"Compiled {len(table['rules'])} rules ({summary}) over {len(table['dependents'])} fields to {args.output}")
+    print(f"{len(notes)} texts were not compiled" + ("" if args.notes else " (--notes lists them)"))
+    if args.notes:
+        for note in notes:
+            print(f"  {note['field']} {note['column']}: {note['text']} [{note['reason']}]")
+
+
+if __name__ == "__main__":
+    main()
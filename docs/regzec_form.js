@@ -2,6 +2,27 @@
 // dynamic mode detection based on filename
 const SHOW_NEW_ONLY_FIELDS = window.location.pathname.includes('new_regzec_form');
 
+// Optional intake service (intake_server.py), e.g. ?intake=http://127.0.0.1:8080/submit
+// Without it (or when it is not reachable) the questionnaire is downloaded
+const INTAKE_URL = new URLSearchParams(window.location.search).get('intake');
+const INTAKE_RETRIES = 3;
+
+// Conditional rules engine, set up once the form is loaded
+let ruleEngine = null;
+
+// Built-in rule table used when regzec_rules.json cannot be loaded: Rodné číslo (10057)
+// stays required unless a citizenship (10067) other than CZ is selected (R1 of the compiled table)
+const FALLBACK_RULES = {
+    version: 1,
+    rules: [{
+        kind: 'required', targets: ['10057'],
+        when: { not: { field: '10067', op: 'ne', value: 'CZ' } },
+        severity: 'error', message: 'Rodné číslo je povinné pro státní občanství CZ',
+        source: 'regzec_form.js', id: 'R1'
+    }],
+    dependents: { '10067': [0] }
+};
+
 // --- Main Logic ---
 document.addEventListener('DOMContentLoaded', async () => {
 
@@ -14,38 +35,39 @@ document.addEventListener('DOMContentLoaded', async () => {
     }
 
     try {
-        // 1. Fetch Structure and Enums
+        // 1. Fetch the precompiled form bundle (see build_form_bundle.py) and the
+        //    conditional rules (see compile_rules.py); without them FALLBACK_RULES apply
         // Note: paths are relative to the HTML file location
-        const [structureResp, enumsResp] = await Promise.all([
-            fetch('regzec_form.json'),
-            fetch('regzec_enums.json')
+        const bundleFile = SHOW_NEW_ONLY_FIELDS ? 'new_regzec_form.bundle.json' : 'regzec_form.bundle.json';
+        const [bundleResp, loadedRules] = await Promise.all([
+            fetch(bundleFile),
+            fetch('regzec_rules.json')
+                .then(resp => resp.ok ? resp.json() : null)
+                .catch(() => null)
         ]);
 
-        if (!structureResp.ok) throw new Error('Failed to load JSON structure');
-        if (!enumsResp.ok) throw new Error('Failed to load Enums');
+        if (!bundleResp.ok) throw new Error('Failed to load form bundle');
+        const rulesTable = loadedRules || FALLBACK_RULES;
+        if (!loadedRules) console.warn('Conditional rules not loaded, only the built-in citizenship rule applies');
 
-        const structure = await structureResp.json();
-        const enums = await enumsResp.json();
+        // 2. Layout, fields and default values are ready to use
+        const { layout, fields, values, enums } = await bundleResp.json();
 
-        // 2. Transform Data
-        const { layout, fields, values } = buildMetadata(structure, enums);
+        // Published bundles keep every codelist once and refer to it by key (see publish_docs.py)
+        if (enums) {
+            for (const field of Object.values(fields)) {
+                if (typeof field.options === 'string') field.options = enums[field.options];
+            }
+        }
 
         // --- Custom Logic: Default Citizenship (10067) = CZ ---
         if (!values['10067']) {
             values['10067'] = 'CZ';
         }
 
-        // --- Custom Logic: Rodné číslo (10057) mandatory if Citizenship (10067) is CZ ---
-        // Initial state: User requested it to be mandatory initially.
-        if (fields['10057']) {
-            fields['10057'].required = true;
-
-            // Check initial value if present (e.g. from default or loaded data)
-            const initialCitizenship = values['10067'];
-            if (initialCitizenship && initialCitizenship !== 'CZ') {
-                fields['10057'].required = false;
-            }
-        }
+        // Required flags follow the rules from the start (e.g. Rodné číslo 10057 for CZ citizens)
+        ruleEngine = createRuleEngine(rulesTable, fields);
+        ruleEngine.evaluateAll(values);
 
         // 3. Initialize Form
         const buttonsConfig = [
@@ -93,38 +115,19 @@ document.addEventListener('DOMContentLoaded', async () => {
             updateButtonState(formEl, 'save', { hidden: true });
             updateButtonState(formEl, 'check-data', { hidden: false });
 
-
-
-            // --- Custom Logic: Rodné číslo (10057) vs Citizenship (10067) ---
-            try {
-                // We need to access current form data. 
-                // Assuming ts-form exposes .formData or we can use internal tracking.
-                // Since this is a custom script for a specific form, we rely on the component behavior.
-                // Use formEl.formData if available
-                const currentData = formEl.formData || {};
-                const citizenship = currentData['10067'];
-
-                // Logic: Mandatory if CZ. User said "Initially mandatory".
-                // If citizenship is selected and NOT CZ -> Optional.
-                // If CZ or Empty (initially) -> Mandatory.
-
-                const isRequired = (!citizenship || citizenship === 'CZ');
-
-                // We need to update the field config.
-                // Reading attribute is slow but reliable source of truth for config.
-                const currentFields = JSON.parse(formEl.getAttribute('fields') || '{}');
-
-                if (currentFields['10057']) {
-                    if (currentFields['10057'].required !== isRequired) {
-                        console.log(`Updating BNO (10057) requirement to ${isRequired} (Citizenship: ${citizenship})`);
-                        currentFields['10057'].required = isRequired;
-                        formEl.setAttribute('fields', JSON.stringify(currentFields));
-                        // Note: Changing 'fields' attribute triggers re-render in ts-form. 
-                        // This might cause loss of focus if not handled carefully in ts-form.
+            // Re-evaluate only the rules that depend on the changed field;
+            // the fields attribute is rewritten (re-render) only if a required flag changed
+            if (ruleEngine) {
+                try {
+                    const currentData = e.detail.formData || formEl.formData || {};
+                    const changed = ruleEngine.update(e.detail.field, currentData);
+                    if (changed.length > 0) {
+                        console.log('Required changed by rules:', changed);
+                        formEl.setAttribute('fields', JSON.stringify(fields));
                     }
+                } catch (err) {
+                    console.error("Error in form-changed rule evaluation", err);
                 }
-            } catch (err) {
-                console.error("Error in form-changed custom logic", err);
             }
         });
 
@@ -193,15 +196,139 @@ function validateForm(event, formEl) {
 }
 
 function validateConditionalRules(formData, errors) {
-    // Placeholder for future conditional logic
-    // Example:
-    // if (formData['someField'] === 'X' && !formData['otherField']) {
-    //     errors['otherField'] = "Must be filled if someField is X";
-    // }
+    if (!ruleEngine) return errors;
 
+    // Errors block the submission, warnings (relations between values) are only reported
+    for (const issue of ruleEngine.check(formData)) {
+        if (issue.severity === 'error') {
+            if (!errors[issue.field]) errors[issue.field] = issue.message;
+        } else {
+            console.warn(`Rule ${issue.rule} (${issue.field}): ${issue.message}`);
+        }
+    }
     return errors;
 }
 
+// --- Conditional Rules (same semantics as RuleTable in compile_rules.py) ---
+
+function isEmptyValue(value) {
+    return value === null || value === undefined || value === '' || (Array.isArray(value) && value.length === 0);
+}
+
+function compileCondition(c) {
+    if (c.all) {
+        const parts = c.all.map(compileCondition);
+        return data => parts.every(p => p(data));
+    }
+    if (c.any) {
+        const parts = c.any.map(compileCondition);
+        return data => parts.some(p => p(data));
+    }
+    if (c.not) {
+        const part = compileCondition(c.not);
+        return data => !part(data);
+    }
+    const { field, op, value } = c;
+    switch (op) {
+        case 'filled': return data => !isEmptyValue(data[field]);
+        case 'empty': return data => isEmptyValue(data[field]);
+        case 'eq': return data => data[field] === value;
+        case 'ne': return data => !isEmptyValue(data[field]) && data[field] !== value;
+        default: throw new Error(`Unknown condition operator ${op}`);
+    }
+}
+
+const COMPARE = {
+    gt: (a, b) => a > b,
+    gte: (a, b) => a >= b,
+    lt: (a, b) => a < b,
+    lte: (a, b) => a <= b
+};
+
+function createRuleEngine(table, fields) {
+    const rules = table.rules;
+    const when = rules.map(rule => rule.when ? compileCondition(rule.when) : null);
+
+    // Required from the schema; rules can only add to it
+    const baseRequired = {};
+    for (const [id, field] of Object.entries(fields)) baseRequired[id] = !!field.required;
+
+    // Required/group rules currently in effect and how many of them require each field
+    const active = rules.map(() => false);
+    const requiredBy = {};
+
+    const applies = (i, data) => when[i] === null || when[i](data);
+
+    const isActive = (i, data) => {
+        const rule = rules[i];
+        if (rule.kind === 'required') return applies(i, data);
+        return rule.targets.some(f => !isEmptyValue(data[f]));  // group
+    };
+
+    // Evaluates the given rules and updates fields[*].required in place.
+    // Returns the IDs of the fields whose required flag changed.
+    const evaluate = (indices, data) => {
+        const touched = new Set();
+        for (const i of indices) {
+            const kind = rules[i].kind;
+            if (kind !== 'required' && kind !== 'group') continue;
+            const now = isActive(i, data);
+            if (now === active[i]) continue;
+            active[i] = now;
+            for (const f of rules[i].targets) {
+                requiredBy[f] = (requiredBy[f] || 0) + (now ? 1 : -1);
+                touched.add(f);
+            }
+        }
+        const changed = [];
+        for (const f of touched) {
+            if (!fields[f]) continue;  // not in this form variant
+            const required = baseRequired[f] || requiredBy[f] > 0;
+            if (fields[f].required !== required) {
+                fields[f].required = required;
+                changed.push(f);
+            }
+        }
+        return changed;
+    };
+
+    return {
+        evaluateAll: data => evaluate(rules.keys(), data),
+        // A change without a field (e.g. imported data) re-evaluates everything
+        update: (field, data) => field === undefined
+            ? evaluate(rules.keys(), data)
+            : evaluate(table.dependents[field] || [], data),
+
+        // Issues of the value rules: [{rule, field, severity, message}]
+        check(data) {
+            const issues = [];
+            const issue = (rule, field) => {
+                if (fields[field]) issues.push({ rule: rule.id, field, severity: rule.severity, message: rule.message });
+            };
+            rules.forEach((rule, i) => {
+                const kind = rule.kind;
+                if (kind === 'required' || kind === 'group' || !applies(i, data)) return;
+                if (kind === 'one_of') {
+                    if (rule.targets.every(f => isEmptyValue(data[f]))) rule.targets.forEach(f => issue(rule, f));
+                    return;
+                }
+                const other = data[rule.other];
+                for (const f of rule.targets) {
+                    const value = data[f];
+                    if (isEmptyValue(value)) continue;
+                    if (kind === 'forbidden' ||
+                        (kind === 'requires' && isEmptyValue(other)) ||
+                        (kind === 'compare' && !isEmptyValue(other) && !COMPARE[rule.op](value, other)) ||
+                        (kind === 'equals' && !isEmptyValue(other) && value !== other)) {
+                        issue(rule, f);
+                    }
+                }
+            });
+            return issues;
+        }
+    };
+}
+
 async function saveForm(event, formEl) {
     const formData = event.detail.formData;
     console.log('saveForm called', formData);
@@ -249,6 +376,9 @@ async function saveForm(event, formEl) {
         const filename = `${dateStr} Osobní dotazník ${surname} ${name}.json`;
 
         const blob = new Blob([JSON.stringify(exportData, null, 2)], { type: 'application/json' });
+
+        if (INTAKE_URL && await submitToIntake(blob)) return;
+
         const url = URL.createObjectURL(blob);
         const a = document.createElement('a');
         a.href = url;
@@ -266,6 +396,45 @@ async function saveForm(event, formEl) {
     }
 }
 
+// Posts the questionnaire to the intake service. Returns true when it was stored
+// or rejected there, false when the download should be used instead.
+async function submitToIntake(blob) {
+    const url = new URL(INTAKE_URL, window.location.href);
+    url.searchParams.set('form', SHOW_NEW_ONLY_FIELDS ? 'new' : 'standard');
+
+    for (let attempt = 1; attempt <= INTAKE_RETRIES; attempt++) {
+        let resp;
+        try {
+            resp = await fetch(url, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: blob });
+        } catch (e) {
+            console.warn('Intake service not reachable, downloading instead', e);
+            return false;
+        }
+
+        if (resp.status === 503 && attempt < INTAKE_RETRIES) {
+            // Busy: wait as asked and try again
+            const delay = Number(resp.headers.get('Retry-After')) || 1;
+            await new Promise(resolve => setTimeout(resolve, delay * 1000 * attempt));
+            continue;
+        }
+
+        const result = await resp.json().catch(() => ({}));
+        if (resp.status === 201) {
+            console.log('Submitted to intake:', result);
+            alert('Dotazník byl odeslán.');
+            return true;
+        }
+        if (resp.status === 422) {
+            console.log('Intake rejected the questionnaire:', result.errors);
+            alert('Dotazník nebyl přijat, obsahuje chyby. Zkontrolujte data a zkuste to znovu.');
+            return true;
+        }
+        console.warn(`Intake service answered ${resp.status}, downloading instead`, result);
+        return false;
+    }
+    return false;
+}
+
 function updateButtonState(formEl, actionName, updates) {
     try {
         const currentButtons = JSON.parse(formEl.getAttribute('buttons') || '[]');
@@ -297,233 +466,3 @@ function updateButtonState(formEl, actionName, updates) {
         console.error("Failed to update button state", e);
     }
 }
-
-
-// --- Builder Functions ---
-
-function buildMetadata(structure, enums) {
-    // Assume structure is array [ { key: 'employee', children: [...] } ]
-    const root = structure.find(n => n.key === 'employee');
-    if (!root) throw new Error("Root 'employee' node not found");
-
-    const fields = {};
-    const initialValues = {};
-    const tabs = [];
-
-    // Process Root Children as Tabs
-    if (root.children) {
-        root.children.forEach(child => {
-            if (shouldSkip(child)) return;
-
-            const tab = buildTab(child, fields, enums, initialValues);
-            if (tab) tabs.push(tab);
-        });
-    }
-
-    return {
-        layout: { tabs },
-        fields: fields,
-        values: initialValues
-    };
-}
-
-function shouldSkip(node) {
-    if (node.skip) return true;
-    // If Standard Mode (SHOW_NEW_ONLY_FIELDS = false), skip if node is 'new_only'
-    if (!SHOW_NEW_ONLY_FIELDS && node.new_only) return true;
-    return false;
-}
-
-function buildTab(node, fieldsAccumulator, enums, valuesAccumulator) {
-    // Flatten the node's subtree into a list of Items (Fields or Separators)
-    const flatItems = flattenNode(node, fieldsAccumulator, enums, valuesAccumulator); // Returns array of { type, ... }
-
-    if (flatItems.length === 0) return null;
-
-    // Pack Items into Rows
-    const rows = packRows(flatItems);
-
-    return {
-        label: node.description || node.key,
-        rows: rows
-    };
-}
-
-function flattenNode(node, fieldsAccumulator, enums, valuesAccumulator) {
-    let items = [];
-
-    if (node.children && node.children.length > 0) {
-        // It's a Group/Section
-        node.children.forEach(child => {
-            if (shouldSkip(child)) return;
-
-            // If child is a group (has children), adds Separator + Recurse
-            // If child is a leaf, adds Field
-
-            if (child.children && child.children.length > 0) {
-                // Group
-                if (child.description) {
-                    items.push({
-                        type: 'separator',
-                        label: child.description,
-                        width: 12
-                    });
-                }
-                items = items.concat(flattenNode(child, fieldsAccumulator, enums, valuesAccumulator));
-            } else {
-                // Leaf
-                const item = createFieldItem(child, fieldsAccumulator, enums, valuesAccumulator);
-                items.push(item);
-            }
-        });
-    }
-
-    return items;
-}
-
-function createFieldItem(node, fieldsAccumulator, enums, valuesAccumulator) {
-    // Construct dotted path
-    // NEW: Use ID if available, otherwise fallback to path/key
-    const fieldName = node.id || node.original_path || node.key;
-
-    // Default config
-    const config = {
-        type: node.widget || 'input',
-        label: node.description || node.key,
-    };
-
-    // Handle Selection -> Combobox
-    if (node.widget === 'selection') {
-        config.type = 'combobox';
-        config.allowCustom = false;
-        config.allowEmpty = true;
-        config.placeholder = 'Vyberte...';
-
-        if (node.ciselnik && enums[node.ciselnik]) {
-            config.options = enums[node.ciselnik];
-        } else {
-            config.options = []; // Fallback empty
-            console.warn(`Enum not found for ${fieldName} (ciselnik: ${node.ciselnik})`);
-        }
-    }
-
-    // Handle Markdown
-    if (node.widget === 'markdown') {
-        config.type = 'markdown';
-        if (node.content) {
-            config.content = node.content;
-        }
-        // Markdown fields often span full width
-        config.width = '12';
-    }
-
-    // Handle Separator
-    if (node.widget === 'separator') {
-        // Special case: return immediately, do not add to fieldsAccumulator
-        return {
-            type: 'separator',
-            label: node.description || node.label,
-            width: 12
-        };
-    }
-
-    // Handle File
-    if (node.widget === 'file') {
-        config.type = 'file';
-        if (node.multiple) {
-            config.multiple = true;
-        }
-        if (node.label) {
-            config.innerLabel = node.label;
-        }
-    }
-
-    // Handle Textarea
-    if (node.widget === 'textarea') {
-        config.type = 'textarea';
-        if (node.rows) {
-            config.rows = node.rows;
-        }
-    }
-
-    // Handle Mandatory
-    if (node.mandatory === 'P') {
-        config.required = true;
-    }
-
-    // Handle Default Value
-    if (node.default_value !== undefined && node.default_value !== null && node.default_value !== "") {
-        valuesAccumulator[fieldName] = node.default_value;
-    }
-
-    // Handle Placeholder
-    if (node.placeholder) {
-        config.placeholder = node.placeholder;
-    }
-
-    // Add to fields config
-    fieldsAccumulator[fieldName] = config;
-
-    return {
-        type: 'field',
-        field: fieldName,
-        width: parseInt(node.width || 12, 10), // Ensure number
-    };
-}
-
-function packRows(items) {
-    const rows = [];
-    let currentRow = [];
-    let currentWidthSum = 0;
-
-    items.forEach(item => {
-        if (currentWidthSum + item.width > 12) {
-            // Finish current row
-            if (currentRow.length > 0) {
-                // Pad if needed
-                if (currentWidthSum < 12) {
-                    const diff = 12 - currentWidthSum;
-                    currentRow.push({ type: 'empty', width: diff });
-                }
-                rows.push(convertRowToFr(currentRow));
-            }
-            currentRow = [];
-            currentWidthSum = 0;
-        }
-
-        currentRow.push(item);
-        currentWidthSum += item.width;
-    });
-
-    if (currentRow.length > 0) {
-        if (currentWidthSum < 12) {
-            const diff = 12 - currentWidthSum;
-            currentRow.push({ type: 'empty', width: diff });
-        }
-        rows.push(convertRowToFr(currentRow));
-    }
-
-    return rows;
-}
-
-function convertRowToFr(rowItems) {
-    // rowItems: [{field, width}, ...]
-    // Output: [{field, width: '6fr'}, ...]
-    return rowItems.map(item => {
-        if (item.type === 'separator') {
-            return { type: 'separator', label: item.label, width: '12fr' }; // Full width
-        }
-        if (item.type === 'empty') {
-            return { type: 'empty', width: `${item.width}fr` };
-        }
-
-        // Destructure width out of item to strictly avoid integer overwrite
-        // or just spread first. Spread first is safer for unknown props.
-        const { width, ...rest } = item;
-
-        return {
-            ...rest,
-            width: `${width}fr`
-        };
-    });
-}
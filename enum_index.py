@@ -0,0 +1,235 @@
+import argparse
+import json
+import re
+import sys
+import unicodedata
+
+ENUMS_FILE = 'docs/regzec_enums.json'
+INDEX_FILE = 'docs/regzec_enums.index.json'
+
+INDEX_VERSION = 1
+
+# Czech diacritics folding, shared with normalize_key in extract_regzec_structure.py
+CZECH_FOLD = str.maketrans("áčďéěíňóřšťúůýž", "acdeeinorstuuyz")
+
+# Prefix postings are kept up to this length, longer queries use trigrams
+MAX_PREFIX = 3
+
+NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+# Match ranks, best first
+RANK_LABEL_PREFIX = 0
+RANK_TOKEN_PREFIX = 1
+RANK_SUBSTRING = 2
+
+
+def fold(text):
+    """
+    Lower case without diacritics: the Czech table first (like normalize_key),
+    other accented letters (e.g. 'ç') through Unicode decomposition.
+    """
+    text = str(text).lower().translate(CZECH_FOLD)
+    if not text.isascii():
+        text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return text
+
+
+def search_text(text):
+    # Folded text with every run of other characters (spaces, dashes, nbsp) as one space
+    return NON_ALNUM_RE.sub(' ', fold(text)).strip()
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def build_enum_index(options):
+    """
+    Builds the search index of one codelist ({value, label} options, in codelist order):
+    - text: folded "label value" per option (for verifying substring matches)
+    - prefixes: token prefix (1..MAX_PREFIX chars) -> option positions
+    - trigrams: trigram of the text -> option positions
+    - order: option positions in display order (shorter, then alphabetical labels first)
+    """
+    texts = [search_text(f"{o.get('label', '')} {o.get('value', '')}") for o in options]
+    prefixes, grams = {}, {}
+    for i, text in enumerate(texts):
+        for token in set(text.split()):
+            for length in range(1, min(MAX_PREFIX, len(token)) + 1):
+                postings = prefixes.setdefault(token[:length], [])
+                if not postings or postings[-1] != i:
+                    postings.append(i)
+        for gram in trigrams(text):
+            grams.setdefault(gram, []).append(i)
+
+    order = sorted(range(len(options)), key=lambda i: (len(texts[i]), texts[i]))
+    return {
+        'values': [o.get('value') for o in options],
+        'text': texts,
+        'prefixes': {k: sorted(v) for k, v in sorted(prefixes.items())},
+        'trigrams': {k: sorted(v) for k, v in sorted(grams.items())},
+        'order': order,
+    }
+
+
+def build_index(enums):
+    return {
+        'version': INDEX_VERSION,
+        'enums': {key: build_enum_index(options) for key, options in enums.items()},
+    }
+
+
+def save_index(index, path=INDEX_FILE):
+    # Compact: the index is fetched by the browser
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+
+
+class EnumIndex:
+    """
+    Lookup API over the prebuilt codelist index.
+
+        index = EnumIndex.load()
+        index.search('state', 'cesk')        # -> [{'value': 'CZ', 'label': ...}, ...]
+        index.resolve('state', 'Česko')      # -> 'CZ' (best match) or None
+    """
+
+    def __init__(self, index, enums=None):
+        if index.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported enum index version {index.get('version')!r}")
+        self.enums = index['enums']
+        self.options = enums or {}
+        # Display position of every option, for ranking ties
+        self.positions = {key: {i: pos for pos, i in enumerate(e['order'])} for key, e in self.enums.items()}
+
+    @classmethod
+    def load(cls, index_file=INDEX_FILE, enums_file=ENUMS_FILE):
+        with open(index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        enums = None
+        if enums_file:
+            with open(enums_file, 'r', encoding='utf-8') as f:
+                enums = json.load(f)
+        return cls(index, enums)
+
+    def candidates(self, key, query):
+        """
+        Option positions whose folded text contains the query (a single character
+        only at the start of a word), ranked. An empty query lists every option.
+        Returns a list of (rank, display position, option position).
+        """
+        entry = self.enums[key]
+        texts = entry['text']
+        if not query:
+            return [(RANK_SUBSTRING, pos, i) for pos, i in enumerate(entry['order'])]
+
+        if len(query) == 1:
+            # A single letter anywhere would match almost everything: token prefixes only
+            found = entry['prefixes'].get(query, [])
+        elif len(query) == 2:
+            # No trigram to look up: scan the (small) text list
+            found = [i for i, text in enumerate(texts) if query in text]
+        else:
+            found = None
+            for gram in sorted(trigrams(query), key=lambda g: len(entry['trigrams'].get(g, ()))):
+                postings = entry['trigrams'].get(gram)
+                if not postings:
+                    return []
+                found = set(postings) if found is None else found.intersection(postings)
+                if not found:
+                    return []
+            found = [i for i in found if query in texts[i]]
+
+        positions = self.positions[key]
+        ranked = []
+        for i in found:
+            text = texts[i]
+            if text.startswith(query):
+                rank = RANK_LABEL_PREFIX
+            elif f" {query}" in text:
+                rank = RANK_TOKEN_PREFIX
+            else:
+                rank = RANK_SUBSTRING
+            ranked.append((rank, positions[i], i))
+        ranked.sort()
+        return ranked
+
+    def search(self, key, query, limit=None):
+        """
+        Returns the matching options of codelist `key` for a typed text, best first.
+        """
+        ranked = self.candidates(key, search_text(query))
+        if limit is not None:
+            ranked = ranked[:limit]
+        values = self.enums[key]['values']
+        options = self.options.get(key)
+        return [options[i] if options else {'value': values[i]} for _, _, i in ranked]
+
+    def resolve(self, key, text, min_similarity=0.5):
+        """
+        Maps a typed label (or code) to a codelist value: exact code first, then the best
+        substring match, then the option sharing the most trigrams (e.g. "Česko" -> CZ).
+        """
+        values = self.enums[key]['values']
+        if text in values:
+            return text
+        query = search_text(text)
+        if not query:
+            # Blank cells stay blank (candidates() would list every option)
+            return None
+        ranked = self.candidates(key, query)
+        if ranked:
+            return values[ranked[0][2]]
+
+        grams = trigrams(query)
+        if not grams:
+            return None
+        shared = {}
+        for gram in grams:
+            for i in self.enums[key]['trigrams'].get(gram, ()):
+                shared[i] = shared.get(i, 0) + 1
+        if not shared:
+            return None
+        positions = self.positions[key]
+        best = min(shared, key=lambda i: (-shared[i], positions[i]))
+        return values[best] if shared[best] / len(grams) >= min_similarity else None
+
+    def resolve_many(self, key, texts):
+        """
+        Batch variant of resolve(); repeated texts are looked up once.
+        """
+        cache = {}
+        return [cache[t] if t in cache else cache.setdefault(t, self.resolve(key, t)) for t in texts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the codelist search index.")
+    parser.add_argument("--build", action="store_true", help=f"Rebuild {INDEX_FILE} from {ENUMS_FILE}")
+    parser.add_argument("--enums", default=ENUMS_FILE, help=f"Enums JSON (default: {ENUMS_FILE})")
+    parser.add_argument("--index", default=INDEX_FILE, help=f"Index JSON (default: {INDEX_FILE})")
+    parser.add_argument("key", nargs='?', help="Codelist key, e.g. state")
+    parser.add_argument("query", nargs='?', default='', help="Text to search for")
+    parser.add_argument("--limit", type=int, default=10, help="Maximum number of results (default: 10)")
+    args = parser.parse_args()
+
+    if args.build:
+        with open(args.enums, 'r', encoding='utf-8') as f:
+            enums = json.load(f)
+        save_index(build_index(enums), args.index)
+        print(f"Saved {args.index} ({len(enums)} codelists)")
+        if not args.key:
+            return
+
+    if not args.key:
+        parser.error("key is required unless --build is given")
+
+    index = EnumIndex.load(args.index, args.enums)
+    if args.key not in index.enums:
+        print(f"Error: unknown codelist '{args.key}'", file=sys.stderr)
+        sys.exit(2)
+    for option in index.search(args.key, args.query, limit=args.limit):
+        print(f"{option['value']:<6} {option.get('label', '')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+import argparse
+import base64
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape, quoteattr
+
+import pandas as pd
+
+import extract_regzec_structure as ers
+from submission_reader import iter_submission
+from workbook_cache import add_cache_arguments, cache_from_args
+
+STRUCTURE_FILE = 'regzec_structure.json'
+FORM_FILE = 'docs/regzec_form.json'
+EXCEL_FILE = ers.EXCEL_FILE
+
+# Root element of the data message (sheet 'Obecná část' in regzec.xlsx)
+NAMESPACE = 'http://schemas.cssz.cz/REGZEC/2025'
+VERSION = '1.31'
+
+# Repeated group filled from the uploaded files: child element ID -> file item key
+ATTACHMENT_GROUP = 'employee.attachs.attach'
+ATTACHMENT_FIELDS = {'10396': 'name', '10397': 'desc', '10400': 'data'}
+
+# Raw bytes per base64 chunk (multiple of 3, so chunks concatenate without padding)
+BASE64_CHUNK = 3 * (1 << 16)
+
+
+def split_path(path):
+    # 'employee.job@relat' -> (['employee', 'job'], 'relat')
+    elements, _, attribute = path.partition('@')
+    return elements.split('.'), attribute or None
+
+
+class PlanNode:
+    """
+    One element of the emission plan: attributes and text come from field IDs,
+    `ids` holds every field ID of the subtree (elements without data are skipped),
+    `has_attachments` marks the path down to the attachment group.
+    """
+    __slots__ = ('name', 'text_id', 'attributes', 'children', 'ids', 'repeated', 'has_attachments', 'first_row')
+
+    def __init__(self, name):
+        self.name = name
+        self.text_id = None
+        self.attributes = []
+        self.children = []
+        self.ids = frozenset()
+        self.repeated = False
+        self.has_attachments = False
+        # Slovník row of the first field in the subtree (element order of the message)
+        self.first_row = None
+
+
+def build_plan(structure, positions):
+    """
+    Builds the ID -> XML emission plan from regzec_structure.json (or the form
+    structure). Both are sorted by path; `positions` ({field_id: Slovník position},
+    see load_slovnik_order) puts elements and attributes back into the Slovník
+    order, fields missing from it follow in path order. Returns the 'employee' PlanNode.
+    """
+    root = PlanNode('employee')
+    index = {'employee': root}
+
+    stack = list(reversed(structure))
+    while stack:
+        node = stack.pop()
+        if node.get('children'):
+            stack.extend(reversed(node['children']))
+            continue
+        field_id, path = str(node.get('id') or ''), node.get('original_path') or ''
+        if not field_id.isdigit() or not path.startswith('employee'):
+            continue
+
+        elements, attribute = split_path(path)
+        row = positions.get(field_id)
+        current = root
+        prefix = elements[0]
+        for name in elements[1:]:
+            prefix += '.' + name
+            child = index.get(prefix)
+            if child is None:
+                child = PlanNode(name)
+                child.repeated = prefix == ATTACHMENT_GROUP
+                current.children.append(child)
+                index[prefix] = child
+            current = child
+        if attribute:
+            current.attributes.append((attribute, field_id, row))
+        else:
+            current.text_id = field_id
+        if row is not None and (current.first_row is None or row < current.first_row):
+            current.first_row = row
+
+    # Subtree ID sets, children before parents
+    order = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(node.children)
+    for node in reversed(order):
+        rows = [c.first_row for c in node.children if c.first_row is not None]
+        if node.first_row is not None:
+            rows.append(node.first_row)
+        node.first_row = min(rows, default=None)
+        # Stable: subtrees without rows stay in path order, after the ordered ones
+        node.children.sort(key=lambda c: (c.first_row is None, c.first_row or 0))
+        node.attributes.sort(key=lambda a: (a[2] is None, a[2] or 0))
+        node.attributes = [(name, fid) for name, fid, _ in node.attributes]
+        ids = {fid for _, fid in node.attributes}
+        if node.text_id:
+            ids.add(node.text_id)
+        for child in node.children:
+            ids |= child.ids
+        node.ids = frozenset(ids)
+        node.has_attachments = node.repeated or any(c.has_attachments for c in node.children)
+
+    return root
+
+
+def load_slovnik_order(workbook=EXCEL_FILE, cache=None):
+    """
+    Returns {field_id: position} of the employee fields in the Slovník sheet,
+    which is the element order of the data message.
+    """
+    if cache:
+        df = cache.read_sheet(workbook, ers.SHEET_NAME, header=None)
+    else:
+        df = pd.read_excel(workbook, sheet_name=ers.SHEET_NAME, header=None)
+    order = {}
+    for item in ers.collect_items(df):
+        order.setdefault(item['id'], len(order))
+    return order
+
+
+def load_file_fields(form_file=FORM_FILE):
+    """
+    Returns {field_id: label} of the form's file fields; their files become attachments.
+    """
+    with open(form_file, 'r', encoding='utf-8') as f:
+        structure = json.load(f)
+    fields = {}
+    stack = list(structure)
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        if node.get('widget') == 'file' and node.get('id'):
+            fields[node['id']] = node.get('description') or node.get('label') or node['id']
+        stack.extend(node.get('children') or [])
+    return fields
+
+
+def load_plan(structure_file=STRUCTURE_FILE, form_file=FORM_FILE, workbook=EXCEL_FILE, cache=None):
+    with open(structure_file, 'r', encoding='utf-8') as f:
+        structure = json.load(f)
+    return build_plan(structure, load_slovnik_order(workbook, cache)), load_file_fields(form_file)
+
+
+# --- Writing ---
+
+def text_of(value):
+    if isinstance(value, bool):
+        return 'A' if value else 'N'
+    return str(value)
+
+
+def write_attachment_data(out, item):
+    # Data already in base64 (inline data URL) is copied, decoded files are re-encoded in chunks
+    if 'data' in item:
+        data = item['data']
+        out.write(data[data.find(',') + 1:])
+        return
+    with open(item['path'], 'rb') as f:
+        while chunk := f.read(BASE64_CHUNK):
+            out.write(base64.b64encode(chunk).decode('ascii'))
+
+
+def write_element(out, node, values, attachments, indent):
+    """
+    Writes one plan node for one employee; elements without any data are left out.
+    """
+    if node.repeated:
+        for item in attachments:
+            out.write(f"{indent}<{node.name}>\n")
+            for child in node.children:
+                key = ATTACHMENT_FIELDS.get(child.text_id)
+                if key == 'data':
+                    out.write(f"{indent}  <{child.name}>")
+                    write_attachment_data(out, item)
+                    out.write(f"</{child.name}>\n")
+                elif key and item.get(key):
+                    out.write(f"{indent}  <{child.name}>{escape(text_of(item[key]))}</{child.name}>\n")
+            out.write(f"{indent}</{node.name}>\n")
+        return
+
+    attributes = ''.join(f" {name}={quoteattr(text_of(values[fid]))}"
+                         for name, fid in node.attributes if fid in values)
+    text = escape(text_of(values[node.text_id])) if node.text_id in values else ''
+    children = [c for c in node.children
+                if (attachments and c.has_attachments) or (not c.repeated and not c.ids.isdisjoint(values))]
+
+    if not children:
+        out.write(f"{indent}<{node.name}{attributes}>{text}</{node.name}>\n" if text else f"{indent}<{node.name}{attributes}/>\n")
+        return
+    out.write(f"{indent}<{node.name}{attributes}>{text}\n")
+    for child in children:
+        write_element(out, child, values, attachments, indent + '  ')
+    out.write(f"{indent}</{node.name}>\n")
+
+
+def is_empty(value):
+    return value is None or value == '' or (isinstance(value, list) and len(value) == 0)
+
+
+def split_submission(items, plan, file_fields):
+    """
+    Splits (field_id, value) pairs into plan values and attachment items.
+    Returns (values, attachments, number of unmapped fields).
+    """
+    values, attachments, unmapped = {}, [], 0
+    for field_id, value in items:
+        if field_id in file_fields:
+            files = value if isinstance(value, list) else [value]
+            for f in files:
+                if isinstance(f, dict) and f.get('_is_file'):
+                    attachments.append({**f, 'desc': file_fields[field_id]})
+        elif is_empty(value):
+            continue
+        elif field_id in plan.ids:
+            values[field_id] = value
+        else:
+            unmapped += 1
+    return values, attachments, unmapped
+
+
+def iter_employees(path, tmp_dir):
+    """
+    Yields the (field_id, value) pairs of every submission in a file: one per
+    line for .jsonl, otherwise one saveForm JSON streamed with decoded attachments.
+    """
+    if path.endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line).items()
+    else:
+        yield iter_submission(path, attachments_dir=tmp_dir)
+
+
+# --- Shards ---
+
+_worker_plan = None
+_worker_file_fields = None
+
+
+def init_worker(plan, file_fields):
+    global _worker_plan, _worker_file_fields
+    _worker_plan = plan
+    _worker_file_fields = file_fields
+
+
+def export_shard(job):
+    """
+    Writes the <employee> elements of one shard into its part file.
+    Returns the shard statistics.
+    """
+    paths, part_path = job
+    stats = {'employees': 0, 'attachments': 0, 'unmapped': 0, 'errors': []}
+    with open(part_path, 'w', encoding='utf-8') as out, tempfile.TemporaryDirectory() as tmp_dir:
+        for path in paths:
+            try:
+                for items in iter_employees(path, tmp_dir):
+                    values, attachments, unmapped = split_submission(items, _worker_plan, _worker_file_fields)
+                    write_element(out, _worker_plan, values, attachments, '  ')
+                    stats['employees'] += 1
+                    stats['attachments'] += len(attachments)
+                    stats['unmapped'] += unmapped
+                    for item in attachments:
+                        if item.get('path'):
+                            os.remove(item['path'])
+            except (OSError, ValueError) as e:
+                stats['errors'].append({'file': path, 'message': str(e)})
+    return stats
+
+
+def find_inputs(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, '**', '*.json'), recursive=True)))
+            files.extend(sorted(glob.glob(os.path.join(path, '**', '*.jsonl'), recursive=True)))
+        else:
+            files.append(path)
+    return files
+
+
+def make_shards(files, count):
+    # Contiguous shards keep the input order in the output
+    size = -(-len(files) // count) if files else 0
+    return [files[i:i + size] for i in range(0, len(files), size)] if size else []
+
+
+def export(files, output, plan, file_fields, jobs=None, version=VERSION):
+    jobs = jobs or os.cpu_count() or 1
+    shards = make_shards(files, jobs)
+    out_dir = os.path.dirname(os.path.abspath(output))
+    parts = [tempfile.mkstemp(dir=out_dir, suffix=f'.part{i}')[1] for i in range(len(shards))]
+    try:
+        work = list(zip(shards, parts))
+        if jobs == 1 or len(work) < 2:
+            init_worker(plan, file_fields)
+            results = [export_shard(job) for job in work]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                                     initargs=(plan, file_fields)) as pool:
+                results = list(pool.map(export_shard, work))
+
+        # Header, shard parts in order, footer; written next to the target and moved in place
+        tmp_output = f"{output}.tmp"
+        with open(tmp_output, 'w', encoding='utf-8') as out:
+            out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            out.write(f'<REGZEC xmlns={quoteattr(NAMESPACE)} version={quoteattr(version)}>\n')
+            for part in parts:
+                with open(part, 'r', encoding='utf-8') as f:
+                    shutil.copyfileobj(f, out)
+            out.write('</REGZEC>\n')
+        os.replace(tmp_output, output)
+    finally:
+        for part in parts:
+            if os.path.exists(part):
+                os.remove(part)
+
+    stats = {'files': len(files), 'employees': 0, 'attachments': 0, 'unmapped': 0, 'errors': []}
+    for r in results:
+        for key in ('employees', 'attachments', 'unmapped'):
+            stats[key] += r[key]
+        stats['errors'].extend(r['errors'])
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write submitted questionnaires as one REGZEC XML data message.")
+    parser.add_argument("paths", nargs='+', help="Submission JSON/JSONL files or directories")
+    parser.add_argument("-o", "--output", required=True, help="Output XML file")
+    parser.add_argument("--structure", default=STRUCTURE_FILE, help=f"Slovník structure (default: {STRUCTURE_FILE})")
+    parser.add_argument("--form", default=FORM_FILE, help=f"Form structure, for the file fields (default: {FORM_FILE})")
+    parser.add_argument("--slovnik", default=EXCEL_FILE,
+                        help=f"Workbook with the Slovník sheet, for the element order (default: {EXCEL_FILE})")
+    parser.add_argument("--version", default=VERSION, help=f"Data message version attribute (default: {VERSION})")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes / shards (default: CPU count)")
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        plan, file_fields = load_plan(args.structure, args.form, args.slovnik, cache_from_args(args))
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot load the plan: {e}", file=sys.stderr)
+        sys.exit(1)
+    files = find_inputs(args.paths)
+
+    start = time.perf_counter()
+    stats = export(files, args.output, plan, file_fields, jobs=args.jobs, version=args.version)
+    elapsed = time.perf_counter() - start
+
+    rate = stats['employees'] / elapsed if elapsed > 0 else 0.0
+    print(f"Wrote {stats['employees']} employees ({stats['attachments']} attachments) from {stats['files']} files "
+          f"to {args.output} in {elapsed:.2f} s, {rate:.1f} employees/s", file=sys.stderr)
+    if stats['unmapped']:
+        print(f"Note: {stats['unmapped']} filled form-only fields have no place in the data message", file=sys.stderr)
+    for error in stats['errors']:
+        print(f"Error: {error['file']}: {error['message']}", file=sys.stderr)
+    if stats['errors']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
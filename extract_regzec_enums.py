@@ -6,407 +6,210 @@
 # ///
 
 import pandas as pd
+import argparse
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+
+from enum_index import INDEX_FILE, build_index, save_index
+from profiling import Profiler, add_profile_arguments, profiler_from_args
+from workbook_cache import CACHE_DIR, WorkbookCache, add_cache_arguments
 
 EXCEL_FILE = 'regzec.xlsx'
-EXCEL_FILE_2 = 'jmhz datová věta.xlsx'
+EXCEL_FILE_2 = 'jmhz datová věta.xlsx'
 OUTPUT_FILE = 'docs/regzec_enums.json'
 
-def extract_enums():
-    if not os.path.exists(EXCEL_FILE):
-        print(f"Error: {EXCEL_FILE} not found.")
-        return
-
-    enums = {}
-    
-    # 1. State (CIS C_STAT)
-    try:
-        print("Extracting 'state' from CIS C_STAT...")
-        # Read without header, assuming data starts immediately or after 1 row? 
-        # Requirement: "value je v prvním sloupci (ignoruj řádek záhlaví) a label je ve druhém sloupci"
-        # We'll read with header=0 to skip first row, or header=None and skip first row manually.
-        # Usually 'header=0' uses first row as header.
-        df = pd.read_excel(EXCEL_FILE, sheet_name='CIS C_STAT', header=None)
-        
-        # Skip first row (header)
-        df = df.iloc[1:]
-        
-        # Select column 0 (Value) and column 2 (Label)
-        df = df.iloc[:, [0, 2]]
-        df.columns = ['value', 'label']
-        
-        # Clean data
-        df['value'] = df['value'].astype(str).str.strip()
-        df['label'] = df['label'].astype(str).str.strip()
-        
-        # Filter valid
-        df = df[df['value'] != 'nan']
-        
-        enums['state'] = df.to_dict('records')
-        print(f"Extracted {len(enums['state'])} states.")
-        
-    except Exception as e:
-        print(f"Error extracting CIS C_STAT: {e}")
-
-    # 2. Sex (C_POHL)
-    try:
-        print("Extracting 'sex' from C_POHL...")
-        df = pd.read_excel(EXCEL_FILE, sheet_name='C_POHL', header=None)
-        
-        # Skip first row (header)
-        df = df.iloc[1:]
-        
-        # Select first 2 columns
-        df = df.iloc[:, :2]
-        df.columns = ['value', 'label']
-        
-        # Clean data
-        df['value'] = df['value'].astype(str).str.strip()
-        df['label'] = df['label'].astype(str).str.strip()
-        
-        # Filter valid
-        df = df[df['value'] != 'nan']
-        
-        enums['sex'] = df.to_dict('records')
-        print(f"Extracted {len(enums['sex'])} sex entries.")
-        
-    except Exception as e:
-        print(f"Error extracting C_POHL: {e}")
-
-    # 3. Sektor (CIS Sektor)
-    try:
-        print("Extracting 'sector' from CIS Sektor...")
-        df = pd.read_excel(EXCEL_FILE, sheet_name='CIS Sektor', header=None)
-        
-        # Skip first row (header)
-        df = df.iloc[1:]
-        
-        # Select first 2 columns
-        df = df.iloc[:, :2]
-        df.columns = ['value', 'label']
-        
-        # Clean data
-        df['value'] = df['value'].astype(str).str.strip()
-        df['label'] = df['label'].astype(str).str.strip()
-        
-        # Filter valid
-        df = df[df['value'] != 'nan']
-        
-        enums['sector'] = df.to_dict('records')
-        print(f"Extracted {len(enums['sector'])} sector entries.")
-        
-    except Exception as e:
-        print(f"Error extracting CIS Sektor: {e}")
-
-    # 4. Tax Identification (CIS Typ daňové identifikace)
-    try:
-        print("Extracting 'tax_identification' from CIS Typ daňové identifikace...")
-        df = pd.read_excel(EXCEL_FILE, sheet_name='CIS Typ daňové identifikace', header=None)
-        
-        # Skip first row (header)
-        df = df.iloc[1:]
-        
-        # Select first 2 columns
-        df = df.iloc[:, :2]
-        df.columns = ['value', 'label']
-        
-        # Clean data
-        df['value'] = df['value'].astype(str).str.strip()
-        df['label'] = df['label'].astype(str).str.strip()
-        
-        # Filter valid
-        df = df[df['value'] != 'nan']
-        
-        enums['tax_identification'] = df.to_dict('records')
-        print(f"Extracted {len(enums['tax_identification'])} tax_identification entries.")
-        
-    except Exception as e:
-        print(f"Error extracting CIS Typ daňové identifikace: {e}")
-
-    # 5. Document Type (CIS Typ dokladu)
-    try:
-        print("Extracting 'typ_dokladu' from CIS Typ dokladu...")
-        df = pd.read_excel(EXCEL_FILE, sheet_name='CIS Typ dokladu', header=None)
-        
-        # Skip first row (header)
-        df = df.iloc[1:]
-        
-        # Select first 2 columns
-        df = df.iloc[:, :2]
-        df.columns = ['value', 'label']
-        
-        # Clean data
-        df['value'] = df['value'].astype(str).str.strip()
-        df['label'] = df['label'].astype(str).str.strip()
-        
-        # Filter valid
-        df = df[df['value'] != 'nan']
-        
-        enums['typ_dokladu'] = df.to_dict('records')
-        print(f"Extracted {len(enums['typ_dokladu'])} typ_dokladu entries.")
-        
-    except Exception as e:
-        print(f"Error extracting CIS Typ dokladu: {e}")
-
-    # 6. Health Insurance (C_ZPOJ)
-    try:
-        print("Extracting 'zdravotni_pojistovny' from C_ZPOJ...")
-        df = pd.read_excel(EXCEL_FILE, sheet_name='C_ZPOJ', header=None)
-        
-        # Skip first row (header)
-        df = df.iloc[1:]
-        
-        # Select first 2 columns
-        df = df.iloc[:, :2]
-        df.columns = ['value', 'label']
-        
-        # Clean data
-        df['value'] = df['value'].astype(str).str.strip()
-        df['label'] = df['label'].astype(str).str.strip()
-        
-        # Format label: "Code - Name"
-        df['label'] = df['value'] + " - " + df['label']
-
-        # Filter valid
-        df = df[df['value'] != 'nan']
-        
-        enums['zdravotni_pojistovny'] = df.to_dict('records')
-        print(f"Extracted {len(enums['zdravotni_pojistovny'])} zdravotni_pojistovny entries.")
-        
-    except Exception as e:
-        print(f"Error extracting C_ZPOJ: {e}")
-
-    # 7. Pension Type (C_DUCH)
-    try:
-        print("Extracting 'druh_duchodu' from C_DUCH...")
-        df = pd.read_excel(EXCEL_FILE, sheet_name='C_DUCH', header=None)
-        
-        # Skip first row (header)
-        df = df.iloc[1:]
-        
-        # Select first 2 columns
-        df = df.iloc[:, :2]
-        df.columns = ['value', 'label']
-        
-        # Clean data
-        df['value'] = df['value'].astype(str).str.strip()
-        df['label'] = df['label'].astype(str).str.strip()
-        
-        # Filter valid
-        df = df[df['value'] != 'nan']
-        
-        enums['druh_duchodu'] = df.to_dict('records')
-        print(f"Extracted {len(enums['druh_duchodu'])} druh_duchodu entries.")
-        
-    except Exception as e:
-        print(f"Error extracting C_DUCH: {e}")
-
-    # 8. Education (CIS Kategorie dosaženého vzdělá)
-    try:
-        print("Extracting 'vzdelani' from CIS Kategorie dosaženého vzdělá...")
-        df = pd.read_excel(EXCEL_FILE, sheet_name='CIS Kategorie dosaženého vzdělá', header=None)
-        
-        # Skip first row (header)
-        df = df.iloc[1:]
-        
-        # Select first 2 columns
-        df = df.iloc[:, :2]
-        df.columns = ['value', 'label']
-        
-        # Clean data
-        df['value'] = df['value'].astype(str).str.strip()
-        df['label'] = df['label'].astype(str).str.strip()
-        
-        # Filter valid
-        df = df[df['value'] != 'nan']
-        
-        enums['vzdelani'] = df.to_dict('records')
-        print(f"Extracted {len(enums['vzdelani'])} vzdelani entries.")
-        
-    except Exception as e:
-        print(f"Error extracting CIS Kategorie dosaženého vzdělá: {e}")
-
-    # 9. Health Limitations (CIS Zdravotní omezení)
-    try:
-        print("Extracting 'zdravotni_omezeni' from CIS Zdravotní omezení...")
-        df = pd.read_excel(EXCEL_FILE, sheet_name='CIS Zdravotní omezení', header=None)
-        
-        # Skip first row (header)
-        df = df.iloc[1:]
-        
-        # Select first 2 columns
-        df = df.iloc[:, :2]
-        df.columns = ['value', 'label']
-        
-        # Clean data
-        df['value'] = df['value'].astype(str).str.strip()
-        df['label'] = df['label'].astype(str).str.strip()
-        
-        # Filter valid
-        df = df[df['value'] != 'nan']
-        
-        enums['zdravotni_omezeni'] = df.to_dict('records')
-        print(f"Extracted {len(enums['zdravotni_omezeni'])} zdravotni_omezeni entries.")
-        
-    except Exception as e:
-        print(f"Error extracting CIS Zdravotní omezení: {e}")
-
-    # 10. Work Permission Type (CIS Druh pracovního oprávnění)
-    try:
-        print("Extracting 'druh_prac_opravneni' from CIS Druh pracovního oprávnění...")
-        df = pd.read_excel(EXCEL_FILE, sheet_name='CIS Druh pracovního oprávnění', header=None)
-        
-        # Skip first row (header)
-        df = df.iloc[1:]
-        
-        # Select first 2 columns
-        df = df.iloc[:, :2]
-        df.columns = ['value', 'label']
-        
-        # Clean data
-        df['value'] = df['value'].astype(str).str.strip()
-        df['label'] = df['label'].astype(str).str.strip()
-        
-        # Filter valid
-        df = df[df['value'] != 'nan']
-        
-        enums['druh_prac_opravneni'] = df.to_dict('records')
-        print(f"Extracted {len(enums['druh_prac_opravneni'])} druh_prac_opravneni entries.")
-        
-    except Exception as e:
-        print(f"Error extracting CIS Druh pracovního oprávnění: {e}")
-
-    # 11. Access Reason (CIS Důvod pro volný přístup na)
-    try:
-        print("Extracting 'duvod_volneho_pristupu' from CIS Důvod pro volný přístup na...")
-        df = pd.read_excel(EXCEL_FILE, sheet_name='CIS Důvod pro volný přístup na ', header=None)
-        
-        # Skip first row (header)
-        df = df.iloc[1:]
-        
-        # Select first 2 columns
-        df = df.iloc[:, :2]
-        df.columns = ['value', 'label']
-        
-        # Clean data
-        df['value'] = df['value'].astype(str).str.strip()
-        df['label'] = df['label'].astype(str).str.strip()
-        
-        # Filter valid
-        df = df[df['value'] != 'nan']
-        
-        enums['duvod_volneho_pristupu'] = df.to_dict('records')
-        print(f"Extracted {len(enums['duvod_volneho_pristupu'])} duvod_volneho_pristupu entries.")
-        
-    except Exception as e:
-        print(f"Error extracting CIS Důvod pro volný přístup na: {e}")
-
-    # 12. Job Offices (CIS krajských poboček ÚP ČR)
-    try:
-        print("Extracting 'pobocky_uradu_prace' from CIS krajských poboček ÚP ČR...")
-        df = pd.read_excel(EXCEL_FILE, sheet_name='CIS krajských poboček ÚP ČR', header=None)
-        
-        # Skip first row (header)
-        df = df.iloc[1:]
-        
-        # Select first 2 columns
-        df = df.iloc[:, :2]
-        df.columns = ['value', 'label']
-        
-        # Clean data
-        df['value'] = df['value'].astype(str).str.strip()
-        df['label'] = df['label'].astype(str).str.strip()
-        
-        # Filter valid
-        df = df[df['value'] != 'nan']
-        
-        enums['pobocky_uradu_prace'] = df.to_dict('records')
-        print(f"Extracted {len(enums['pobocky_uradu_prace'])} pobocky_uradu_prace entries.")
-        
-    except Exception as e:
-        print(f"Error extracting CIS krajských poboček ÚP ČR: {e}")
-
-    # 13. Child Order (CIS Pořadí dítěte) - From EXCEL_FILE_2
-    try:
-        print("Extracting 'poradi_deti' from CIS Pořadí dítěte...")
-        if os.path.exists(EXCEL_FILE_2):
-            df = pd.read_excel(EXCEL_FILE_2, sheet_name='CIS Pořadí dítěte', header=None)
-            
-            # Skip first row (header)
-            df = df.iloc[1:]
-            
-            # Select first 2 columns
-            df = df.iloc[:, :2]
-            df.columns = ['value', 'label']
-            
-            # Clean data
-            df['value'] = df['value'].astype(str).str.strip()
-            df['label'] = df['label'].astype(str).str.strip()
-            
-            # Filter valid
-            df = df[df['value'] != 'nan']
-            
-            enums['poradi_deti'] = df.to_dict('records')
-            print(f"Extracted {len(enums['poradi_deti'])} poradi_deti entries.")
-        else:
-            print(f"Warning: {EXCEL_FILE_2} not found, skipping poradi_deti.")
-            
-    except Exception as e:
-        print(f"Error extracting CIS Pořadí dítěte: {e}")
-
-    # 14. Foreign Carrier Spec (CIS Specifikace cizozemského no) - From EXCEL_FILE_2
-    try:
-        print("Extracting 'specifikace_ciz_nositele' from CIS Specifikace cizozemského no...")
-        if os.path.exists(EXCEL_FILE_2):
-            df = pd.read_excel(EXCEL_FILE_2, sheet_name='CIS Specifikace cizozemského no', header=None)
-            
-            # Skip first row (header)
-            df = df.iloc[1:]
-            
-            # Select first 2 columns
-            df = df.iloc[:, :2]
-            df.columns = ['value', 'label']
-            
-            # Clean data
-            df['value'] = df['value'].astype(str).str.strip()
-            df['label'] = df['label'].astype(str).str.strip()
-            
-            # Filter valid
-            df = df[df['value'] != 'nan']
-            
-            enums['specifikace_ciz_nositele'] = df.to_dict('records')
-            print(f"Extracted {len(enums['specifikace_ciz_nositele'])} specifikace_ciz_nositele entries.")
-        else:
-            print(f"Warning: {EXCEL_FILE_2} not found, skipping specifikace_ciz_nositele.")
-
-    except Exception as e:
-        print(f"Error extracting CIS Specifikace cizozemského no: {e}")
 
-    # 4. Bool (Static)
-    enums['bool'] = [
+def code_name_label(df):
+    # Format label: "Code - Name"
+    return df['value'] + " - " + df['label']
+
+
+# Registry of codelists extracted from the workbooks, in output order.
+# Requirement: "value je v prvním sloupci (ignoruj řádek záhlaví) a label je ve druhém sloupci"
+# (CIS C_STAT keeps the label in the third column).
+ENUM_SPECS = [
+    {'key': 'state', 'workbook': EXCEL_FILE, 'sheet': 'CIS C_STAT', 'value_col': 0, 'label_col': 2},
+    {'key': 'sex', 'workbook': EXCEL_FILE, 'sheet': 'C_POHL', 'value_col': 0, 'label_col': 1},
+    {'key': 'sector', 'workbook': EXCEL_FILE, 'sheet': 'CIS Sektor', 'value_col': 0, 'label_col': 1},
+    {'key': 'tax_identification', 'workbook': EXCEL_FILE, 'sheet': 'CIS Typ daňové identifikace', 'value_col': 0, 'label_col': 1},
+    {'key': 'typ_dokladu', 'workbook': EXCEL_FILE, 'sheet': 'CIS Typ dokladu', 'value_col': 0, 'label_col': 1},
+    {'key': 'zdravotni_pojistovny', 'workbook': EXCEL_FILE, 'sheet': 'C_ZPOJ', 'value_col': 0, 'label_col': 1, 'label_format': code_name_label},
+    {'key': 'druh_duchodu', 'workbook': EXCEL_FILE, 'sheet': 'C_DUCH', 'value_col': 0, 'label_col': 1},
+    {'key': 'vzdelani', 'workbook': EXCEL_FILE, 'sheet': 'CIS Kategorie dosaženého vzdělá', 'value_col': 0, 'label_col': 1},
+    {'key': 'zdravotni_omezeni', 'workbook': EXCEL_FILE, 'sheet': 'CIS Zdravotní omezení', 'value_col': 0, 'label_col': 1},
+    {'key': 'druh_prac_opravneni', 'workbook': EXCEL_FILE, 'sheet': 'CIS Druh pracovního oprávnění', 'value_col': 0, 'label_col': 1},
+    {'key': 'duvod_volneho_pristupu', 'workbook': EXCEL_FILE, 'sheet': 'CIS Důvod pro volný přístup na ', 'value_col': 0, 'label_col': 1},
+    {'key': 'pobocky_uradu_prace', 'workbook': EXCEL_FILE, 'sheet': 'CIS krajských poboček ÚP ČR', 'value_col': 0, 'label_col': 1},
+    {'key': 'poradi_deti', 'workbook': EXCEL_FILE_2, 'sheet': 'CIS Pořadí dítěte', 'value_col': 0, 'label_col': 1},
+    {'key': 'specifikace_ciz_nositele', 'workbook': EXCEL_FILE_2, 'sheet': 'CIS Specifikace cizozemského no', 'value_col': 0, 'label_col': 1},
+]
+
+STATIC_ENUMS = {
+    'bool': [
         {'value': 'A', 'label': 'ANO'},
         {'value': 'N', 'label': 'NE'}
-    ]
-    print(f"Added static 'bool' enum.")
-
-    # 5. Rodinny Stav (Static)
+    ],
     # 0=Nezjištěn, 1=Svobodný/á, 2=Ženatý/Vdaná, 3=Rozvedený/á, 4=Vdovec/Vdova, 5=Registrovaný partner
-    enums['rodinny_stav'] = [
+    'rodinny_stav': [
         {'value': '0', 'label': 'Nezjištěn'},
         {'value': '1', 'label': 'Svobodný/á'},
         {'value': '2', 'label': 'Ženatý/Vdaná'},
         {'value': '3', 'label': 'Rozvedený/á'},
         {'value': '4', 'label': 'Vdovec/Vdova'},
         {'value': '5', 'label': 'Registrovaný partner'}
-    ]
-    print(f"Added static 'rodinny_stav' enum.")
+    ],
+}
+
+
+def sheet_to_records(df, spec):
+    """
+    Converts a raw sheet (read with header=None) into a list of {value, label} records.
+    """
+    # Skip first row (header)
+    df = df.iloc[1:]
+
+    df = df.iloc[:, [spec['value_col'], spec['label_col']]]
+    df.columns = ['value', 'label']
+
+    # Clean data
+    df['value'] = df['value'].astype(str).str.strip()
+    df['label'] = df['label'].astype(str).str.strip()
+
+    if spec.get('label_format'):
+        df['label'] = spec['label_format'](df)
+
+    # Filter valid
+    df = df[df['value'] != 'nan']
+
+    return df.to_dict('records')
+
+
+def extract_workbook(workbook, specs, profiler=None, cache_dir=CACHE_DIR):
+    """
+    Parses the workbook once and extracts all given specs from it.
+    Sheets parsed before are read from the workbook cache (none if cache_dir is None).
+    Returns a list of (key, records, error) tuples in the order of specs.
+    """
+    profiler = profiler or Profiler(enabled=False)
+    results = []
+    with profiler.stage(f"workbook:{workbook}"):
+        with profiler.stage("open"):
+            xls = WorkbookCache(cache_dir).open(workbook) if cache_dir else pd.ExcelFile(workbook)
+        with xls:
+            for spec in specs:
+                with profiler.stage(f"sheet:{spec['sheet']}") as info:
+                    try:
+                        with profiler.stage("parse"):
+                            df = xls.parse(spec['sheet'], header=None)
+                        with profiler.stage("records"):
+                            records = sheet_to_records(df, spec)
+                        info['rows'] = len(records)
+                        results.append((spec['key'], records, None))
+                    except Exception as e:
+                        results.append((spec['key'], None, f"Error extracting {spec['sheet']}: {e}"))
+    return results
+
+
+def extract_workbook_profiled(workbook, specs, memory=False, cache_dir=CACHE_DIR):
+    # Worker side of a profiled run: the stages travel back with the results
+    with Profiler(memory=memory) as profiler:
+        results = extract_workbook(workbook, specs, profiler, cache_dir)
+    return results, profiler.report()['stages']
+
+
+def split_into_chunks(items, count):
+    return [items[i::count] for i in range(count) if items[i::count]]
+
+
+def extract_enums(output_file=OUTPUT_FILE, jobs=1, index_file=INDEX_FILE, profiler=None, specs=None,
+                  cache_dir=CACHE_DIR):
+    profiler = profiler or Profiler(enabled=False)
+    specs = ENUM_SPECS if specs is None else specs
+    if not os.path.exists(EXCEL_FILE):
+        print(f"Error: {EXCEL_FILE} not found.")
+        return
+
+    # Group specs per workbook, so that every workbook is opened only once (per worker)
+    groups = {}
+    for spec in specs:
+        if not os.path.exists(spec['workbook']):
+            print(f"Warning: {spec['workbook']} not found, skipping {spec['key']}.")
+            continue
+        groups.setdefault(spec['workbook'], []).append(spec)
+
+    results = {}
+    with profiler.stage("extract"):
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = []
+                for workbook, group in groups.items():
+                    for chunk in split_into_chunks(group, jobs):
+                        if profiler.enabled:
+                            futures.append(pool.submit(extract_workbook_profiled, workbook, chunk, profiler.memory,
+                                                       cache_dir))
+                        else:
+                            futures.append(pool.submit(extract_workbook, workbook, chunk, None, cache_dir))
+                for future in futures:
+                    extracted = future.result()
+                    if profiler.enabled:
+                        extracted, stages = extracted
+                        profiler.merge(stages)
+                    for key, records, error in extracted:
+                        results[key] = (records, error)
+        else:
+            for workbook, group in groups.items():
+                for key, records, error in extract_workbook(workbook, group, profiler, cache_dir):
+                    results[key] = (records, error)
+
+    enums = {}
+    for spec in specs:
+        if spec['key'] not in results:
+            continue
+        records, error = results[spec['key']]
+        if error:
+            print(error)
+            continue
+        enums[spec['key']] = records
+        print(f"Extracted {len(records)} {spec['key']} entries from {spec['sheet']}.")
+
+    for key, records in STATIC_ENUMS.items():
+        enums[key] = [dict(r) for r in records]
+        print(f"Added static '{key}' enum.")
 
     # Save to JSON
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(enums, f, indent=4, ensure_ascii=False)
-        
-    print(f"Successfully saved to {OUTPUT_FILE}")
+    with profiler.stage("serialize"):
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(enums, f, indent=4, ensure_ascii=False)
+
+    print(f"Successfully saved to {output_file}")
+
+    # Prebuilt search index for the comboboxes and batch lookups (enum_index.py)
+    if index_file:
+        with profiler.stage("index"):
+            save_index(build_index(enums), index_file)
+        print(f"Saved search index to {index_file}")
+    return enums
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract codelists (enums) from the JMHZ workbooks.")
+    parser.add_argument("--output", default=OUTPUT_FILE, help=f"Output JSON file (default: {OUTPUT_FILE})")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of worker processes (default: 1, no pool)")
+    parser.add_argument("--index", default=INDEX_FILE, help=f"Search index JSON (default: {INDEX_FILE})")
+    parser.add_argument("--no-index", action="store_true", help="Do not write the search index")
+    add_cache_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with profiler_from_args(args) as profiler:
+        extract_enums(output_file=args.output, jobs=args.jobs, index_file=None if args.no_index else args.index,
+                      profiler=profiler, cache_dir=None if args.no_cache else CACHE_DIR)
+    if args.profile:
+        profiler.save(args.profile)
+        profiler.print_summary()
+        print(f"Saved profile to {args.profile}")
+
 
 if __name__ == "__main__":
-    extract_enums()
+    main()
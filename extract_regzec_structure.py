@@ -6,198 +6,305 @@
 # ///
 
 import pandas as pd
+import argparse
 import json
+import openpyxl
 import re
 
+from enum_index import CZECH_FOLD
+from profiling import add_profile_arguments, profiler_from_args
+from workbook_cache import add_cache_arguments, cache_from_args
+
+EXCEL_FILE = 'regzec.xlsx'
+SHEET_NAME = 'Slovník'
+OUTPUT_FILE = 'regzec_structure.json'
+
+# Headers at row 16 (index 15), data follows
+HEADER_ROW = 15
+
+# Rows taken from the Slovník: A1-OST values and attribute name prefix
+A1_VALUES = ['P', 'N', 'PP']
+NAME_PREFIX = 'employee.'
+
+# Combined row "10057 10058" is split into (path, description, id) items
+SPLIT_ITEMS = (
+    ('employee.client.bno', "Rodné číslo", "10057"),
+    ('employee.client.ecp', "EČP (Evidenční číslo pojištěnce)", "10058"),
+)
+
+# Strings pandas.read_excel reads as NaN by default (its na_values)
+NA_STRINGS = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+})
+
 def normalize_key(key):
     if not isinstance(key, str): return f"col_{key}"
     key = str(key).strip().lower()
-    table = str.maketrans("áčďéěíňóřšťúůýž", "acdeeinorstuuyz")
-    key = key.translate(table)
+    key = key.translate(CZECH_FOLD)
     key = key.replace('.', '_').replace(' ', '_').replace('-', '_').replace('/', '_')
     key = re.sub(r'[^a-z0-9_]', '', key)
     key = re.sub(r'_+', '_', key).strip('_')
     return key
 
-try:
+def build_header_map(headers_keys):
+    """
+    Maps normalized header name -> column index (first occurrence wins, like list.index).
+    """
+    header_map = {}
+    for idx, key in enumerate(headers_keys):
+        header_map.setdefault(key, idx)
+    return header_map
+
+def resolve_columns(headers_raw):
+    """
+    Returns the header map of the Slovník header row, checking the required columns.
+    """
+    header_map = build_header_map(normalize_key(h) for h in headers_raw)
+    for required in ('nazev_atributu', 'a1_ost', 'id_polozky_ds'):
+        if required not in header_map:
+            raise ValueError(f"column '{required}' not found in header row")
+    return header_map
+
+def column(data, idx):
+    if 0 <= idx < data.shape[1]:
+        return data.iloc[:, idx]
+    return pd.Series(pd.NA, index=data.index, dtype=object)
+
+def text_column(data, idx):
+    # Stripped text of the column, empty string for missing cells
+    col = column(data, idx)
+    return col.astype(str).str.strip().where(col.notna(), "")
+
+def select_rows(data, header_map):
+    """
+    Vectorized A1-OST (P/N/PP) and 'employee.' filter.
+    Returns the selected rows with normalized 'mandatory' and 'path' Series.
+    """
+    a1 = column(data, header_map['a1_ost'])
+    a1_str = a1.astype(str).str.strip().str.upper()
+    mask = a1.notna() & a1_str.isin(A1_VALUES)
+
+    raw_name = column(data, header_map['nazev_atributu'])
+    name = raw_name.astype(str).str.strip().str.lower()
+    mask &= raw_name.notna() & name.str.startswith(NAME_PREFIX)
+
+    return data[mask], a1_str[mask], name[mask]
 
-    # Read Excel
-    df = pd.read_excel('regzec.xlsx', sheet_name='Slovník', header=None)
-    
-    # Headers at row 16 (index 15)
-    headers_raw = df.iloc[15].tolist()
-    headers_keys = [normalize_key(h) for h in headers_raw]
-    
+def collect_items(df):
+    """
+    Filters the Slovník rows and returns the flat list of items (including split items).
+    """
+    header_map = resolve_columns(df.iloc[HEADER_ROW].tolist())
+    rows, mandatory, path = select_rows(df.iloc[HEADER_ROW + 1:], header_map)
+
+    # Empty IDs keep their historical 'nan' text
+    raw_id = column(rows, header_map['id_polozky_ds'])
+    row_id = raw_id.astype(str).where(raw_id.notna(), 'nan').str.strip()
+
+    # Optional extra columns
+    # D=Dat. typ, E=Delka, F=Spec. pov., G=Log. kontr., H=Vysv.
+    # Columns Y, Z, AA (P, N, Z) are addressed by index 24, 25, 26
+    def get_col(identifier):
+        idx = identifier if isinstance(identifier, int) else header_map.get(identifier, -1)
+        return text_column(rows, idx)
+
+    items = pd.DataFrame({
+        'path': path,
+        '_excel_description': get_col('popis'),
+        'dat_typ': get_col('dat_typ'),
+        'delka': get_col('delka'),
+        'specificke_povinnosti': get_col('specificke_povinnosti_pro_jednotlive_akce'),
+        'logicke_kontroly': get_col('logicke_kontroly'),
+        'vysvetlivky': get_col('vysvetlivky_kvyplneni'),
+        'mandatory': mandatory, # Column I (A1-OST)
+        'p': get_col(24), # Column Y
+        'n': get_col(25), # Column Z
+        'z': get_col(26),  # Column AA
+        'id': row_id         # Column A (id_polozky_ds)
+    })
+
+    # Split logic: the combined BNO/ECP row becomes two items
+    combined = row_id.str.contains('10057', regex=False) & row_id.str.contains('10058', regex=False)
+    if combined.any():
+        items['_split'] = [list(SPLIT_ITEMS) if c else [None] for c in combined]
+        items = items.explode('_split')
+        for split in SPLIT_ITEMS:
+            selected = items['_split'] == split
+            items.loc[selected, ['path', '_excel_description', 'id']] = list(split)
+        items = items.drop(columns='_split')
+
+    return items.to_dict('records')
+
+def convert_cell(cell):
+    # Same conversion as pandas.read_excel (openpyxl engine) does per cell
+    value = cell.value
+    if value is None or cell.data_type == 'e':
+        return None
+    if cell.data_type == 'n':
+        return int(value) if int(value) == value else float(value)
+    if isinstance(value, str) and value in NA_STRINGS:
+        return None
+    return value
+
+def read_slovnik_streaming(path, chunk_size=5000):
+    """
+    Reads the Slovník sheet row by row (openpyxl read-only mode) and keeps only
+    the header rows and rows passing select_rows, so memory stays flat.
+    Cells are converted individually, without pandas' column type inference.
+    """
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
     try:
-        name_idx = headers_keys.index('nazev_atributu')
-        a1_idx = headers_keys.index('a1_ost')
-        id_idx = headers_keys.index('id_polozky_ds') 
-        # Optional extra columns
-        # D=Dat. typ, E=Delka, F=Spec. pov., G=Log. kontr., H=Vysv.
-        # We try to map them by name, fallback to index if needed
-        # Expected names: dat_typ, delka, specificke_povinnosti..., logicke_kontroly..., vysvetlivky...
-        
-        # Columns Y, Z, AA corresponds to indices 24, 25, 26
-        # We can try to locate them by header name if possible, otherwise use index
-        # Based on user request: P (Y), N (Z), Z (AA)
-        # Let's try to find them by normalized index if they exist, or hardcode index if header name is unsure
-        
-        # Helper to get value securely by header or index
-        def get_val(row, identifier):
-            idx = -1
-            if isinstance(identifier, int):
-                idx = identifier
-            elif identifier in headers_keys:
-                idx = headers_keys.index(identifier)
-            
-            if 0 <= idx < len(row):
-                val = row.iloc[idx]
-                return str(val).strip() if not pd.isna(val) else ""
-            return ""
-
-    except ValueError as e:
-        print(f"Error finding basic columns: {e}")
-        exit(1)
+        rows = wb[SHEET_NAME].iter_rows()
+        head = [[convert_cell(c) for c in row] for _, row in zip(range(HEADER_ROW + 1), rows)]
+        header_map = resolve_columns(head[HEADER_ROW])
+
+        kept = []
+        chunk = []
+        for row in rows:
+            chunk.append([convert_cell(c) for c in row])
+            if len(chunk) >= chunk_size:
+                kept.extend(select_rows(pd.DataFrame(chunk, dtype=object), header_map)[0].values.tolist())
+                chunk = []
+        if chunk:
+            kept.extend(select_rows(pd.DataFrame(chunk, dtype=object), header_map)[0].values.tolist())
+    finally:
+        wb.close()
+
+    return pd.DataFrame(head + kept, dtype=object)
+
+def new_node(key):
+    return {
+        "key": key,
+        "skip": False,
+        "new_only": False,
+        "description": "",
+        "default_value": "",
+        "order": 100,
+        "children": []
+    }
+
+def fill_leaf(node, item):
+    # Add extra columns data
+    node['id'] = item['id']
+    node['dat_typ'] = item['dat_typ']
+    node['delka'] = item['delka']
+    node['specificke_povinnosti'] = item['specificke_povinnosti']
+    node['logicke_kontroly'] = item['logicke_kontroly']
+    node['vysvetlivky'] = item['vysvetlivky']
 
-    data_rows = df.iloc[16:]
-    
-    # Collect paths and data
-    # We will build a flat list first including split items
-    flat_items = []
-    
-    for idx, row in data_rows.iterrows():
-        # Filter by A1-OST
-        a1_val = row.iloc[a1_idx]
-        if pd.isna(a1_val): continue
-        a1_str = str(a1_val).strip().upper()
-        if a1_str not in ['P', 'N', 'PP']: continue
-
-        raw_name = row.iloc[name_idx]
-        if pd.isna(raw_name): continue
-        name = str(raw_name).strip().lower()
-        if not name.startswith('employee.'): continue
-        
-        row_id = str(row.iloc[id_idx] if id_idx < len(row) else "").strip()
-
-        # Extract base data
-        item_data = {
-            'path': name,
-            '_excel_description': get_val(row, 'popis'),
-            'dat_typ': get_val(row, 'dat_typ'),
-            'delka': get_val(row, 'delka'),
-            'specificke_povinnosti': get_val(row, 'specificke_povinnosti_pro_jednotlive_akce'),
-            'logicke_kontroly': get_val(row, 'logicke_kontroly'),
-            'vysvetlivky': get_val(row, 'vysvetlivky_kvyplneni'),
-            'mandatory': a1_str, # Column I (A1-OST)
-            'p': get_val(row, 24), # Column Y
-            'n': get_val(row, 25), # Column Z
-            'z': get_val(row, 26),  # Column AA
-            'id': row_id         # Column A (id_polozky_ds)
-        }
-        
-        # Split logic
-        if '10057' in row_id and '10058' in row_id:
-            # Item 1: BNO
-            i1 = item_data.copy()
-            i1['path'] = 'employee.client.bno'
-            i1['_excel_description'] = "Rodné číslo" 
-            i1['id'] = "10057"
-            flat_items.append(i1)
-            
-            # Item 2: ECP
-            i2 = item_data.copy()
-            i2['path'] = 'employee.client.ecp'
-            i2['_excel_description'] = "EČP (Evidenční číslo pojištěnce)"
-            i2['id'] = "10058"
-            flat_items.append(i2)
-        else:
-            flat_items.append(item_data)
-            
-    # Build Tree
+    # New attributes (UI Config - Defaults)
+    if item['dat_typ'] == 'D':
+        node['widget'] = "date"
+    else:
+        node['widget'] = "input"
+    node['width'] = 12
+    node['manual_parent'] = ""
+    node['ciselnik'] = ""
+    node['default_value'] = ""
+
+    node['mandatory'] = item['mandatory']
+    node['p'] = item['p']
+    node['n'] = item['n']
+    node['z'] = item['z']
+
+    # Assign excel description if node description is empty
+    if not node['description']:
+        node['description'] = item['_excel_description']
+
+def build_tree(flat_items):
+    """
+    Builds the nested structure from flat items.
+    Nodes are looked up through a path -> node index, so every path segment is O(1).
+    """
     tree = []
-    
-    def get_or_create_node(node_list, key):
-        for node in node_list:
-            if node['key'] == key:
-                return node
-        new_node = {
-            "key": key,
-            "skip": False,
-            "new_only": False,
-            "description": "",
-            "default_value": "",
-            "order": 100,      
-            "children": []
-        }
-        node_list.append(new_node)
-        return new_node
+    index = {}
 
     # Sort items by path
-    flat_items.sort(key=lambda x: x['path'])
-    
-    for item in flat_items:
-        path = item['path']
-        parts = path.split('.')
-        
+    for item in sorted(flat_items, key=lambda x: x['path']):
+        parts = item['path'].split('.')
+
         current_level = tree
         current_path_prefix = ""
-        
+
         for i, part in enumerate(parts):
             if current_path_prefix:
                 current_path_prefix += "." + part
             else:
                 current_path_prefix = part
-                
-            node = get_or_create_node(current_level, part)
+
+            node = index.get(current_path_prefix)
+            if node is None:
+                node = new_node(part)
+                current_level.append(node)
+                index[current_path_prefix] = node
             node['original_path'] = current_path_prefix
-            
+
             # If this is the leaf (the item itself)
             if i == len(parts) - 1:
-                # Add extra columns data
-                node['id'] = item['id']
-                node['dat_typ'] = item['dat_typ']
-                node['delka'] = item['delka']
-                node['specificke_povinnosti'] = item['specificke_povinnosti']
-                node['logicke_kontroly'] = item['logicke_kontroly']
-                node['vysvetlivky'] = item['vysvetlivky']
-                
-                # New attributes (UI Config - Defaults)
-                if item['dat_typ'] == 'D':
-                    node['widget'] = "date"
-                else:
-                    node['widget'] = "input"
-                node['width'] = 12
-                node['manual_parent'] = ""
-                node['ciselnik'] = ""
-                node['default_value'] = ""
-                
-                node['mandatory'] = item['mandatory']
-                node['p'] = item['p']
-                node['n'] = item['n']
-                node['z'] = item['z']
-                
-                # Assign excel description if node description is empty
-                if not node['description']:
-                    node['description'] = item['_excel_description']
-            
+                fill_leaf(node, item)
+
             current_level = node['children']
-            
-    # Clean up
-    def clean_tree(nodes):
-        for node in nodes:
+
+    clean_tree(tree)
+    return tree
+
+def clean_tree(nodes):
+    stack = [nodes]
+    while stack:
+        for node in stack.pop():
             if not node['children']:
                 del node['children']
             else:
-                clean_tree(node['children'])
-                
-    clean_tree(tree)
+                stack.append(node['children'])
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract the employee structure from the Slovník sheet.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read the sheet row by row in read-only mode (flat memory for large dictionaries)")
+    add_cache_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    cache = cache_from_args(args)
+
+    try:
+        with profiler_from_args(args) as profiler:
+            # Read Excel
+            with profiler.stage(f"read:{SHEET_NAME}") as info:
+                if args.stream:
+                    df = read_slovnik_streaming(EXCEL_FILE)
+                elif cache:
+                    df = cache.read_sheet(EXCEL_FILE, SHEET_NAME, header=None)
+                else:
+                    df = pd.read_excel(EXCEL_FILE, sheet_name=SHEET_NAME, header=None)
+                info['rows'] = len(df)
+
+            try:
+                with profiler.stage("collect") as info:
+                    flat_items = collect_items(df)
+                    info['items'] = len(flat_items)
+            except ValueError as e:
+                print(f"Error finding basic columns: {e}")
+                exit(1)
 
-    # Save
-    with open('regzec_structure.json', 'w', encoding='utf-8') as f:
-        json.dump(tree, f, ensure_ascii=False, indent=2)
-        
-    print(f"Success: Generated structure with {len(flat_items)} paths.")
+            with profiler.stage("build"):
+                tree = build_tree(flat_items)
+
+            # Save
+            with profiler.stage("serialize"):
+                with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+                    json.dump(tree, f, ensure_ascii=False, indent=2)
+
+        print(f"Success: Generated structure with {len(flat_items)} paths.")
+
+        if args.profile:
+            profiler.save(args.profile)
+            profiler.print_summary()
+            print(f"Saved profile to {args.profile}")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        exit(1)
 
-except Exception as e:
-    print(f"Error: {e}")
-    exit(1)
+if __name__ == "__main__":
+    main()
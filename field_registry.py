@@ -0,0 +1,333 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import time
+
+FORM_FILE = 'docs/regzec_form.json'
+REGISTRY_FILE = 'field_registry.sqlite'
+REGISTRY_VERSION = 1
+
+# Stored per field and version, in this order
+COLUMNS = ['id', 'original_path', 'key', 'description', 'vysvetlivky', 'logicke_kontroly',
+           'specificke_povinnosti', 'dat_typ', 'delka', 'ciselnik', 'widget', 'mandatory',
+           'default_value', 'new_only', 'skip', 'leaf']
+
+# Full-text indexed columns -> bm25 weight (a match in the description counts most)
+SEARCH_COLUMNS = {
+    'id': 10.0, 'original_path': 2.0, 'description': 5.0, 'vysvetlivky': 1.0,
+    'logicke_kontroly': 1.0, 'dat_typ': 1.0, 'delka': 1.0, 'ciselnik': 2.0,
+}
+
+WORD_RE = re.compile(r'\w+')
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS versions (
+    version_id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL UNIQUE,
+    sha256 TEXT NOT NULL UNIQUE,
+    source TEXT,
+    created TEXT NOT NULL,
+    fields INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fields (
+    version_id INTEGER NOT NULL REFERENCES versions(version_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    {', '.join(f'{c} INTEGER' if c in ('new_only', 'skip', 'leaf') else f'{c} TEXT' for c in COLUMNS)}
+);
+CREATE UNIQUE INDEX IF NOT EXISTS fields_version_id ON fields (version_id, id);
+CREATE INDEX IF NOT EXISTS fields_id ON fields (id);
+CREATE VIRTUAL TABLE IF NOT EXISTS fields_fts USING fts5 (
+    {', '.join(SEARCH_COLUMNS)},
+    content='fields', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+
+class RegistryError(Exception):
+    pass
+
+
+def iter_fields(structure):
+    """
+    Yields every node with an id in document order, as {column: value}. skip and
+    new_only are the effective flags (inherited from the enclosing groups).
+    """
+    stack = [(n, False, False) for n in reversed(structure)]
+    while stack:
+        node, skip, new_only = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        skip = skip or node.get('skip') is True
+        new_only = new_only or bool(node.get('new_only'))
+        children = node.get('children') or []
+        if node.get('id'):
+            row = {c: node.get(c) or '' for c in COLUMNS}
+            row['description'] = node.get('description') or node.get('label') or ''
+            row.update(new_only=int(new_only), skip=int(skip), leaf=int(not children))
+            yield row
+        stack.extend((c, skip, new_only) for c in reversed(children))
+
+
+def match_query(text):
+    # Every word of the text as a prefix: 'cizin' finds 'cizinec', 'cizince', 'Cizinci'
+    words = WORD_RE.findall(text)
+    if not words:
+        raise RegistryError(f"Nothing to search for in {text!r}")
+    return ' '.join(f'"{w}"*' for w in words)
+
+
+class FieldRegistry:
+    """
+    SQLite registry of the form fields of every indexed schema version, with FTS5
+    search over ids, paths, descriptions, explanations and checks. A version is
+    identified by the sha256 of its regzec_form.json; indexing the same content
+    again is a no-op.
+
+    Version references: a label, 'latest' (default) or 'previous' (the one before it).
+    """
+
+    def __init__(self, path=REGISTRY_FILE, create=False):
+        if not create and not os.path.exists(path):
+            raise RegistryError(f"{path} not found, build it with: python field_registry.py --index")
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if create:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute("INSERT OR IGNORE INTO meta VALUES ('version', ?)", (str(REGISTRY_VERSION),))
+            self.conn.commit()
+        version = self.conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        if version is None or int(version[0]) != REGISTRY_VERSION:
+            raise RegistryError(f"{path} has registry format {version and version[0]}, "
+                                f"expected {REGISTRY_VERSION}: delete it and index again")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Indexing ---
+
+    def add_version(self, structure, label, sha256, source=None, created=None):
+        """
+        Indexes the fields of `structure`. Returns (label, added); an already indexed
+        content keeps its first label.
+        """
+        existing = self.conn.execute("SELECT label FROM versions WHERE sha256 = ?", (sha256,)).fetchone()
+        if existing:
+            return existing['label'], False
+
+        rows = list(iter_fields(structure))
+        seen = set()
+        for row in rows:
+            if row['id'] in seen:
+                raise RegistryError(f"Field id {row['id']!r} occurs more than once in {source or label}")
+            seen.add(row['id'])
+        created = created or datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+        try:
+            with self.conn:
+                cursor = self.conn.execute(
+                    "INSERT INTO versions (label, sha256, source, created, fields) VALUES (?, ?, ?, ?, ?)",
+                    (label, sha256, source, created, len(rows)))
+                version_id = cursor.lastrowid
+                start = self.conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM fields").fetchone()[0] + 1
+                self.conn.executemany(
+                    f"INSERT INTO fields (rowid, version_id, position, {', '.join(COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * (len(COLUMNS) + 3))})",
+                    ((start + i, version_id, i, *(row[c] for c in COLUMNS)) for i, row in enumerate(rows)))
+                self.conn.executemany(
+                    f"INSERT INTO fields_fts (rowid, {', '.join(SEARCH_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * (len(SEARCH_COLUMNS) + 1))})",
+                    ((start + i, *(row[c] for c in SEARCH_COLUMNS)) for i, row in enumerate(rows)))
+        except sqlite3.IntegrityError as e:
+            # Rolled back; the content is new (checked above), so the label is taken
+            if self.conn.execute("SELECT 1 FROM versions WHERE label = ?", (label,)).fetchone():
+                raise RegistryError(f"Label {label!r} is already used by another version") from None
+            raise RegistryError(f"Cannot index {label!r}: {e}") from None
+        return label, True
+
+    def index_file(self, path=FORM_FILE, label=None):
+        with open(path, 'rb') as f:
+            content = f.read()
+        sha256 = hashlib.sha256(content).hexdigest()
+        label = label or f"{datetime.date.today().isoformat()}-{sha256[:8]}"
+        return self.add_version(json.loads(content), label, sha256, source=path)
+
+    def index_git_history(self, path=FORM_FILE):
+        """
+        Indexes every committed revision of `path`, oldest first, labelled git-<commit>.
+        Returns [(label, added)].
+        """
+        log = subprocess.run(['git', 'log', '--reverse', '--format=%H %cI', '--', path],
+                             capture_output=True, text=True, check=True).stdout
+        results = []
+        for line in log.splitlines():
+            commit, date = line.split(' ', 1)
+            # Versions are ordered by the created timestamps, all in UTC
+            created = datetime.datetime.fromisoformat(date).astimezone(datetime.timezone.utc).isoformat()
+            content = subprocess.run(['git', 'show', f"{commit}:{path}"], capture_output=True, check=True).stdout
+            sha256 = hashlib.sha256(content).hexdigest()
+            results.append(self.add_version(json.loads(content), f"git-{commit[:10]}", sha256,
+                                            source=f"{commit}:{path}", created=created))
+        return results
+
+    # --- Lookups ---
+
+    def versions(self):
+        # Oldest first
+        rows = self.conn.execute("SELECT label, sha256, source, created, fields FROM versions "
+                                 "ORDER BY created, version_id").fetchall()
+        return [dict(r) for r in rows]
+
+    def version_id(self, version='latest'):
+        if version in (None, 'latest', 'previous'):
+            offset = 1 if version == 'previous' else 0
+            row = self.conn.execute("SELECT version_id FROM versions ORDER BY created DESC, version_id DESC "
+                                    "LIMIT 1 OFFSET ?", (offset,)).fetchone()
+        else:
+            row = self.conn.execute("SELECT version_id FROM versions WHERE label = ?", (version,)).fetchone()
+        if row is None:
+            raise RegistryError(f"No version {version!r} in {self.path}")
+        return row[0]
+
+    def field(self, field_id, version='latest'):
+        """
+        Returns the field as {column: value} (plus 'version'), or None if the version has no such field.
+        """
+        row = self.conn.execute(
+            f"SELECT v.label AS version, {', '.join(f'f.{c}' for c in COLUMNS)} FROM fields f "
+            "JOIN versions v USING (version_id) WHERE f.version_id = ? AND f.id = ?",
+            (self.version_id(version), field_id)).fetchone()
+        return dict(row) if row else None
+
+    def history(self, field_id):
+        """
+        Returns [(version label, field or None)] over all versions, oldest first.
+        """
+        rows = self.conn.execute(
+            f"SELECT v.label AS version, {', '.join(f'f.{c}' for c in COLUMNS)} FROM versions v "
+            "LEFT JOIN fields f ON f.version_id = v.version_id AND f.id = ? "
+            "ORDER BY v.created, v.version_id", (field_id,)).fetchall()
+        return [(r['version'], dict(r) if r['id'] is not None else None) for r in rows]
+
+    def fields(self, version='latest'):
+        rows = self.conn.execute(f"SELECT {', '.join(COLUMNS)} FROM fields WHERE version_id = ? ORDER BY position",
+                                 (self.version_id(version),)).fetchall()
+        return [dict(r) for r in rows]
+
+    def search(self, text, version='latest', limit=50, raw=False):
+        """
+        Full-text search (diacritics and case insensitive, words as prefixes; raw=True
+        passes an FTS5 query as is). version=None searches all versions.
+        Returns fields (plus 'version' and a 'snippet' of the best matching column), best first.
+        """
+        query = text if raw else match_query(text)
+        where, params = "fields_fts MATCH ?", [query]
+        if version is not None:
+            where += " AND f.version_id = ?"
+            params.append(self.version_id(version))
+        weights = ', '.join(str(w) for w in SEARCH_COLUMNS.values())
+        try:
+            rows = self.conn.execute(
+                f"SELECT v.label AS version, {', '.join(f'f.{c}' for c in COLUMNS)}, "
+                "snippet(fields_fts, -1, '[', ']', '…', 10) AS snippet "
+                "FROM fields_fts JOIN fields f ON f.rowid = fields_fts.rowid JOIN versions v USING (version_id) "
+                f"WHERE {where} ORDER BY bm25(fields_fts, {weights}), v.created DESC LIMIT ?",
+                (*params, limit)).fetchall()
+        except sqlite3.OperationalError as e:
+            raise RegistryError(f"Invalid search {text!r}: {e}") from None
+        return [dict(r) for r in rows]
+
+
+def changed_columns(before, after):
+    return [c for c in COLUMNS if c != 'id' and before[c] != after[c]]
+
+
+def print_field(field):
+    for column in COLUMNS:
+        value = field[column]
+        if value not in ('', None):
+            print(f"  {column:<22} {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent registry of the form fields across schema versions.")
+    parser.add_argument("query", nargs='?', help="Search the fields (e.g. cizinec)")
+    parser.add_argument("--registry", default=REGISTRY_FILE, help=f"Registry database (default: {REGISTRY_FILE})")
+    parser.add_argument("--index", action="store_true", help="Index the current form structure as a new version")
+    parser.add_argument("--form", default=FORM_FILE, help=f"Form structure JSON to index (default: {FORM_FILE})")
+    parser.add_argument("--label", help="Label of the indexed version (default: <date>-<sha256 prefix>)")
+    parser.add_argument("--git-history", action="store_true", help="Index every committed revision of the form")
+    parser.add_argument("--id", help="Show one field")
+    parser.add_argument("--history", action="store_true", help="With --id: the field in every version")
+    parser.add_argument("--version", default='latest',
+                        help="Version label, 'latest' or 'previous' (default: latest)")
+    parser.add_argument("--all-versions", action="store_true", help="Search all versions")
+    parser.add_argument("--raw", action="store_true", help="The query is an FTS5 expression")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum search results (default: 50)")
+    parser.add_argument("--versions", action="store_true", help="List the indexed versions")
+    args = parser.parse_args()
+
+    try:
+        indexing = args.index or args.git_history
+        with FieldRegistry(args.registry, create=indexing) as registry:
+            if args.git_history:
+                for label, added in registry.index_git_history(args.form):
+                    print(f"{'Indexed' if added else 'Already indexed'}: {label}")
+            if args.index:
+                label, added = registry.index_file(args.form, args.label)
+                print(f"{'Indexed' if added else 'Already indexed'} {args.form} as {label}")
+
+            start = time.perf_counter()
+            if args.versions:
+                for v in registry.versions():
+                    print(f"{v['label']:<24} {v['created']:<26} {v['fields']:>5} fields  {v['source']}")
+            elif args.id and args.history:
+                previous = None
+                for label, field in registry.history(args.id):
+                    if field is None:
+                        print(f"{label}: -")
+                    elif previous is None:
+                        print(f"{label}:")
+                        print_field(field)
+                    else:
+                        changed = changed_columns(previous, field)
+                        print(f"{label}: {'changed ' + ', '.join(changed) if changed else 'unchanged'}")
+                        for column in changed:
+                            print(f"  {column:<22} {previous[column]!r} -> {field[column]!r}")
+                    previous = field
+            elif args.id:
+                field = registry.field(args.id, args.version)
+                if field is None:
+                    print(f"{args.id} is not in version {args.version}")
+                    sys.exit(1)
+                print(f"{args.id} in {field['version']}:")
+                print_field(field)
+            elif args.query:
+                results = registry.search(args.query, None if args.all_versions else args.version,
+                                          args.limit, args.raw)
+                for r in results:
+                    version = f"{r['version']:<24} " if args.all_versions else ''
+                    print(f"{version}{r['id']:<8} {r['description'][:50]:<50} {r['snippet']}")
+                print(f"{len(results)} fields in {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+            elif not indexing:
+                parser.print_usage()
+    except (RegistryError, OSError, subprocess.CalledProcessError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from compile_rules import RULES_FILE, RuleTable
+from validate_submissions import ENUMS_FILE, FORM_FILE, check_file, load_validator
+
+INTAKE_DIR = 'intake'
+HOST = '127.0.0.1'
+PORT = 8080
+
+# Request body read per await; also bounds the memory per connection
+CHUNK_SIZE = 1 << 16
+# Largest accepted submission (attachments included)
+MAX_BODY = 64 << 20
+MAX_HEADER = 16 << 10
+# Seconds a client may stay silent while sending its request
+READ_TIMEOUT = 30
+# Seconds the rest of a refused request is read and dropped before closing
+LINGER_TIMEOUT = 5
+
+STATUS = {
+    200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 408: 'Request Timeout', 411: 'Length Required',
+    413: 'Payload Too Large', 422: 'Unprocessable Entity', 500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+
+# Form variants, chosen by ?form= (the new employee form also has the new_only fields)
+VARIANTS = {'standard': False, 'new': True}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class IntakeServer:
+    """
+    Accepts questionnaires POSTed by the form (saveForm) and stores the valid ones.
+
+    - The request body is streamed into a spool file, never held in memory.
+    - Validation runs in a process pool: the schema is compiled once at startup, the
+      rule table (the JSON of compile_rules.py) once per worker.
+    - Valid submissions are fsync'ed and renamed into <root>/inbox/<date>/, so the
+      inbox only ever holds complete files; invalid ones are rejected with 422.
+    - At most `workers` submissions are validated at once and `queue` more may be
+      uploading; further requests get 503 with Retry-After right away.
+    """
+
+    def __init__(self, root, validators, rule_table, workers, queue, allow_origin=None):
+        self.root = root
+        self.spool = os.path.join(root, 'spool')
+        self.inbox = os.path.join(root, 'inbox')
+        os.makedirs(self.spool, exist_ok=True)
+        os.makedirs(self.inbox, exist_ok=True)
+        self.allow_origin = allow_origin
+        self.capacity = workers + queue
+        self.active = 0
+        self.validating = asyncio.Semaphore(workers)
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                        initargs=(validators, rule_table))
+        self.stats = {'accepted': 0, 'rejected': 0, 'busy': 0, 'failed': 0}
+        self.started = time.time()
+
+    def close(self):
+        self.pool.shutdown()
+
+    # --- HTTP ---
+
+    async def handle(self, reader, writer):
+        status, body = 500, {'error': "Internal error"}
+        try:
+            method, target, headers = await asyncio.wait_for(read_head(reader), READ_TIMEOUT)
+            status, body = await self.route(method, target, headers, reader)
+        except HTTPError as e:
+            status, body = e.status, {'error': e.message}
+        except asyncio.TimeoutError:
+            status, body = 408, {'error': "Request timed out"}
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+            return
+        except Exception as e:
+            self.stats['failed'] += 1
+            print(f"Error: {e!r}", file=sys.stderr)
+
+        try:
+            writer.write(self.response(status, body))
+            await writer.drain()
+            # Lingering close: a client still sending a refused body would get a reset
+            # (and lose the response) if the socket were closed with unread data
+            writer.write_eof()
+            await asyncio.wait_for(discard(reader), LINGER_TIMEOUT)
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+        finally:
+            writer.close()
+
+    def response(self, status, body):
+        content = b'' if body is None else json.dumps(body, ensure_ascii=False).encode('utf-8')
+        headers = [f"HTTP/1.1 {status} {STATUS.get(status, '')}", "Connection: close",
+                   f"Content-Length: {len(content)}"]
+        if content:
+            headers.append("Content-Type: application/json; charset=utf-8")
+        if status == 503:
+            headers.append("Retry-After: 1")
+        if self.allow_origin:
+            headers.append(f"Access-Control-Allow-Origin: {self.allow_origin}")
+            headers.append("Access-Control-Allow-Methods: POST, GET, OPTIONS")
+            headers.append("Access-Control-Allow-Headers: Content-Type")
+        return ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + content
+
+    async def route(self, method, target, headers, reader):
+        path, _, query = target.partition('?')
+        if method == 'OPTIONS':
+            return 204, None
+        if path == '/health':
+            if method != 'GET':
+                raise HTTPError(405, "Use GET")
+            return 200, {'active': self.active, 'capacity': self.capacity, **self.stats,
+                         'uptime_s': round(time.time() - self.started)}
+        if path != '/submit':
+            raise HTTPError(404, f"Unknown path {path}")
+        if method != 'POST':
+            raise HTTPError(405, "Use POST")
+
+        # Backpressure: refuse before reading the body
+        if self.active >= self.capacity:
+            self.stats['busy'] += 1
+            raise HTTPError(503, "Too many submissions in progress, retry later")
+        self.active += 1
+        try:
+            return await self.submit(headers, reader, form_variant(query))
+        finally:
+            self.active -= 1
+
+    # --- Submissions ---
+
+    async def submit(self, headers, reader, variant):
+        if headers.get('transfer-encoding', 'identity') != 'identity':
+            raise HTTPError(411, "Chunked uploads are not supported, send Content-Length")
+        try:
+            length = int(headers['content-length'])
+        except (KeyError, ValueError):
+            raise HTTPError(411, "Content-Length required") from None
+        if length > MAX_BODY:
+            raise HTTPError(413, f"Submission larger than {MAX_BODY} bytes")
+
+        submission_id = uuid.uuid4().hex
+        spool_path = os.path.join(self.spool, f"{submission_id}.json.part")
+        try:
+            await self.receive(reader, length, spool_path)
+            async with self.validating:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self.pool, validate_spooled, spool_path, variant)
+            if not result['valid']:
+                self.stats['rejected'] += 1
+                return 422, {'error': "Submission is not valid", 'errors': result['errors']}
+            target = await asyncio.to_thread(self.store, spool_path, submission_id)
+        finally:
+            if os.path.exists(spool_path):
+                os.remove(spool_path)
+
+        self.stats['accepted'] += 1
+        body = {'id': submission_id, 'path': os.path.relpath(target, self.root)}
+        if result.get('warnings'):
+            body['warnings'] = result['warnings']
+        return 201, body
+
+    async def receive(self, reader, length, path):
+        with open(path, 'wb') as f:
+            remaining = length
+            while remaining:
+                chunk = await asyncio.wait_for(reader.read(min(CHUNK_SIZE, remaining)), READ_TIMEOUT)
+                if not chunk:
+                    raise HTTPError(400, "Request body shorter than Content-Length")
+                f.write(chunk)
+                remaining -= len(chunk)
+            f.flush()
+            # Disk syncs run in a thread, the event loop keeps serving other uploads
+            await asyncio.to_thread(os.fsync, f.fileno())
+
+    def store(self, spool_path, submission_id):
+        day = datetime.date.today().isoformat()
+        directory = os.path.join(self.inbox, day)
+        os.makedirs(directory, exist_ok=True)
+        target = os.path.join(directory, f"{submission_id}.json")
+        # Same filesystem: the file appears complete or not at all
+        os.replace(spool_path, target)
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        return target
+
+
+async def discard(reader):
+    while await reader.read(CHUNK_SIZE):
+        pass
+
+
+def form_variant(query):
+    for part in query.split('&'):
+        name, _, value = part.partition('=')
+        if name == 'form':
+            if value not in VARIANTS:
+                raise HTTPError(400, f"Unknown form {value!r}, expected one of {', '.join(VARIANTS)}")
+            return value
+    return 'standard'
+
+
+# --- Validation (worker side) ---
+
+_worker_validators = None
+_worker_rules = None
+
+
+def init_worker(validators, rule_table):
+    global _worker_validators, _worker_rules
+    _worker_validators = validators
+    # Compiled here: the plain table travels to the worker under any start method
+    _worker_rules = RuleTable(rule_table)
+
+
+def validate_spooled(path, variant):
+    return check_file(path, _worker_validators[variant], _worker_rules)
+
+
+async def read_head(reader):
+    """
+    Reads the request line and headers. Returns (method, target, {lowercase name: value}).
+    """
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.LimitOverrunError:
+        raise HTTPError(400, "Request header too large") from None
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, _ = lines[0].split(' ', 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line") from None
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    return method.upper(), target, headers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP intake service for questionnaires posted by the form.")
+    parser.add_argument("--host", default=HOST, help=f"Address to listen on (default: {HOST})")
+    parser.add_argument("--port", type=int, default=PORT, help=f"Port (default: {PORT})")
+    parser.add_argument("--root", default=INTAKE_DIR, help=f"Spool and inbox directory (default: {INTAKE_DIR})")
+    parser.add_argument("--form", default=FORM_FILE, help=f"Form structure JSON (default: {FORM_FILE})")
+    parser.add_argument("--enums", default=ENUMS_FILE, help=f"Enums JSON (default: {ENUMS_FILE})")
+    parser.add_argument("--rules", default=RULES_FILE, help=f"Compiled rule table (default: {RULES_FILE})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Validation processes (default: CPU count)")
+    parser.add_argument("--queue", type=int, default=256,
+                        help="Submissions uploading or waiting beyond the workers before 503 (default: 256)")
+    parser.add_argument("--allow-origin", default='*',
+                        help="Access-Control-Allow-Origin for the form page ('' to disable, default: *)")
+    args = parser.parse_args()
+
+    # Compiled once; workers get them at start
+    validators = {name: load_validator(args.form, args.enums, show_new_only=new) for name, new in VARIANTS.items()}
+    try:
+        with open(args.rules, 'r', encoding='utf-8') as f:
+            rule_table = json.load(f)
+        # Fails early on an unsupported table version
+        RuleTable(rule_table)
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot load the rules {args.rules}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    async def serve():
+        server = IntakeServer(args.root, validators, rule_table, args.workers, args.queue, args.allow_origin or None)
+        listener = await asyncio.start_server(server.handle, args.host, args.port, limit=MAX_HEADER,
+                                              backlog=max(128, server.capacity))
+        print(f"Intake listening on http://{args.host}:{args.port}/submit, storing into {args.root}/inbox "
+              f"({args.workers} workers, {server.capacity} concurrent submissions)", file=sys.stderr)
+        try:
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
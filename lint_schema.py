@@ -0,0 +1,269 @@
+import argparse
+import json
+import sys
+import time
+
+FORM_FILE = 'docs/regzec_form.json'
+ENUMS_FILE = 'docs/regzec_enums.json'
+
+# Widget types that carry no value and need no ID
+IGNORED_WIDGETS = {'markdown', 'separator'}
+
+ERROR = 'error'
+WARNING = 'warning'
+
+
+class Node:
+    """
+    One visited node with the context collected on the way down.
+    """
+    __slots__ = ('data', 'path', 'parent', 'is_leaf', 'widget', 'new_only_inherited')
+
+    def __init__(self, data, path, parent):
+        self.data = data
+        self.path = path
+        self.parent = parent
+        children = data.get('children')
+        self.is_leaf = not (isinstance(children, list) and len(children) > 0)
+        self.widget = str(data.get('widget') or '').lower()
+        self.new_only_inherited = bool(parent and (parent.data.get('new_only') or parent.new_only_inherited))
+
+    @property
+    def id(self):
+        value = self.data.get('id')
+        return str(value).strip() if value is not None else ''
+
+    @property
+    def is_field(self):
+        # Leaf that holds a value (not a markdown text or a separator)
+        return self.is_leaf and self.widget not in IGNORED_WIDGETS and 'separator' not in self.widget
+
+
+class Rule:
+    """
+    Base class of lint rules. visit() is called for every non-skipped node in
+    document order, finish() once after the traversal.
+    """
+    code = None
+    severity = ERROR
+
+    def __init__(self, linter):
+        self.linter = linter
+
+    def report(self, node, message, severity=None, **extra):
+        self.linter.report(self, node, message, severity, **extra)
+
+    def visit(self, node):
+        pass
+
+    def finish(self):
+        pass
+
+
+RULES = {}
+
+
+def rule(cls):
+    """
+    Registers a rule class under its code.
+    """
+    RULES[cls.code] = cls
+    return cls
+
+
+@rule
+class DuplicateId(Rule):
+    code = 'duplicate-id'
+
+    def __init__(self, linter):
+        super().__init__(linter)
+        self.seen = {}
+
+    def visit(self, node):
+        if node.id:
+            self.seen.setdefault(node.id, []).append(node)
+
+    def finish(self):
+        for node_id, nodes in self.seen.items():
+            if len(nodes) > 1:
+                self.report(nodes[0], f"ID '{node_id}' is used {len(nodes)} times",
+                            paths=[n.path for n in nodes])
+
+
+@rule
+class LeafWithoutId(Rule):
+    code = 'leaf-without-id'
+
+    def visit(self, node):
+        if node.is_field and not node.id:
+            self.report(node, "Leaf node has no ID", description=node.data.get('description'), widget=node.widget)
+
+
+@rule
+class UnknownCiselnik(Rule):
+    code = 'unknown-ciselnik'
+
+    def visit(self, node):
+        ciselnik = node.data.get('ciselnik')
+        if ciselnik and ciselnik not in self.linter.enums:
+            self.report(node, f"Codelist '{ciselnik}' does not exist")
+
+
+@rule
+class MissingEnum(Rule):
+    code = 'missing-enum'
+
+    def visit(self, node):
+        if node.widget != 'selection' or not node.is_leaf:
+            return
+        ciselnik = node.data.get('ciselnik')
+        if not ciselnik:
+            self.report(node, "Selection has no codelist")
+        elif ciselnik in self.linter.enums and not self.linter.enums[ciselnik]:
+            self.report(node, f"Codelist '{ciselnik}' is empty", WARNING)
+
+
+@rule
+class WidgetDatTyp(Rule):
+    code = 'widget-dat-typ'
+    severity = WARNING
+
+    def visit(self, node):
+        if not node.is_field:
+            return
+        dat_typ = str(node.data.get('dat_typ') or '').replace(' ', '')
+        widget = node.widget or 'input'
+        if dat_typ == 'D' and widget != 'date':
+            self.report(node, f"Data type D is shown as '{widget}' instead of 'date'")
+        elif widget == 'date' and dat_typ not in ('', 'D'):
+            self.report(node, f"Widget 'date' with data type '{dat_typ}'")
+        elif dat_typ == 'L' and widget == 'input':
+            self.report(node, "Data type L (A/N) is a free text input instead of a selection")
+        elif widget == 'file' and dat_typ not in ('', 'Base64'):
+            self.report(node, f"Widget 'file' with data type '{dat_typ}'")
+
+
+@rule
+class NewOnlyConsistency(Rule):
+    code = 'new-only'
+    severity = WARNING
+
+    def visit(self, node):
+        data = node.data
+        if 'new_only' in data and not isinstance(data['new_only'], bool):
+            self.report(node, f"new_only is not a boolean: {data['new_only']!r}", ERROR)
+        if data.get('new_only') and node.new_only_inherited:
+            self.report(node, "new_only is already inherited from a parent")
+        if node.is_leaf or data.get('new_only') or node.new_only_inherited:
+            return
+        # A group shown in the standard form with only new_only content would be empty there
+        children = [c for c in data['children'] if isinstance(c, dict) and not c.get('skip')]
+        if children and all(c.get('new_only') for c in children):
+            self.report(node, "All children are new_only, the group is empty in the standard form")
+
+
+def is_embedded_enums(entry):
+    # docs/regzec_form.json starts with a copy of the enums ({code: [options], ..., children: []})
+    if not isinstance(entry, dict) or 'key' in entry:
+        return False
+    return any(isinstance(v, list) and v and isinstance(v[0], dict) and 'value' in v[0]
+               for k, v in entry.items() if k != 'children')
+
+
+class Linter:
+    def __init__(self, enums, rules=None):
+        self.enums = enums
+        self.issues = []
+        self.nodes = 0
+        self.rules = [RULES[code](self) for code in (RULES if rules is None else rules)]
+
+    def report(self, rule, node, message, severity=None, **extra):
+        issue = {
+            'rule': rule.code,
+            'severity': severity or rule.severity,
+            'path': node.path,
+            'id': node.id or None,
+            'key': node.data.get('key'),
+            'original_path': node.data.get('original_path'),
+            'message': message,
+        }
+        issue.update(extra)
+        self.issues.append(issue)
+
+    def lint(self, structure):
+        """
+        Single iterative pass over the structure; every rule sees every node.
+        Skipped subtrees are not linted.
+        """
+        visitors = [r.visit for r in self.rules]
+        entries = structure if isinstance(structure, list) else [structure]
+        stack = [(entry, f"[{i}]", None) for i, entry in reversed(list(enumerate(entries)))]
+        while stack:
+            data, path, parent = stack.pop()
+            if not isinstance(data, dict) or data.get('skip') is True:
+                continue
+            if parent is None and is_embedded_enums(data):
+                continue
+            node = Node(data, path, parent)
+            self.nodes += 1
+            for visit in visitors:
+                visit(node)
+            if not node.is_leaf:
+                children = data['children']
+                stack.extend((child, f"{path}.children[{i}]", node) for i, child in reversed(list(enumerate(children))))
+
+        for r in self.rules:
+            r.finish()
+        return self.issues
+
+
+def lint_file(form_file=FORM_FILE, enums_file=ENUMS_FILE, rules=None):
+    with open(form_file, 'r', encoding='utf-8') as f:
+        structure = json.load(f)
+    with open(enums_file, 'r', encoding='utf-8') as f:
+        enums = json.load(f)
+    linter = Linter(enums, rules)
+    linter.lint(structure)
+    return linter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lint the form structure (IDs, codelists, widgets, new_only).")
+    parser.add_argument("file", nargs='?', default=FORM_FILE, help=f"Form structure JSON (default: {FORM_FILE})")
+    parser.add_argument("--enums", default=ENUMS_FILE, help=f"Enums JSON (default: {ENUMS_FILE})")
+    parser.add_argument("--rule", action="append", choices=sorted(RULES), help="Run only this rule (repeatable)")
+    parser.add_argument("--disable", action="append", default=[], choices=sorted(RULES), help="Skip this rule (repeatable)")
+    parser.add_argument("--strict", action="store_true", help="Fail on warnings too")
+    args = parser.parse_args()
+
+    rules = [code for code in (args.rule or RULES) if code not in args.disable]
+
+    start = time.perf_counter()
+    try:
+        linter = lint_file(args.file, args.enums, rules)
+    except (OSError, ValueError) as e:
+        print(f"Error reading file: {e}", file=sys.stderr)
+        sys.exit(2)
+    elapsed = time.perf_counter() - start
+
+    errors = sum(1 for i in linter.issues if i['severity'] == ERROR)
+    report = {
+        'summary': {
+            'file': args.file,
+            'nodes': linter.nodes,
+            'rules': rules,
+            'errors': errors,
+            'warnings': len(linter.issues) - errors,
+            'seconds': round(elapsed, 4),
+        },
+        'issues': linter.issues,
+    }
+    json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+
+    if errors or (args.strict and linter.issues):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,21 +3,23 @@ import os
 
 def extract_ids_and_desc(node, items_list):
     """
-    Recursively extracts 'id' and 'description' (or 'label') from a node and its children.
+    Extracts 'id' and 'description' (or 'label') from a node and its children,
+    in document order. Uses an explicit stack, so deep structures are fine.
     """
-    if isinstance(node, dict):
-        if 'id' in node and node['id']:
-            desc = node.get('description') or node.get('label') or "No description"
-            items_list.append({'id': node['id'], 'desc': desc})
-        
-        # Recurse into children if present
-        if 'children' in node and isinstance(node['children'], list):
-            for child in node['children']:
-                extract_ids_and_desc(child, items_list)
-        
-    elif isinstance(node, list):
-        for item in node:
-            extract_ids_and_desc(item, items_list)
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if 'id' in node and node['id']:
+                desc = node.get('description') or node.get('label') or "No description"
+                items_list.append({'id': node['id'], 'desc': desc})
+
+            # Continue with children if present
+            if 'children' in node and isinstance(node['children'], list):
+                stack.extend(reversed(node['children']))
+
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
 
 def main():
     json_path = 'docs/regzec_form.json'
@@ -0,0 +1,243 @@
+import argparse
+import copy
+import json
+import sys
+
+TARGET_FILE = 'docs/regzec_form.json'
+SOURCE_FILE = 'regzec_structure.json'
+
+# Properties copied from the source node (same list as handleMergeUpload in regzec_structure.html)
+PROPS_TO_SYNC = [
+    'description', 'label', 'mandatory', 'dat_typ', 'delka',
+    'p', 'n', 'z', 'vysvetlivky', 'widget', 'order', 'width',
+    'skip', 'new_only', 'ciselnik', 'default_value', 'content',
+    'multiple', 'manual_parent', 'id', 'rows'
+]
+
+MISSING = object()
+
+
+def js_differs(old, new):
+    """
+    Python equivalent of `old !== new` for JSON values: objects and arrays are
+    never identical, numbers compare by value, other types must match.
+    """
+    if old is MISSING:
+        return True
+    if isinstance(old, (dict, list)) or isinstance(new, (dict, list)):
+        return True
+    if isinstance(old, bool) or isinstance(new, bool):
+        return type(old) is not type(new) or old != new
+    if isinstance(old, (int, float)) and isinstance(new, (int, float)):
+        return old != new
+    return type(old) is not type(new) or old != new
+
+
+def describe(node):
+    return node.get('original_path') or node.get('key') or str(node.get('id', ''))
+
+
+class SchemaMerger:
+    """
+    Source-driven merge of a structure into a form tree, with the semantics of
+    handleMergeUpload: nodes are matched by ID anywhere in the target (and moved
+    under the source parent), otherwise by key among the current siblings;
+    PROPS_TO_SYNC are copied and unmatched source nodes are added.
+
+    Lookups go through indexes instead of scanning the sibling arrays:
+    - ids: ID -> (node, parent array), built once before the merge like the idMap
+    - parents: node -> array that currently holds it
+    - keys: array -> {key: nodes in array order}, built on first use and kept up to date
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self.ids = {}
+        self.parents = {}
+        self.owners = {id(target): None}
+        self.keys = {}
+        self.stats = {'updated': 0, 'moved': 0, 'added': 0}
+        self.plan = []
+
+        # Pre-order like buildIdMap (a duplicate ID keeps the last node)
+        stack = [(node, target) for node in reversed(target)]
+        while stack:
+            node, parent_array = stack.pop()
+            self.parents[id(node)] = parent_array
+            if node.get('id'):
+                self.ids[str(node['id'])] = (node, parent_array)
+            children = node.get('children')
+            if isinstance(children, list):
+                self.owners[id(children)] = node
+                stack.extend((child, children) for child in reversed(children))
+
+    # --- Array operations keeping the indexes in sync ---
+
+    def key_index(self, array):
+        index = self.keys.get(id(array))
+        if index is None:
+            index = {}
+            for node in array:
+                index.setdefault(node.get('key'), []).append(node)
+            self.keys[id(array)] = index
+        return index
+
+    def find_by_key(self, array, key):
+        # targetArray.find(n => n.key === source.key)
+        nodes = self.key_index(array).get(key)
+        return nodes[0] if nodes else None
+
+    def push(self, array, node):
+        array.append(node)
+        self.parents[id(node)] = array
+        index = self.keys.get(id(array))
+        if index is not None:
+            index.setdefault(node.get('key'), []).append(node)
+
+    def remove(self, array, node):
+        for i, item in enumerate(array):
+            if item is node:
+                del array[i]
+                break
+        self.parents.pop(id(node), None)
+        index = self.keys.get(id(array))
+        if index is not None:
+            nodes = index[node.get('key')]
+            nodes[:] = [n for n in nodes if n is not node]
+
+    def children_of(self, node):
+        if node.get('children') is None:
+            node['children'] = []
+        children = node['children']
+        self.owners.setdefault(id(children), node)
+        return children
+
+    def array_path(self, array):
+        owner = self.owners.get(id(array))
+        return describe(owner) if owner is not None else 'root'
+
+    # --- Merge ---
+
+    def merge(self, source):
+        """
+        Merges the source nodes into the target root. Returns the stats.
+        """
+        sources = source if isinstance(source, list) else [source]
+        # Explicit stack of (target array, remaining source nodes): same order as the recursion
+        stack = [(self.target, iter(sources))]
+        while stack:
+            target_array, pending = stack[-1]
+            source_node = next(pending, None)
+            if source_node is None:
+                stack.pop()
+                continue
+            children = self.merge_node(target_array, source_node)
+            if children is not None:
+                stack.append(children)
+        return self.stats
+
+    def merge_node(self, target_array, source):
+        target_info = None
+        if source.get('id') and str(source['id']) in self.ids:
+            target_info = self.ids[str(source['id'])]
+        target_node = target_info[0] if target_info else None
+        if target_node is None:
+            target_node = self.find_by_key(target_array, source.get('key'))
+
+        if target_node is None:
+            # ADD
+            new_node = {k: v for k, v in source.items() if k != 'children'}
+            new_node['children'] = []
+            self.owners[id(new_node['children'])] = new_node
+            self.push(target_array, new_node)
+            self.stats['added'] += 1
+            self.plan.append({'op': 'add', 'id': source.get('id'), 'path': describe(new_node),
+                              'parent': self.array_path(target_array)})
+            if source.get('children') is not None:
+                return new_node['children'], iter(source['children'])
+            return None
+
+        # UPDATE
+        changes = {}
+        for prop in PROPS_TO_SYNC:
+            if prop in source and js_differs(target_node.get(prop, MISSING), source[prop]):
+                changes[prop] = [target_node.get(prop), source[prop]]
+                target_node[prop] = source[prop]
+
+        # MOVE: found by ID under another parent
+        current_parent = self.parents.get(id(target_node))
+        if target_info and target_info[1] is not target_array:
+            if current_parent is target_info[1]:
+                self.remove(target_info[1], target_node)
+                self.push(target_array, target_node)
+                self.stats['moved'] += 1
+                self.plan.append({'op': 'move', 'id': target_node.get('id'), 'path': describe(target_node),
+                                  'from': self.array_path(target_info[1]), 'to': self.array_path(target_array)})
+        elif current_parent is not target_array:
+            self.push(target_array, target_node)
+
+        if changes:
+            self.stats['updated'] += 1
+            self.plan.append({'op': 'update', 'id': target_node.get('id'), 'path': describe(target_node),
+                              'changes': changes})
+
+        if source.get('children') is not None:
+            return self.children_of(target_node), iter(source['children'])
+        return None
+
+
+def merge_schema(target, source):
+    """
+    Merges `source` into a copy of `target`. Returns (merged, stats, plan).
+    """
+    merged = copy.deepcopy(target)
+    merger = SchemaMerger(merged)
+    stats = merger.merge(source)
+    return merged, stats, merger.plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge a freshly extracted structure into the form (like the Merge button in regzec_structure.html).")
+    parser.add_argument("source", nargs='?', default=SOURCE_FILE, help=f"Structure to merge in (default: {SOURCE_FILE})")
+    parser.add_argument("--target", default=TARGET_FILE, help=f"Form structure to update (default: {TARGET_FILE})")
+    parser.add_argument("--output", help="Where to write the merged structure (default: overwrite --target)")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the change plan, write nothing")
+    parser.add_argument("--plan", help="Write the change plan as JSON to this file")
+    args = parser.parse_args()
+
+    try:
+        with open(args.target, 'r', encoding='utf-8') as f:
+            target = json.load(f)
+        with open(args.source, 'r', encoding='utf-8') as f:
+            source = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+
+    merged, stats, plan = merge_schema(target, source)
+
+    if args.plan:
+        with open(args.plan, 'w', encoding='utf-8') as f:
+            json.dump({'stats': stats, 'changes': plan}, f, indent=2, ensure_ascii=False)
+
+    if args.dry_run:
+        for change in plan:
+            if change['op'] == 'update':
+                props = ', '.join(change['changes'])
+                print(f"~ {change['path']} ({change['id']}): {props}")
+            elif change['op'] == 'move':
+                print(f"> {change['path']} ({change['id']}): {change['from']} -> {change['to']}")
+            else:
+                print(f"+ {change['path']} under {change['parent']}")
+    else:
+        output = args.output or args.target
+        # Same formatting as exportData() in regzec_structure.html
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(merged, f, indent=2, ensure_ascii=False)
+        print(f"Saved {output}")
+
+    print(f"Merged: {stats['updated']} updated, {stats['moved']} moved, {stats['added']} added.")
+
+
+if __name__ == "__main__":
+    main()
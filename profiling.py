@@ -0,0 +1,283 @@
+import argparse
+import cProfile
+import datetime
+import json
+import os
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPORT_VERSION = 1
+
+# Functions listed per top-level stage when cProfile is on
+HOTSPOTS = 15
+
+
+def max_rss_mb():
+    # High-water mark of the process (kB on Linux, bytes on macOS)
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def hotspots(stats, top=HOTSPOTS):
+    stats.sort_stats('cumulative')
+    result = []
+    for func in stats.fcn_list[:top]:
+        cc, nc, tt, ct, _ = stats.stats[func]
+        filename, line, name = func
+        result.append({
+            'function': f"{os.path.basename(filename)}:{line}({name})" if line else name,
+            'calls': nc,
+            'tottime_s': round(tt, 4),
+            'cumtime_s': round(ct, 4),
+        })
+    return result
+
+
+class Profiler:
+    """
+    Per-stage wall time, CPU time and peak memory of a script run.
+
+        with Profiler(memory=True) as profiler:
+            with profiler.stage('read') as info:
+                ...
+                info['rows'] = len(rows)
+        profiler.save('profile.json')
+
+    Stages nest ('extract/workbook:regzec.xlsx/sheet:C_POHL') and repeated stages are
+    summed. `memory` traces Python allocations with tracemalloc (peak per stage),
+    `cprofile` collects the hottest functions of every top-level stage. A disabled
+    profiler costs one branch per stage.
+    """
+
+    def __init__(self, enabled=True, memory=False, cprofile=False, script=None):
+        self.enabled = enabled
+        self.memory = memory
+        self.cprofile = cprofile
+        self.script = script or os.path.splitext(os.path.basename(sys.argv[0]))[0]
+        self.records = {}
+        self.profiles = {}
+        self.stack = []
+        self.peak = 0
+        self.started = None
+        self.total = None
+
+    def __enter__(self):
+        if self.enabled:
+            if self.memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.started = (datetime.datetime.now().isoformat(timespec='seconds'),
+                            time.perf_counter(), time.process_time())
+        return self
+
+    def __exit__(self, *exc):
+        if self.enabled and self.started:
+            _, wall, cpu = self.started
+            self.total = {
+                'wall_s': round(time.perf_counter() - wall, 4),
+                'cpu_s': round(time.process_time() - cpu, 4),
+                'max_rss_mb': max_rss_mb(),
+            }
+            if self.memory and tracemalloc.is_tracing():
+                # reset_peak() runs per stage, so the run peak is the largest stage peak
+                peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+                self.total['peak_mb'] = round(peak / 2**20, 2)
+                tracemalloc.stop()
+        return False
+
+    @contextmanager
+    def stage(self, name, **info):
+        """
+        Measures the enclosed block. Yields a dict for extra numbers (rows, items, ...).
+        """
+        if not self.enabled:
+            yield info
+            return
+
+        parent = self.stack[-1] if self.stack else None
+        frame = {'path': f"{parent['path']}/{name}" if parent else name, 'peak': 0}
+        tracing = self.memory and tracemalloc.is_tracing()
+        if tracing:
+            # The parent keeps the peak reached so far, the child starts from zero
+            if parent:
+                parent['peak'] = max(parent['peak'], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        profile = cProfile.Profile() if self.cprofile and parent is None else None
+
+        self.stack.append(frame)
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profile:
+            profile.enable()
+        try:
+            yield info
+        finally:
+            if profile:
+                profile.disable()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            self.stack.pop()
+            peak = None
+            if tracing:
+                peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                if parent:
+                    parent['peak'] = max(parent['peak'], peak)
+                self.peak = max(self.peak, peak)
+                tracemalloc.reset_peak()
+            self.add(frame['path'], wall, cpu, peak, info)
+            if profile:
+                if frame['path'] in self.profiles:
+                    self.profiles[frame['path']].add(profile)
+                else:
+                    self.profiles[frame['path']] = pstats.Stats(profile)
+
+    def add(self, path, wall, cpu, peak=None, info=None, count=1):
+        record = self.records.get(path)
+        if record is None:
+            record = self.records[path] = {'stage': path, 'count': 0, 'wall_s': 0.0, 'cpu_s': 0.0}
+        record['count'] += count
+        record['wall_s'] += wall
+        record['cpu_s'] += cpu
+        if peak is not None:
+            record['peak_mb'] = max(record.get('peak_mb', 0.0), peak / 2**20)
+        record['max_rss_mb'] = max_rss_mb()
+        for key, value in (info or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                record[key] = record.get(key, 0) + value
+            else:
+                record[key] = value
+
+    def merge(self, stages):
+        """
+        Adds the stages of another profiler's report (e.g. from a worker process)
+        under the current stage.
+        """
+        if not self.enabled:
+            return
+        prefix = f"{self.stack[-1]['path']}/" if self.stack else ''
+        for s in stages:
+            info = {k: v for k, v in s.items()
+                    if k not in ('stage', 'count', 'wall_s', 'cpu_s', 'peak_mb', 'max_rss_mb', 'hotspots')}
+            peak = s['peak_mb'] * 2**20 if 'peak_mb' in s else None
+            self.add(prefix + s['stage'], s['wall_s'], s['cpu_s'], peak, info, count=s['count'])
+
+    def report(self):
+        stages = []
+        for path, record in self.records.items():
+            record = dict(record, wall_s=round(record['wall_s'], 4), cpu_s=round(record['cpu_s'], 4))
+            if 'peak_mb' in record:
+                record['peak_mb'] = round(record['peak_mb'], 2)
+            if path in self.profiles:
+                record['hotspots'] = hotspots(self.profiles[path])
+            stages.append(record)
+        return {
+            'version': REPORT_VERSION,
+            'script': self.script,
+            'argv': sys.argv[1:],
+            'created': self.started[0] if self.started else None,
+            'python': platform.python_version(),
+            'options': {'memory': self.memory, 'cprofile': self.cprofile},
+            'total': self.total,
+            'stages': stages,
+        }
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+
+    def print_summary(self, file=None):
+        file = file or sys.stdout
+        stages = self.report()['stages']
+        width = max([len(s['stage']) for s in stages] + [5])
+        print(f"{'stage':<{width}} {'n':>4} {'wall [s]':>9} {'cpu [s]':>8} {'peak [MB]':>9}", file=file)
+        for s in stages:
+            peak = f"{s['peak_mb']:.2f}" if 'peak_mb' in s else '-'
+            print(f"{s['stage']:<{width}} {s['count']:>4} {s['wall_s']:>9.3f} {s['cpu_s']:>8.3f} {peak:>9}", file=file)
+        if self.total:
+            peak = f"{self.total['peak_mb']:.2f}" if 'peak_mb' in self.total else '-'
+            print(f"{'total':<{width}} {'':>4} {self.total['wall_s']:>9.3f} {self.total['cpu_s']:>8.3f} {peak:>9}",
+                  file=file)
+
+
+def add_profile_arguments(parser):
+    # Shared by the extraction scripts
+    group = parser.add_argument_group("profiling")
+    group.add_argument("--profile", metavar="REPORT", help="Write per-stage timing and memory as JSON to REPORT")
+    group.add_argument("--profile-memory", action="store_true", help="Trace Python allocations (tracemalloc) per stage")
+    group.add_argument("--cprofile", action="store_true", help="Add the hottest functions of every top-level stage")
+
+
+def profiler_from_args(args):
+    return Profiler(enabled=bool(args.profile), memory=args.profile_memory, cprofile=args.cprofile)
+
+
+# --- Comparing reports ---
+
+def compare_reports(old, new, metric='wall_s'):
+    """
+    Pairs the stages of two reports. Returns rows of
+    {'stage', 'old', 'new', 'change'} (change as a ratio, None if not comparable).
+    """
+    old_stages = {s['stage']: s for s in old['stages']}
+    new_stages = {s['stage']: s for s in new['stages']}
+    rows = []
+    for stage in list(old_stages) + [s for s in new_stages if s not in old_stages]:
+        a = old_stages.get(stage, {}).get(metric)
+        b = new_stages.get(stage, {}).get(metric)
+        change = (b - a) / a if a and b is not None else None
+        rows.append({'stage': stage, 'old': a, 'new': b, 'change': change})
+    if old.get('total') and new.get('total') and metric in old['total']:
+        a, b = old['total'][metric], new['total'].get(metric)
+        rows.append({'stage': 'total', 'old': a, 'new': b,
+                     'change': (b - a) / a if a and b is not None else None})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two profile reports written with --profile.")
+    parser.add_argument("old", help="Baseline report")
+    parser.add_argument("new", help="New report")
+    parser.add_argument("--metric", default='wall_s', choices=['wall_s', 'cpu_s', 'peak_mb', 'max_rss_mb'],
+                        help="Compared value (default: wall_s)")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Exit with 1 if a stage got slower/bigger by more than this percentage")
+    args = parser.parse_args()
+
+    with open(args.old, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    with open(args.new, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+
+    def fmt(value):
+        return f"{value:.3f}" if value is not None else '-'
+
+    rows = compare_reports(old, new, args.metric)
+    width = max(len(row['stage']) for row in rows) if rows else 5
+    regressions = 0
+    print(f"{'stage':<{width}} {'old':>9} {'new':>9} {'change':>8}")
+    for row in rows:
+        change = f"{row['change'] * 100:+.1f}%" if row['change'] is not None else '-'
+        flag = ''
+        if args.threshold is not None and row['change'] is not None and row['change'] * 100 > args.threshold:
+            flag = ' !'
+            regressions += 1
+        print(f"{row['stage']:<{width}} {fmt(row['old']):>9} {fmt(row['new']):>9} {change:>8}{flag}")
+
+    if regressions:
+        print(f"{regressions} stage(s) above the {args.threshold}% threshold", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+
+from lint_schema import is_embedded_enums
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DOCS_DIR = 'docs'
+DIST_DIR = 'dist'
+ENUMS_FILE = 'regzec_enums.json'
+MANIFEST_FILE = 'manifest.json'
+
+HASH_LENGTH = 10
+
+# Published assets, in dependency order: every file only references files above it
+BUNDLES = ['regzec_form.bundle.json', 'new_regzec_form.bundle.json']
+DATA = ['regzec_form.json', 'regzec_enums.json', 'regzec_enums.index.json', 'regzec_rules.json']
+SCRIPTS = ['ts-form-bundle.js', 'regzec_form.js']
+# Entry points keep their names (served without long-term caching)
+PAGES = ['regzec_form.html', 'new_regzec_form.html']
+
+COMPRESSED_TYPES = ('.json', '.js', '.html')
+
+
+def minify_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dedupe_options(bundle, enums):
+    """
+    Returns a copy of a form bundle where every field options list equal to a
+    codelist is replaced by the codelist key; the codelists are added once under
+    'enums' (expanded again by docs/regzec_form.js).
+    """
+    by_content = {}
+    for key, options in enums.items():
+        by_content.setdefault(minify_json(options), key)
+
+    fields, used = {}, {}
+    for name, field in bundle['fields'].items():
+        options = field.get('options')
+        key = by_content.get(minify_json(options)) if isinstance(options, list) and options else None
+        if key:
+            field = dict(field, options=key)
+            used[key] = options
+        fields[name] = field
+    return {**bundle, 'fields': fields, 'enums': dict(sorted(used.items()))}
+
+
+def hashed_name(name, content):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def rewrite_references(text, names):
+    # 'file.json', "./file.js": the name follows a quote or slash and is followed by a quote
+    for name, published in names.items():
+        text = re.sub(r'(?<=["\'/])' + re.escape(name) + r'(?=["\'])', published, text)
+    return text
+
+
+def write_asset(dist, name, content, compress=True):
+    """
+    Writes one file with its .gz (and .br, if brotli is installed) variants.
+    Returns the sizes {raw, gz, br}.
+    """
+    sizes = {'raw': len(content)}
+    with open(os.path.join(dist, name), 'wb') as f:
+        f.write(content)
+    if compress and name.endswith(COMPRESSED_TYPES):
+        # mtime=0 keeps the output reproducible
+        variants = [('gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('br', brotli.compress(content, quality=11)))
+        for ext, data in variants:
+            if len(data) < len(content):
+                with open(os.path.join(dist, f"{name}.{ext}"), 'wb') as f:
+                    f.write(data)
+                sizes[ext] = len(data)
+    return sizes
+
+
+def publish(docs=DOCS_DIR, dist=DIST_DIR, compress=True):
+    """
+    Builds the static distribution of `docs` in `dist`. Returns {name: published name, sizes}.
+    """
+    if os.path.abspath(dist) == os.path.abspath(docs):
+        raise ValueError("The distribution directory must differ from the docs directory")
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+    os.makedirs(dist)
+
+    def read(name):
+        with open(os.path.join(docs, name), 'rb') as f:
+            return f.read()
+
+    with open(os.path.join(docs, ENUMS_FILE), 'r', encoding='utf-8') as f:
+        enums = json.load(f)
+
+    contents = {}
+    for name in BUNDLES:
+        contents[name] = minify_json(dedupe_options(json.loads(read(name)), enums))
+    for name in DATA:
+        data = json.loads(read(name))
+        if name == 'regzec_form.json':
+            # The editor's embedded enums copy duplicates regzec_enums.json
+            data = [entry for entry in data if not is_embedded_enums(entry)]
+        contents[name] = minify_json(data)
+
+    names, report = {}, {}
+    for name in BUNDLES + DATA + SCRIPTS:
+        content = contents.get(name)
+        if content is None:
+            content = rewrite_references(read(name).decode('utf-8'), names).encode('utf-8')
+        names[name] = hashed_name(name, content)
+        report[name] = (names[name], len(read(name)), write_asset(dist, names[name], content, compress))
+
+    for name in PAGES:
+        content = rewrite_references(read(name).decode('utf-8'), names).encode('utf-8')
+        report[name] = (name, len(content), write_asset(dist, name, content, compress))
+
+    with open(os.path.join(dist, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(names, f, indent=2, ensure_ascii=False)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish docs/ as minified, content-hashed and precompressed static files.")
+    parser.add_argument("--docs", default=DOCS_DIR, help=f"Source directory (default: {DOCS_DIR})")
+    parser.add_argument("--output", default=DIST_DIR, help=f"Output directory, replaced on every run (default: {DIST_DIR})")
+    parser.add_argument("--no-compress", action="store_true", help="Do not write .gz/.br variants")
+    args = parser.parse_args()
+
+    try:
+        report = publish(args.docs, args.output, compress=not args.no_compress)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"{'file':<46} {'source':>9} {'raw':>9} {'gz':>9} {'br':>9}")
+    for published, source_size, sizes in report.values():
+        print(f"{published:<46} {source_size:>9} {sizes['raw']:>9} {sizes.get('gz', '-'):>9} {sizes.get('br', '-'):>9}")
+    if brotli is None and not args.no_compress:
+        print("Note: brotli is not installed, only .gz variants were written.")
+    print(f"Published {len(report)} files to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+import argparse
+import base64
+import errno
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+
+# Characters read from the file at once; also bounds the memory per attachment
+CHUNK_SIZE = 1 << 16
+
+WHITESPACE = ' \t\n\r'
+DELIMITERS = ',]}' + WHITESPACE
+STRING_SPECIAL = re.compile(r'["\\]')
+# A character outside the BMP written with ensure_ascii: both halves decode together
+SURROGATE_PAIR_RE = re.compile(r'\\u[dD][89abAB][0-9a-fA-F]{2}\\u[dD][c-fC-F][0-9a-fA-F]{2}')
+
+
+class SubmissionFormatError(ValueError):
+    pass
+
+
+class _Stream:
+    """
+    Character stream over a text file with a small look-ahead buffer.
+    """
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+
+    def fill(self, needed=1):
+        # Makes sure at least `needed` characters are buffered (if the file has them)
+        while len(self.buf) - self.pos < needed:
+            chunk = self.f.read(self.chunk_size)
+            if not chunk:
+                return False
+            self.buf = self.buf[self.pos:] + chunk
+            self.pos = 0
+        return True
+
+    def peek(self):
+        # Next non-whitespace character (not consumed)
+        while True:
+            if not self.fill():
+                raise SubmissionFormatError("Unexpected end of file")
+            c = self.buf[self.pos]
+            if c in WHITESPACE:
+                self.pos += 1
+                continue
+            return c
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise SubmissionFormatError(f"Expected {char!r}, got {self.buf[self.pos]!r}")
+        self.pos += 1
+
+    def startswith(self, prefix):
+        self.fill(len(prefix))
+        return self.buf.startswith(prefix, self.pos)
+
+    def iter_string(self):
+        """
+        Yields the decoded content of the string at the current position piece by piece.
+        """
+        self.expect('"')
+        while True:
+            if not self.fill():
+                raise SubmissionFormatError("Unterminated string")
+            buf = self.buf
+            match = STRING_SPECIAL.search(buf, self.pos)
+            end = match.start() if match else len(buf)
+            if end > self.pos:
+                yield buf[self.pos:end]
+                self.pos = end
+            if end == len(buf):
+                continue
+            if buf[end] == '"':
+                self.pos = end + 1
+                return
+            # Escape sequence: \x, \uXXXX or a surrogate pair \uXXXX\uXXXX
+            self.fill(12)
+            buf = self.buf
+            if len(buf) - self.pos < 2:
+                raise SubmissionFormatError("Unterminated escape")
+            length = 2
+            if buf[self.pos + 1] == 'u':
+                length = 12 if SURROGATE_PAIR_RE.match(buf, self.pos) else 6
+            escape = buf[self.pos:self.pos + length]
+            if len(escape) < length:
+                raise SubmissionFormatError("Unterminated escape")
+            self.pos += length
+            try:
+                yield json.loads(f'"{escape}"')
+            except ValueError:
+                raise SubmissionFormatError(f"Invalid escape {escape!r}") from None
+
+    def read_string(self):
+        return ''.join(self.iter_string())
+
+    def read_scalar(self):
+        # Number, true, false or null
+        chars = []
+        while self.fill() and self.buf[self.pos] not in DELIMITERS:
+            chars.append(self.buf[self.pos])
+            self.pos += 1
+        token = ''.join(chars)
+        try:
+            return json.loads(token)
+        except ValueError:
+            raise SubmissionFormatError(f"Invalid value {token!r}") from None
+
+
+class _AttachmentSink:
+    """
+    Decodes a base64 data URL written piece by piece into a file (or only counts it).
+    """
+
+    def __init__(self, attachments_dir):
+        self.header = ''
+        self.in_payload = False
+        self.pending = ''
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        self.file = None
+        self.path = None
+        if attachments_dir is not None:
+            fd, self.path = tempfile.mkstemp(dir=attachments_dir, suffix='.part')
+            self.file = os.fdopen(fd, 'wb')
+
+    def write(self, text):
+        if not self.in_payload:
+            # Strip the "data:<type>;base64," header
+            self.header += text
+            comma = self.header.find(',')
+            if comma < 0:
+                return
+            text = self.header[comma + 1:]
+            self.header = self.header[:comma]
+            self.in_payload = True
+
+        text = self.pending + text
+        usable = len(text) - len(text) % 4
+        self.pending = text[usable:]
+        if usable:
+            self._emit(base64.b64decode(text[:usable]))
+
+    def _emit(self, data):
+        self.size += len(data)
+        self.sha256.update(data)
+        if self.file:
+            self.file.write(data)
+
+    def close(self):
+        if self.pending:
+            self._emit(base64.b64decode(self.pending + '=' * (-len(self.pending) % 4)))
+            self.pending = ''
+        if self.file:
+            self.file.close()
+
+    def discard(self):
+        if self.file:
+            self.file.close()
+            os.remove(self.path)
+
+
+def _safe_name(name):
+    name = re.sub(r'[^\w.\-]+', '_', name or '', flags=re.UNICODE).strip('._')
+    return name or 'attachment'
+
+
+class _Parser:
+    def __init__(self, stream, attachments_dir, prefix):
+        self.stream = stream
+        self.attachments_dir = attachments_dir
+        # Submission file stem: several submissions can share one attachments_dir
+        self.prefix = prefix
+        self.attachment_counts = {}
+
+    def parse_value(self, field_id):
+        c = self.stream.peek()
+        if c == '{':
+            return self.parse_object(field_id)
+        if c == '[':
+            return self.parse_array(field_id)
+        if c == '"':
+            return self.stream.read_string()
+        return self.stream.read_scalar()
+
+    def parse_array(self, field_id):
+        stream = self.stream
+        stream.expect('[')
+        items = []
+        if stream.peek() == ']':
+            stream.pos += 1
+            return items
+        while True:
+            items.append(self.parse_value(field_id))
+            c = stream.peek()
+            stream.pos += 1
+            if c == ']':
+                return items
+            if c != ',':
+                raise SubmissionFormatError(f"Expected ',' or ']', got {c!r}")
+
+    def parse_object(self, field_id):
+        stream = self.stream
+        stream.expect('{')
+        obj = {}
+        sink = None
+        if stream.peek() == '}':
+            stream.pos += 1
+            return obj
+        while True:
+            key = stream.read_string()
+            stream.expect(':')
+            if key == 'data' and stream.peek() == '"' and stream.startswith('"data:'):
+                # Attachment payload (saveForm data URL): decode straight to disk
+                sink = _AttachmentSink(self.attachments_dir)
+                try:
+                    for piece in stream.iter_string():
+                        sink.write(piece)
+                    sink.close()
+                except Exception:
+                    sink.discard()
+                    raise
+            else:
+                obj[key] = self.parse_value(field_id)
+            c = stream.peek()
+            stream.pos += 1
+            if c == '}':
+                break
+            if c != ',':
+                raise SubmissionFormatError(f"Expected ',' or '}}', got {c!r}")
+
+        if sink is not None:
+            self.finish_attachment(field_id, obj, sink)
+        return obj
+
+    def finish_attachment(self, field_id, obj, sink):
+        obj['data_size'] = sink.size
+        obj['sha256'] = sink.sha256.hexdigest()
+        if sink.path is None:
+            obj['path'] = None
+            return
+        index = self.attachment_counts.get(field_id, 0)
+        self.attachment_counts[field_id] = index + 1
+        name = f"{self.prefix}_{field_id}_{index}_{_safe_name(obj.get('name'))}"
+        path = os.path.join(self.attachments_dir, name)
+        if os.path.exists(path):
+            # Same file name from another directory: never replace its attachment
+            sink.discard()
+            raise FileExistsError(errno.EEXIST, "Attachment already exists", path)
+        os.replace(sink.path, path)
+        obj['path'] = path
+
+
+def iter_submission(path, attachments_dir=None, chunk_size=CHUNK_SIZE):
+    """
+    Streams a questionnaire JSON file saved by saveForm and yields (field_id, value) pairs.
+
+    Attachments ({..., data: 'data:...;base64,...', _is_file: true}) are decoded in chunks
+    into attachments_dir as <file stem>_<field_id>_<n>_<name>; their value keeps the metadata
+    (name, type, size, lastModified, _is_file) and gets 'path', 'data_size' and 'sha256'
+    instead of 'data'. An existing attachment file is never overwritten (FileExistsError).
+    Without attachments_dir the payload is only measured and hashed, not stored.
+    """
+    if attachments_dir is not None:
+        os.makedirs(attachments_dir, exist_ok=True)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = _Stream(f, chunk_size)
+        parser = _Parser(stream, attachments_dir, _safe_name(os.path.splitext(os.path.basename(path))[0]))
+
+        stream.expect('{')
+        if stream.peek() == '}':
+            return
+        while True:
+            field_id = stream.read_string()
+            stream.expect(':')
+            yield field_id, parser.parse_value(field_id)
+            c = stream.peek()
+            stream.pos += 1
+            if c == '}':
+                return
+            if c != ',':
+                raise SubmissionFormatError(f"Expected ',' or '}}', got {c!r}")
+
+
+def read_submission(path, attachments_dir=None, chunk_size=CHUNK_SIZE):
+    """
+    Same as iter_submission, collected into a dict.
+    """
+    return dict(iter_submission(path, attachments_dir, chunk_size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read a submission, extracting attachments to disk in chunks.")
+    parser.add_argument("file", help="Submission JSON file")
+    parser.add_argument("--attachments", help="Directory for decoded attachments (default: not stored)")
+    args = parser.parse_args()
+
+    try:
+        data = read_submission(args.file, args.attachments)
+    except (OSError, SubmissionFormatError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    json.dump(data, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+
+
+if __name__ == "__main__":
+    main()
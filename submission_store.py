@@ -0,0 +1,423 @@
+import argparse
+import base64
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from attachment_store import AttachmentStore, is_reference
+from submission_reader import read_submission
+from validate_submissions import FORM_FILE, ENUMS_FILE, NUMBER_RE, STREAMING_THRESHOLD, find_submissions, load_validator
+
+STORE_FILE = 'submissions.sqlite'
+STORE_VERSION = 1
+
+# Attachments are copied into the store in pieces of this size
+BLOB_CHUNK = 1 << 20
+
+# Rows written per transaction
+BATCH_SIZE = 500
+
+
+# --- Schema ---
+
+def column_types(fields):
+    """
+    Storage of every form field: {field_id: (sql type, codelist or None)}.
+    Codelist fields are dictionary encoded (INTEGER code into the codes table),
+    numbers (dat_typ N) are INTEGER, the rest TEXT. File fields are stored out of
+    line in the attachments table and get no column.
+    """
+    columns = {}
+    for field_id, spec in fields.items():
+        if spec['widget'] == 'file':
+            continue
+        if spec['options'] is not None:
+            columns[field_id] = ('INTEGER', spec['ciselnik'])
+        elif spec['dat_typ'] and spec['dat_typ'][1] is NUMBER_RE:
+            columns[field_id] = ('INTEGER', None)
+        else:
+            columns[field_id] = ('TEXT', None)
+    return columns
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def open_store(path, columns, enums):
+    """
+    Opens (or creates) the store and adds the columns of new form fields.
+    """
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version not in (0, STORE_VERSION):
+        raise ValueError(f"{path}: unsupported store version {version}")
+
+    with conn:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL UNIQUE,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                ingested TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS submissions (
+                id INTEGER PRIMARY KEY REFERENCES files(id) ON DELETE CASCADE
+            );
+            CREATE TABLE IF NOT EXISTS columns (
+                field_id TEXT PRIMARY KEY,
+                sql_type TEXT NOT NULL,
+                ciselnik TEXT
+            );
+            CREATE TABLE IF NOT EXISTS codes (
+                id INTEGER PRIMARY KEY,
+                ciselnik TEXT NOT NULL,
+                value TEXT NOT NULL,
+                UNIQUE (ciselnik, value)
+            );
+            CREATE TABLE IF NOT EXISTS attachments (
+                submission_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+                field_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                name TEXT,
+                type TEXT,
+                size INTEGER,
+                last_modified INTEGER,
+                sha256 TEXT,
+                data BLOB,
+                PRIMARY KEY (submission_id, field_id, position)
+            );
+            -- Values of keys that are not form fields, so nothing submitted is lost
+            CREATE TABLE IF NOT EXISTS extra (
+                submission_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+                field_id TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (submission_id, field_id)
+            );
+        """)
+        conn.execute(f"PRAGMA user_version = {STORE_VERSION}")
+
+        known = {row[1] for row in conn.execute("PRAGMA table_info(submissions)")}
+        added = [field_id for field_id in columns if field_id not in known]
+        for field_id in added:
+            sql_type, ciselnik = columns[field_id]
+            conn.execute(f"ALTER TABLE submissions ADD COLUMN {quote(field_id)} {sql_type}")
+            conn.execute("INSERT OR REPLACE INTO columns VALUES (?, ?, ?)", (field_id, sql_type, ciselnik))
+
+        # Codelist values get their codes in codelist order
+        conn.executemany("INSERT OR IGNORE INTO codes (ciselnik, value) VALUES (?, ?)",
+                         [(key, option['value']) for key, options in enums.items() for option in options])
+        if added or not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'submissions_decoded'").fetchone():
+            create_decoded_view(conn)
+    # Transactions are managed explicitly by the caller
+    conn.isolation_level = None
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+def create_decoded_view(conn):
+    # submissions with the codes replaced by codelist values
+    select = ["f.source AS source"]
+    for field_id, sql_type, ciselnik in conn.execute("SELECT field_id, sql_type, ciselnik FROM columns ORDER BY field_id"):
+        column = quote(field_id)
+        if ciselnik:
+            select.append(f"(SELECT value FROM codes WHERE id = s.{column}) AS {column}")
+        else:
+            select.append(f"s.{column} AS {column}")
+    conn.execute("DROP VIEW IF EXISTS submissions_decoded")
+    conn.execute(f"CREATE VIEW submissions_decoded AS SELECT {', '.join(select)} "
+                 f"FROM submissions s JOIN files f ON f.id = s.id")
+
+
+# --- Reading submissions (worker side) ---
+
+_worker_tmp = None
+
+
+def init_worker(tmp):
+    global _worker_tmp
+    _worker_tmp = tmp
+
+
+def decode_data_url(url):
+    _, _, payload = url.partition(',')
+    return base64.b64decode(payload)
+
+
+def read_file(task):
+    """
+    Reads one submission. Returns (path, stat, data, attachments, error); attachment
+    payloads are bytes, a temporary file path for large submissions, or None for
+    references into an attachment store (see attachment_store.py).
+    """
+    path, size, mtime_ns = task
+    attachments = []
+    try:
+        if size > STREAMING_THRESHOLD:
+            # Attachments are decoded to disk chunk-wise, not held in memory
+            data = read_submission(path, tempfile.mkdtemp(dir=_worker_tmp))
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("Top level value is not an object")
+    except (OSError, ValueError) as e:
+        return path, (size, mtime_ns), None, None, str(e)
+
+    for field_id, value in list(data.items()):
+        items = value if isinstance(value, list) else [value]
+        if not items or not all(isinstance(item, dict) and item.get('_is_file') for item in items):
+            continue
+        for position, item in enumerate(items):
+            if 'path' in item:
+                payload = item['path']
+            elif is_reference(item):
+                payload = None
+            else:
+                payload = decode_data_url(item.get('data') or '')
+                item['sha256'] = hashlib.sha256(payload).hexdigest()
+            attachments.append((field_id, position, item, payload))
+        del data[field_id]
+    return path, (size, mtime_ns), data, attachments, None
+
+
+# --- Ingestion ---
+
+class Ingest:
+    """
+    Writes parsed submissions into an open store.
+    """
+
+    def __init__(self, conn, columns, attachments=None):
+        self.conn = conn
+        self.columns = columns
+        # AttachmentStore for the payloads; without it they are kept in the attachments table
+        self.attachments = attachments
+        self.order = list(columns)
+        self.codes = {}
+        for code, ciselnik, value in conn.execute("SELECT id, ciselnik, value FROM codes"):
+            self.codes[ciselnik, value] = code
+        placeholders = ', '.join('?' for _ in range(len(self.order) + 1))
+        self.insert_sql = (f"INSERT INTO submissions (id, {', '.join(quote(c) for c in self.order)}) "
+                           f"VALUES ({placeholders})")
+
+    def code(self, ciselnik, value):
+        key = (ciselnik, value)
+        code = self.codes.get(key)
+        if code is None:
+            # Value outside the codelist (invalid submission): kept, with a new code
+            code = self.conn.execute("INSERT INTO codes (ciselnik, value) VALUES (?, ?)", key).lastrowid
+            self.codes[key] = code
+        return code
+
+    def encode(self, field_id, value):
+        sql_type, ciselnik = self.columns[field_id]
+        if not isinstance(value, str):
+            return None
+        if ciselnik:
+            return self.code(ciselnik, value)
+        if sql_type == 'INTEGER':
+            # Values that are not plain numbers go to the extra table (INTEGER affinity would alter '012')
+            return int(value) if NUMBER_RE.match(value) and len(value) <= 18 else None
+        return value
+
+    def add(self, path, stat, data, attachments):
+        conn = self.conn
+        conn.execute("DELETE FROM files WHERE source = ?", (path,))
+        file_id = conn.execute("INSERT INTO files (source, size, mtime_ns, ingested) VALUES (?, ?, ?, ?)",
+                               (path, stat[0], stat[1], datetime.datetime.now().isoformat(timespec='seconds'))).lastrowid
+
+        row = [file_id]
+        extra = []
+        for field_id in self.order:
+            value = data.get(field_id)
+            encoded = None if value is None else self.encode(field_id, value)
+            if encoded is None and value is not None:
+                extra.append((file_id, field_id, json.dumps(value, ensure_ascii=False)))
+            row.append(encoded)
+        conn.execute(self.insert_sql, row)
+        extra.extend((file_id, k, json.dumps(v, ensure_ascii=False)) for k, v in data.items() if k not in self.columns)
+        if extra:
+            conn.executemany("INSERT INTO extra VALUES (?, ?, ?)", extra)
+
+        for field_id, position, item, payload in attachments:
+            self.add_attachment(file_id, field_id, position, item, payload)
+
+    def add_attachment(self, file_id, field_id, position, item, payload):
+        row = (file_id, field_id, position, item.get('name'), item.get('type'), item.get('size'),
+               item.get('lastModified'), item.get('sha256'))
+        if payload is not None and self.attachments is not None:
+            if isinstance(payload, bytes):
+                self.attachments.put_bytes(payload)
+            else:
+                self.attachments.put_file(payload, item['sha256'])
+            payload = None
+        if payload is None:
+            # Only the reference (sha256) is kept
+            self.conn.execute("INSERT INTO attachments VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL)", row)
+            return
+
+        size = len(payload) if isinstance(payload, bytes) else os.path.getsize(payload)
+        rowid = self.conn.execute(
+            "INSERT INTO attachments VALUES (?, ?, ?, ?, ?, ?, ?, ?, zeroblob(?))", row + (size,)).lastrowid
+        with self.conn.blobopen('attachments', 'data', rowid) as blob:
+            if isinstance(payload, bytes):
+                blob.write(payload)
+                return
+            with open(payload, 'rb') as f:
+                while chunk := f.read(BLOB_CHUNK):
+                    blob.write(chunk)
+            os.remove(payload)
+
+
+def pending_files(conn, files):
+    """
+    Returns the (path, size, mtime_ns) of the files that are new or changed since the last run.
+    """
+    known = {source: (size, mtime_ns) for source, size, mtime_ns in
+             conn.execute("SELECT source, size, mtime_ns FROM files")}
+    tasks = []
+    for path in files:
+        st = os.stat(path)
+        if known.get(path) != (st.st_size, st.st_mtime_ns):
+            tasks.append((path, st.st_size, st.st_mtime_ns))
+    return tasks
+
+
+def ingest(store, files, form_file=FORM_FILE, enums_file=ENUMS_FILE, jobs=None, attachments_dir=None):
+    """
+    Loads new and changed submission files into the store. With attachments_dir the
+    payloads go to that content-addressed attachment store instead of the database.
+    Returns (ingested, unchanged, failed [(path, error)]).
+    """
+    fields = load_validator(form_file, enums_file, show_new_only=True)
+    with open(enums_file, 'r', encoding='utf-8') as f:
+        enums = json.load(f)
+    columns = column_types(fields)
+
+    conn = open_store(store, columns, enums)
+    writer = Ingest(conn, columns, AttachmentStore(attachments_dir) if attachments_dir else None)
+    # Sources are stored as given relative to the current directory
+    files = [os.path.relpath(path) for path in files]
+    tasks = pending_files(conn, files)
+    failed = []
+    tmp = tempfile.mkdtemp(prefix='submission_store.')
+
+    def write(results):
+        count = 0
+        conn.execute("BEGIN")
+        for path, stat, data, attachments, error in results:
+            if error is not None:
+                failed.append((path, error))
+                continue
+            writer.add(path, stat, data, attachments)
+            count += 1
+            if count % BATCH_SIZE == 0:
+                conn.execute("COMMIT")
+                conn.execute("BEGIN")
+        conn.execute("COMMIT")
+
+    try:
+        if jobs == 1 or len(tasks) < 2:
+            init_worker(tmp)
+            write(map(read_file, tasks))
+        else:
+            # Workers parse, the main process is the only writer
+            chunksize = max(1, min(64, len(tasks) // 32 or 1))
+            with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1,
+                                     initializer=init_worker, initargs=(tmp,)) as pool:
+                write(pool.map(read_file, tasks, chunksize=chunksize))
+    finally:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        shutil.rmtree(tmp, ignore_errors=True)
+        conn.close()
+
+    return len(tasks) - len(failed), len(files) - len(tasks), failed
+
+
+# --- Reading back ---
+
+def iter_records(conn):
+    """
+    Yields (source, data) with the submissions as they were submitted; attachments
+    come as lists of metadata (name, type, size, lastModified, sha256, _is_file).
+    """
+    columns = [row[0] for row in conn.execute("SELECT field_id FROM columns ORDER BY field_id")]
+    extra, files = {}, {}
+    for submission_id, field_id, value in conn.execute("SELECT submission_id, field_id, value FROM extra"):
+        extra.setdefault(submission_id, {})[field_id] = json.loads(value)
+    for row in conn.execute("SELECT submission_id, field_id, position, name, type, size, last_modified, sha256 "
+                            "FROM attachments ORDER BY submission_id, field_id, position"):
+        items = files.setdefault(row[0], {}).setdefault(row[1], [])
+        items.append({'name': row[3], 'type': row[4], 'size': row[5], 'lastModified': row[6],
+                      'sha256': row[7], '_is_file': True})
+
+    select = ', '.join(quote(c) for c in columns)
+    query = f"SELECT f.id, source, {select} FROM submissions_decoded d JOIN files f USING (source) ORDER BY f.id"
+    for row in conn.execute(query):
+        data = {field_id: value if not isinstance(value, int) else str(value)
+                for field_id, value in zip(columns, row[2:]) if value is not None}
+        data.update(extra.get(row[0], {}))
+        data.update(files.get(row[0], {}))
+        yield row[1], data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load submitted questionnaires into a columnar SQLite store "
+                                                 "(one column per form field ID) and query it.")
+    parser.add_argument("paths", nargs='*', help="Submission files or directories to ingest")
+    parser.add_argument("--store", default=STORE_FILE, help=f"SQLite store (default: {STORE_FILE})")
+    parser.add_argument("--form", default=FORM_FILE, help=f"Form structure JSON (default: {FORM_FILE})")
+    parser.add_argument("--enums", default=ENUMS_FILE, help=f"Enums JSON (default: {ENUMS_FILE})")
+    parser.add_argument("--attachments", help="Keep attachment payloads in this content-addressed store "
+                                              "(see attachment_store.py) instead of the database")
+    parser.add_argument("--pattern", default='*.json', help="File pattern inside directories (default: *.json)")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes reading files (default: CPU count)")
+    parser.add_argument("--sql", help='Query to run, e.g. SELECT "10067", COUNT(*) FROM submissions_decoded GROUP BY 1')
+    args = parser.parse_args()
+
+    if args.paths:
+        files = find_submissions(args.paths, args.pattern)
+        start = time.perf_counter()
+        try:
+            ingested, unchanged, failed = ingest(args.store, files, args.form, args.enums, jobs=args.jobs,
+                                               attachments_dir=args.attachments)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(2)
+        elapsed = time.perf_counter() - start
+        print(f"Ingested {ingested} files ({unchanged} unchanged, {len(failed)} failed) into {args.store} "
+              f"in {elapsed:.2f} s", file=sys.stderr)
+        for path, error in failed:
+            print(f"  {path}: {error}", file=sys.stderr)
+
+    if args.sql:
+        conn = sqlite3.connect(args.store)
+        try:
+            cursor = conn.execute(args.sql)
+            print('\t'.join(d[0] for d in cursor.description or ()))
+            for row in cursor:
+                print('\t'.join('' if v is None else str(v) for v in row))
+        except sqlite3.Error as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(2)
+        finally:
+            conn.close()
+
+    if not args.paths and not args.sql:
+        parser.error("nothing to do: give submission paths and/or --sql")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from compare_jsons import structural_diff
+
+# (label, first, second, expected [(op, path)] in report order)
+CASES = [
+    ("identical, key order ignored",
+     {"a": 1, "b": [1, 2]}, {"b": [1, 2], "a": 1}, []),
+    ("changed value and type",
+     {"a": 1, "b": "1"}, {"a": 2, "b": 1},
+     [("changed", "root.a"), ("changed", "root.b")]),
+    ("added and removed keys",
+     {"a": 1}, {"b": 1},
+     [("removed", "root.a"), ("added", "root.b")]),
+    ("items aligned by id",
+     [{"id": 1, "v": "a"}, {"id": 2, "v": "b"}], [{"id": 2, "v": "b"}, {"id": 1, "v": "c"}],
+     [("moved", "root[1]"), ("changed", "root[1].v")]),
+    ("id duplicated in the first list only",
+     [{"id": 1, "v": "a"}, {"id": 1, "v": "b"}], [{"id": 1, "v": "a"}],
+     [("removed", "root[1]")]),
+    ("id duplicated in the second list only",
+     [{"id": 1, "v": "a"}], [{"id": 1, "v": "b"}, {"id": 1, "v": "a"}],
+     [("added", "root[0]")]),
+    ("items without identity",
+     [1, 2, 3], [1, 3, 4],
+     [("removed", "root[1]"), ("added", "root[2]")]),
+]
+
+
+def main():
+    failures = 0
+    for label, first, second, expected in CASES:
+        result = [(d['op'], d['path']) for d in structural_diff(first, second)]
+        if result != expected:
+            failures += 1
+            print(f"{label}: {result} != {expected}")
+
+    if failures:
+        print(f"{failures} failures")
+        sys.exit(1)
+    print("Structural diff cases pass.")
+
+
+if __name__ == "__main__":
+    main()
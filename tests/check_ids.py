@@ -1,7 +1,13 @@
 import json
+import os
 import sys
 
-def check_json(file_path):
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lint_schema import Linter, Rule
+
+
+def check_json(file_path, verbose=False):
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
@@ -9,81 +15,28 @@ def check_json(file_path):
         print(f"Error reading file: {e}")
         return
 
-    ids = {}
-    missing_id_nodes = []
-    
-    # Widget types to ignore for ID check
-    IGNORED_WIDGETS = {'markdown', 'separator'}
-    
-    valid_nodes = []
-
-    def traverse(node, path=""):
-        if isinstance(node, dict):
-            # Check for skip logic
-            if node.get('skip') is True:
-                return
-
-            # Check for ID logic
-            has_id = 'id' in node and str(node['id']).strip() != ""
-            
-            # Check if leaf node (no children or children list is empty)
-            is_leaf = True
-            if 'children' in node and isinstance(node['children'], list) and len(node['children']) > 0:
-                is_leaf = False
-            
-            if is_leaf:
-                if not has_id:
-                    widget_type = node.get("widget", "").lower()
-                    # Check if we should ignore this widget type
-                    if widget_type not in IGNORED_WIDGETS and "separator" not in widget_type:
-                         missing_id_nodes.append({
-                            "path": path,
-                            "key": node.get("key", "N/A"),
-                            "description": node.get("description", "N/A"),
-                            "widget": widget_type
-                        })
-                else:
-                    valid_nodes.append({
-                        "path": path,
-                        "id": node['id'],
-                        "label": node.get('description') or node.get('label') or node.get('key', 'N/A')
-                    })
-
-            if has_id:
-                node_id = str(node['id'])
-                if node_id in ids:
-                    ids[node_id].append(path)
-                else:
-                    ids[node_id] = [path]
-            
-            # Continue traversal
-            for key, value in node.items():
-                if key == 'children':
-                    new_path = f"{path}.children" if path else "children"
-                    traverse(value, new_path)
-        elif isinstance(node, list):
-            for i, item in enumerate(node):
-                new_path = f"{path}[{i}]"
-                traverse(item, new_path)
-
-    traverse(data)
-    
-    # Report Valid Leaves
-    print(f"INFO: Found {len(valid_nodes)} valid leaf nodes with IDs:")
-    for v in valid_nodes:
-        print(f"  {v['id']}: {v['label']}")
-    print("-" * 20)
-    
-    # Report Duplicates
-    duplicates = {k: v for k, v in ids.items() if len(v) > 1}
-    
+    # ID checks only; codelists are checked by lint_schema.py
+    linter = Linter({}, rules=['duplicate-id', 'leaf-without-id'])
+    linter.lint(data)
+    duplicates = [i for i in linter.issues if i['rule'] == 'duplicate-id']
+    missing_id_nodes = [i for i in linter.issues if i['rule'] == 'leaf-without-id']
+
+    # Report Valid Leaves (only on request, the list is long)
+    if verbose:
+        valid_nodes = collect_valid_leaves(data)
+        print(f"INFO: Found {len(valid_nodes)} valid leaf nodes with IDs:")
+        for v in valid_nodes:
+            print(f"  {v['id']}: {v['label']}")
+        print("-" * 20)
+
     errors_found = False
-    
+
+    # Report Duplicates
     if duplicates:
         print(f"FAIL: Found {len(duplicates)} duplicate IDs:")
-        for doc_id, paths in duplicates.items():
-            print(f"  ID '{doc_id}' found at:")
-            for p in paths:
+        for issue in duplicates:
+            print(f"  ID '{issue['id']}' found at:")
+            for p in issue['paths']:
                 print(f"    - {p}")
         print("-" * 20)
         errors_found = True
@@ -93,21 +46,46 @@ def check_json(file_path):
     # Report Missing IDs on Leaves
     if missing_id_nodes:
         print(f"FAIL: Found {len(missing_id_nodes)} leaf nodes without an ID (excluding ignored widgets):")
-        for node in missing_id_nodes:
-            print(f"  Path: {node['path']}")
-            print(f"    Key: {node['key']}")
-            print(f"    Desc: {node['description']}")
-            print(f"    Widget: {node['widget']}")
+        for issue in missing_id_nodes:
+            print(f"  Path: {issue['path']}")
+            print(f"    Key: {issue['key'] or 'N/A'}")
+            print(f"    Desc: {issue['description'] or 'N/A'}")
+            print(f"    Widget: {issue['widget']}")
             print("-" * 10)
         errors_found = True
     else:
         print("PASS: All non-skipped leaf nodes have IDs.")
 
     if not errors_found:
-       print("SUCCESS: JSON structure validation passed.")
+        print("SUCCESS: JSON structure validation passed.")
+    return not errors_found
+
+
+class ValidLeaves(Rule):
+    code = 'valid-leaves'
+
+    def __init__(self, linter):
+        super().__init__(linter)
+        self.found = []
+
+    def visit(self, node):
+        if node.is_leaf and node.id:
+            d = node.data
+            self.found.append({'path': node.path, 'id': d['id'],
+                               'label': d.get('description') or d.get('label') or d.get('key', 'N/A')})
+
+
+def collect_valid_leaves(data):
+    linter = Linter({}, rules=[])
+    collector = ValidLeaves(linter)
+    linter.rules.append(collector)
+    linter.lint(data)
+    return collector.found
+
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python check_ids.py <file_path>")
+    args = [a for a in sys.argv[1:] if a not in ('-v', '--verbose')]
+    if not args:
+        print("Usage: python check_ids.py <file_path> [--verbose]")
     else:
-        check_json(sys.argv[1])
+        sys.exit(0 if check_json(args[0], verbose=len(args) < len(sys.argv) - 1) else 1)
@@ -0,0 +1,66 @@
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from submission_reader import SubmissionFormatError, read_submission
+
+# Small chunks put escapes and surrogate pairs across chunk boundaries
+CHUNK_SIZES = [1, 2, 3, 5, 6, 7, 11, 12, 13, 64]
+
+SAMPLES = [
+    {"10053": "Jiří 😀 Nový", "10054": "Ťuk\t\"uvozovky\"\\ \n řádek", "10061": None, "10062": 12.5},
+    {"10053": "𝄞 hudba 🇨🇿", "999101": [{"a": "b"}, "é "], "10090": True},
+    {"10053": "\ud83d osamělá polovina", "10054": "\ude00 druhá"},
+]
+
+# Inputs cut inside a string escape must fail as a format error, not an IndexError
+TRUNCATED = ['{"10053": "abc\\', '{"10053": "abc\\u00', '{"10053": "\\ud83d\\ude0']
+
+
+def read_text(text, chunk_size):
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.json', delete=False) as f:
+        f.write(text)
+    try:
+        return read_submission(f.name, chunk_size=chunk_size)
+    finally:
+        os.remove(f.name)
+
+
+def main():
+    failures = 0
+    for sample in SAMPLES:
+        for ensure_ascii in (True, False):
+            text = json.dumps(sample, ensure_ascii=ensure_ascii, indent=2)
+            if not ensure_ascii and any('\ud800' <= c <= '\udfff' for c in text):
+                # Lone surrogates can only be written escaped
+                continue
+            expected = json.loads(text)
+            for chunk_size in CHUNK_SIZES:
+                result = read_text(text, chunk_size)
+                if result != expected:
+                    failures += 1
+                    print(f"Mismatch (ensure_ascii={ensure_ascii}, chunk {chunk_size}): {result!r} != {expected!r}")
+
+    for text in TRUNCATED:
+        for chunk_size in CHUNK_SIZES:
+            try:
+                read_text(text, chunk_size)
+            except SubmissionFormatError:
+                continue
+            except Exception as e:
+                print(f"{text!r} (chunk {chunk_size}): {e!r} instead of SubmissionFormatError")
+            else:
+                print(f"{text!r} (chunk {chunk_size}): no error")
+            failures += 1
+
+    if failures:
+        print(f"{failures} failures")
+        sys.exit(1)
+    print("Submission reader matches json.load.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 import json
 import sys
 import argparse
+import difflib
+import hashlib
+from bisect import bisect_left
 
 def deep_compare(obj1, obj2, path="root"):
     """
@@ -43,28 +46,290 @@ def deep_compare(obj1, obj2, path="root"):
 
     return None
 
+# --- Structural diff ---
+
+# Scalar type tags: keep 1, 1.0, true and "1" apart
+SCALAR_TAGS = {str: 's', int: 'i', float: 'f', bool: 'b', type(None): 'n'}
+
+
+class SubtreeHashes:
+    """
+    Merkle-style digests of dicts/lists, computed on demand and memoized by id() of the object.
+    Dict digests ignore key order, list digests keep the item order.
+    Computed iteratively (post-order), so deep trees are fine.
+    """
+
+    def __init__(self):
+        self.hashes = {}
+
+    def digest(self, value):
+        if not isinstance(value, (dict, list)):
+            # Scalars are their own digest (repr escapes the separators)
+            return SCALAR_TAGS.get(type(value), 'o') + repr(value)
+
+        hashes = self.hashes
+        stack = [(value, False)]
+        while stack:
+            obj, expanded = stack.pop()
+            if id(obj) in hashes:
+                continue
+            children = obj.values() if isinstance(obj, dict) else obj
+            if not expanded:
+                stack.append((obj, True))
+                stack.extend((c, False) for c in children if isinstance(c, (dict, list)))
+                continue
+            if isinstance(obj, dict):
+                text = '{' + ','.join(f"{k!r}:{self.digest_of(obj[k])}" for k in sorted(obj))
+            else:
+                text = '[' + ','.join(self.digest_of(item) for item in obj)
+            hashes[id(obj)] = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+        return hashes[id(value)]
+
+    def digest_of(self, value):
+        # Children are already hashed during the post-order walk
+        if isinstance(value, (dict, list)):
+            return self.hashes[id(value)]
+        return SCALAR_TAGS.get(type(value), 'o') + repr(value)
+
+
+def same(a, b):
+    """
+    Strict equality: the C-level comparison skips equal branches at once, repr() keeps
+    true/1/1.0 apart. Dicts equal up to key order fall through and are compared per key.
+    """
+    return a is b or (type(a) is type(b) and a == b and (not isinstance(a, (dict, list)) or repr(a) == repr(b)))
+
+
+def identity(item):
+    # Schema nodes are aligned by 'id', otherwise by 'key'
+    if isinstance(item, dict):
+        if item.get('id') not in (None, ''):
+            return ('id', str(item['id']))
+        if item.get('key') not in (None, ''):
+            return ('key', str(item['key']))
+    return None
+
+
+def unique_identities(list1, list2):
+    """
+    Identities of the items of both lists, None where an item cannot be aligned by it:
+    an id/key counts only if it occurs at most once in each list.
+    """
+    idents1 = [identity(item) for item in list1]
+    idents2 = [identity(item) for item in list2]
+    counts1, counts2 = {}, {}
+    for ident in idents1:
+        counts1[ident] = counts1.get(ident, 0) + 1
+    for ident in idents2:
+        counts2[ident] = counts2.get(ident, 0) + 1
+
+    # Duplicated on either side: left to the digest matching
+    def unique(ident):
+        return ident is not None and counts1.get(ident, 0) <= 1 and counts2.get(ident, 0) <= 1
+
+    return ([ident if unique(ident) else None for ident in idents1],
+            [ident if unique(ident) else None for ident in idents2])
+
+
+def stable_positions(sequence):
+    """
+    Indices of the longest increasing subsequence of `sequence`;
+    matched items outside of it are the ones that moved.
+    """
+    tails, tails_idx, prev = [], [], [None] * len(sequence)
+    for i, value in enumerate(sequence):
+        pos = bisect_left(tails, value)
+        if pos == len(tails):
+            tails.append(value)
+            tails_idx.append(i)
+        else:
+            tails[pos] = value
+            tails_idx[pos] = i
+        prev[i] = tails_idx[pos - 1] if pos else None
+    result = set()
+    i = tails_idx[-1] if tails_idx else None
+    while i is not None:
+        result.add(i)
+        i = prev[i]
+    return result
+
+
+def align_lists(list1, list2, hashes1, hashes2):
+    """
+    Pairs the items of two lists. Returns (pairs, removed, added, moved) as index lists,
+    pairs being (i1, i2). Items whose id/key is unique in both lists are matched by it,
+    the rest by sequence matching of their subtree digests.
+    """
+    ids1, ids2 = unique_identities(list1, list2)
+    index2 = {ident: i for i, ident in enumerate(ids2) if ident is not None}
+
+    pairs, removed = [], []
+    matched2 = set()
+    rest1 = []
+    for i, ident in enumerate(ids1):
+        if ident is None:
+            rest1.append(i)
+        elif ident in index2:
+            pairs.append((i, index2[ident]))
+            matched2.add(index2[ident])
+        else:
+            removed.append(i)
+    rest2 = [j for j, ident in enumerate(ids2) if ident is None]
+    added = [j for j, ident in enumerate(ids2) if ident is not None and j not in matched2]
+
+    stable = stable_positions([j for _, j in pairs])
+    moved = [pairs[k] for k in range(len(pairs)) if k not in stable]
+
+    # Items without identity: equal runs are kept, replaced runs compared pairwise
+    if len(rest1) == 1 and len(rest2) == 1:
+        opcodes = [('replace', 0, 1, 0, 1)]
+    elif rest1 and rest2:
+        matcher = difflib.SequenceMatcher(None, [hashes1.digest(list1[i]) for i in rest1],
+                                          [hashes2.digest(list2[j]) for j in rest2], autojunk=False)
+        opcodes = matcher.get_opcodes()
+    else:
+        opcodes = [('delete', 0, len(rest1), 0, 0), ('insert', len(rest1), len(rest1), 0, len(rest2))]
+    for tag, a1, a2, b1, b2 in opcodes:
+        if tag == 'equal' or tag == 'replace':
+            common = min(a2 - a1, b2 - b1)
+            pairs.extend((rest1[a1 + k], rest2[b1 + k]) for k in range(common))
+            removed.extend(rest1[a1 + common:a2])
+            added.extend(rest2[b1 + common:b2])
+        elif tag == 'delete':
+            removed.extend(rest1[a1:a2])
+        elif tag == 'insert':
+            added.extend(rest2[b1:b2])
+
+    return pairs, removed, added, moved
+
+
+# Levels skipped by the C comparison after it ran out of recursion depth
+RECURSION_BACKOFF = 200
+
+
+def render_path(node):
+    # Paths are kept as (parent, segment) chains and joined only when reported
+    parts = []
+    while node is not None:
+        node, segment = node
+        parts.append(segment)
+    return ''.join(reversed(parts))
+
+
+def structural_diff(obj1, obj2, path="root"):
+    """
+    Reports every difference between two JSON trees in one run, ignoring key order.
+    Returns a list of {'op': added|removed|changed|moved, 'path', ...} dicts.
+    Equal subtrees are skipped without descending, list items are aligned by id/key
+    (or by subtree digest). Paths use the positions in the second file, except for
+    removed items, which keep their index in the first one.
+    """
+    hashes1, hashes2 = SubtreeHashes(), SubtreeHashes()
+    diffs = []
+
+    def report(op, parent, segment, **details):
+        diffs.append({'op': op, 'path': render_path((parent, segment)), **details})
+
+    # (value 1, value 2, path node, depth, depth from which the fast comparison is tried)
+    stack = [(obj1, obj2, (None, path), 0, 0)]
+    while stack:
+        a, b, p, depth, fast_from = stack.pop()
+        if depth >= fast_from:
+            try:
+                if same(a, b):
+                    continue
+            except RecursionError:
+                # Too deep for the C comparison: compared level by level for a while
+                fast_from = depth + RECURSION_BACKOFF
+        if type(a) != type(b):
+            diffs.append({'op': 'changed', 'path': render_path(p), 'old': a, 'new': b,
+                          'reason': f"type {type(a).__name__} vs {type(b).__name__}"})
+            continue
+        if not isinstance(a, (dict, list)):
+            if a != b:
+                diffs.append({'op': 'changed', 'path': render_path(p), 'old': a, 'new': b})
+            continue
+
+        pending = []
+        if isinstance(a, dict):
+            for k in a:
+                if k not in b:
+                    report('removed', p, f".{k}", old=a[k])
+                else:
+                    pending.append((a[k], b[k], (p, f".{k}")))
+            for k in b:
+                if k not in a:
+                    report('added', p, f".{k}", new=b[k])
+        else:
+            pairs, removed, added, moved = align_lists(a, b, hashes1, hashes2)
+            for i in removed:
+                report('removed', p, f"[{i}]", old=a[i])
+            for j in added:
+                report('added', p, f"[{j}]", new=b[j])
+            for i, j in moved:
+                report('moved', p, f"[{j}]", **{'from': render_path((p, f"[{i}]")),
+                                                 'identity': '='.join(identity(a[i]))})
+            pending.extend((a[i], b[j], (p, f"[{j}]")) for i, j in pairs)
+
+        stack.extend((x, y, q, depth + 1, fast_from) for x, y, q in reversed(pending))
+
+    return diffs
+
+
+def format_diff(d):
+    def short(value):
+        text = json.dumps(value, ensure_ascii=False)
+        return text if len(text) <= 80 else text[:77] + '...'
+
+    if d['op'] == 'changed':
+        reason = f" ({d['reason']})" if 'reason' in d else ""
+        return f"~ {d['path']}: {short(d['old'])} -> {short(d['new'])}{reason}"
+    if d['op'] == 'removed':
+        return f"- {d['path']}: {short(d['old'])}"
+    if d['op'] == 'added':
+        return f"+ {d['path']}: {short(d['new'])}"
+    return f"> {d['path']}: moved from {d['from']} ({d['identity']})"
+
+
 def main():
-    parser = argparse.ArgumentParser(description="Compare two JSON files recursively, ignoring key order.")
+    parser = argparse.ArgumentParser(description="Compare two JSON files structurally, ignoring key order.")
     parser.add_argument("file1", help="First JSON file path")
     parser.add_argument("file2", help="Second JSON file path")
-    
+    parser.add_argument("--json", action="store_true", help="Print the differences as JSON")
+    parser.add_argument("--first", action="store_true", help="Stop at the first difference (positional lists)")
+
     args = parser.parse_args()
-    
+
     try:
         with open(args.file1, 'r', encoding='utf-8') as f1:
             data1 = json.load(f1)
         with open(args.file2, 'r', encoding='utf-8') as f2:
             data2 = json.load(f2)
-            
-        diff = deep_compare(data1, data2)
-        
-        if diff is None:
+
+        if args.first:
+            diff = deep_compare(data1, data2)
+            diffs = [] if diff is None else [diff]
+        else:
+            diffs = structural_diff(data1, data2)
+
+        if args.json:
+            json.dump(diffs, sys.stdout, indent=2, ensure_ascii=False)
+            print()
+        elif not diffs:
             print("OK: Files are identical (recursively).")
         else:
-            print("FAIL: Files differ.")
-            print(diff)
+            counts = {}
+            for d in diffs:
+                if isinstance(d, dict):
+                    counts[d['op']] = counts.get(d['op'], 0) + 1
+            summary = ", ".join(f"{n} {op}" for op, n in sorted(counts.items()))
+            print(f"FAIL: Files differ{': ' + summary if summary else ''}.")
+            for d in diffs:
+                print(format_diff(d) if isinstance(d, dict) else d)
+
+        if diffs:
             sys.exit(1)
-            
+
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(2)
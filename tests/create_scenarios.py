@@ -1,6 +1,55 @@
+"""
+Generates tests/test_scenarios.json for the Playwright form tests (regzec_form.spec.js).
+
+- Three fixed scenarios: non_default, explicit_default and implicit_default.
+- Pairwise scenarios: every pair of values of two codelist (ciselnik) or defaulted
+  fields occurs together in at least one scenario. Large codelists are split into
+  equivalence classes; pairs are covered per class, and the values of a class are
+  taken in turn, so the scenarios also go through the codelists themselves.
+- With --shards N, also shards/shard_<k>.json: the scenarios split into N files of
+  about the same estimated run time (run one with SCENARIO_SHARD=<file>).
+"""
+
+import argparse
+import glob
+import heapq
 import json
-import random
-import datetime
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from build_form_bundle import build_metadata
+
+FORM_FILE = '../docs/regzec_form.json'
+ENUMS_FILE = '../docs/regzec_enums.json'
+OUTPUT_FILE = 'test_scenarios.json'
+SHARD_DIR = 'shards'
+
+# The spec fills new_regzec_form.html, which shows the new_only fields
+SPEC_SHOWS_NEW_ONLY = True
+
+# Estimated seconds of runTestFlow in regzec_form.spec.js
+FLOW_COST = 8.0     # two page loads, three fixed 1 s waits, two saves and the import
+TAB_COST = 1.1      # tab click and waitForTimeout(1000)
+FIELD_COST = 0.01   # field-name lookup of every visible field of the tab
+FILL_COST = 0.03    # file-upload probe and value evaluate of a filled field
+UPLOAD_COST = 0.25  # setInputFiles of a file field
+
+IGNORED_WIDGETS = {'separator', 'markdown', 'title', 'label', 'html'}
+
+# Defaults the form applies although the structure has none
+DEFAULT_OVERRIDES = {'10067': 'CZ'}
+
+# Classes per codelist in the pairwise scenarios (pairs grow with the square)
+CLASSES = 3
+
+# Field states in the pairwise domain besides the value classes
+IMPLICIT = 'implicit'  # field left out, the form keeps its default (or leaves it empty)
+EXPLICIT = 'explicit'  # default value set explicitly
+
 
 def generate_rc(yy, mm, dd):
     base = int(f"{yy:02d}{mm:02d}{dd:02d}")
@@ -10,114 +59,415 @@ def generate_rc(yy, mm, dd):
             return str(candidate)
     return str(base) + "0000000000"[:10-len(str(base))]
 
-def get_enum_value(ciselnik_key, enums, exclude=None):
-    if ciselnik_key in enums:
-        options = enums[ciselnik_key]
-        candidate_options = [opt['value'] for opt in options if opt['value'] != ""]
-        
-        if exclude:
-            original_len = len(candidate_options)
-            candidate_options = [v for v in candidate_options if v not in exclude]
-            if not candidate_options and original_len > 0:
-                print(f"WARNING: Exclusion of {exclude} resulted in empty options for {ciselnik_key}. Reverting to valid option.")
-                candidate_options = [opt['value'] for opt in options if opt['value'] != ""]
-
-        if candidate_options:
-            if 'AD' in candidate_options: return 'AD'
-            return candidate_options[0]
-            
-    return "UNKNOWN"
-
-def generate_value(node, enums, exclude_vals=None):
-    widget = node.get("widget", "input")
-    key = node.get("key", "unknown")
-    field_id = node.get("id")
-    
+# Fields generated together (rodné číslo of a man born 1985-01-01), never varied
+OVERRIDES = {'10057': generate_rc(85, 1, 1), '10056': "1985-01-01", '10059': "M"}
+
+
+class Codelists:
+    """
+    Candidate values per codelist, built once and shared by all fields using it.
+    """
+
+    def __init__(self, enums):
+        self.enums = enums
+        self._candidates = {}
+        self._picks = {}
+
+    def candidates(self, key):
+        if key not in self._candidates:
+            self._candidates[key] = [opt['value'] for opt in self.enums.get(key, []) if opt['value'] != ""]
+        return self._candidates[key]
+
+    def pick(self, key, exclude=None):
+        """
+        Value used by the fixed scenarios: 'AD' or the first candidate not in `exclude`.
+        """
+        cache_key = (key, tuple(exclude or ()))
+        if cache_key in self._picks:
+            return self._picks[cache_key]
+
+        value = "UNKNOWN"
+        if key in self.enums:
+            candidate_options = self.candidates(key)
+            if exclude:
+                remaining = [v for v in candidate_options if v not in exclude]
+                if not remaining and candidate_options:
+                    print(f"WARNING: Exclusion of {exclude} resulted in empty options for {key}. Reverting to valid option.")
+                else:
+                    candidate_options = remaining
+            if candidate_options:
+                value = 'AD' if 'AD' in candidate_options else candidate_options[0]
+        self._picks[cache_key] = value
+        return value
+
+    def classes(self, key, count):
+        """
+        Splits the candidates into `count` contiguous classes of (nearly) equal size.
+        """
+        values = self.candidates(key)
+        count = min(count, len(values))
+        size, extra = divmod(len(values), count) if count else (0, 0)
+        classes, start = [], 0
+        for i in range(count):
+            end = start + size + (i < extra)
+            classes.append(values[start:end])
+            start = end
+        return classes
+
+
+def leaf_table(nodes):
+    """
+    Fillable leaves in form order, one row per field: (id, key, widget, ciselnik, default).
+    """
+    leaves = []
+    stack = [nodes]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if not isinstance(node, dict) or node.get("skip") is True:
+            continue
+        children = node.get("children")
+        field_id = node.get("id")
+        widget = node.get("widget", "input")
+        if not children and field_id and widget not in IGNORED_WIDGETS:
+            default = DEFAULT_OVERRIDES.get(field_id, node.get("default_value", ""))
+            leaves.append((field_id, node.get("key", "unknown"), widget, node.get('ciselnik'), default))
+        if children:
+            stack.append(children)
+    return leaves
+
+
+def generate_value(leaf, codelists, exclude_vals=None):
+    field_id, key, widget, ciselnik, _ = leaf
+
     # Specific overrides
-    if field_id == '10057': return generate_rc(85, 1, 1) # Male 1985
-    if field_id == '10056': return "1985-01-01"
-    if field_id == '10059': return "M" 
-    
-    val = f"Test {key}" 
+    if field_id in OVERRIDES:
+        return OVERRIDES[field_id]
 
     if widget == 'date':
-        val = "2025-01-01"
-    elif widget == 'number':
-        val = "123"
-    elif widget == 'selection' or widget == 'combobox':
-        ciselnik = node.get('ciselnik')
-        if ciselnik:
-            val = get_enum_value(ciselnik, enums, exclude=exclude_vals)
-    
-    return val
+        return "2025-01-01"
+    if widget == 'number':
+        return "123"
+    if widget in ('selection', 'combobox') and ciselnik:
+        return codelists.pick(ciselnik, exclude=exclude_vals)
+    return f"Test {key}"
+
+
+def fill_leaves(leaves, codelists, data, mode):
+    for leaf in leaves:
+        field_id, default_val = leaf[0], leaf[4]
+        if default_val != "":
+            if mode == 'implicit_default':
+                continue
+            data[field_id] = default_val if mode == 'explicit_default' else \
+                generate_value(leaf, codelists, exclude_vals=[default_val])
+        else:
+            data[field_id] = generate_value(leaf, codelists)
+
 
 def traverse_and_fill(nodes, enums, data, mode):
-    if isinstance(nodes, list):
-        for node in nodes:
-            traverse_and_fill(node, enums, data, mode)
-    elif isinstance(nodes, dict):
-        if nodes.get("skip") is True:
+    fill_leaves(leaf_table(nodes), Codelists(enums), data, mode)
+
+
+# --- Pairwise ---
+
+def pairwise_parameters(leaves, codelists, classes=CLASSES):
+    """
+    Returns [(field_id, default, domain)] of the varied fields. Domain entries are the
+    field states: IMPLICIT, EXPLICIT or (cursor key, values) of a class of values.
+    """
+    parameters = []
+    for leaf in leaves:
+        field_id, _, widget, ciselnik, default = leaf
+        if field_id in OVERRIDES:
+            continue
+        domain = [IMPLICIT, EXPLICIT] if default != "" else []
+        if ciselnik and ciselnik in codelists.enums and widget in ('selection', 'combobox'):
+            for i, values in enumerate(codelists.classes(ciselnik, classes)):
+                # Fields of a codelist share its classes, and the cursors going through them
+                if any(v != default for v in values):
+                    domain.append(((ciselnik, i), values))
+        elif default != "":
+            domain.append(((field_id,), [generate_value(leaf, codelists, exclude_vals=[default])]))
+        if len(domain) > 1:
+            parameters.append((field_id, default, domain))
+    return parameters
+
+
+def covering_array(sizes):
+    """
+    All-pairs covering array for parameters with the given domain sizes (greedy
+    in-parameter-order, IPOG). Returns rows as {parameter: state index}; a
+    parameter missing from a row may take any state.
+    """
+    order = sorted(range(len(sizes)), key=lambda p: -sizes[p])
+    if not order:
+        return []
+    if len(order) == 1:
+        return [{order[0]: v} for v in range(sizes[order[0]])]
+
+    first, second = order[:2]
+    rows = [{first: a, second: b} for a in range(sizes[first]) for b in range(sizes[second])]
+    for k in range(2, len(order)):
+        p, previous = order[k], order[:k]
+        uncovered = {(q, w, v) for q in previous for w in range(sizes[q]) for v in range(sizes[p])}
+
+        # Horizontal growth: every row gets the state covering most new pairs
+        for row in rows:
+            best, best_gain = 0, -1
+            for v in range(sizes[p]):
+                gain = sum((q, row[q], v) in uncovered for q in previous if q in row)
+                if gain > best_gain:
+                    best, best_gain = v, gain
+            row[p] = best
+            uncovered.difference_update((q, row[q], best) for q in previous if q in row)
+
+        # Vertical growth: the remaining pairs go into free cells of new rows
+        added = []
+        for q, w, v in sorted(uncovered):
+            for row in added:
+                if row[p] == v and q not in row:
+                    row[q] = w
+                    break
+            else:
+                added.append({p: v, q: w})
+        rows.extend(added)
+    return rows
+
+
+def pairwise_assignments(parameters, rows):
+    """
+    Turns the covering array into {field_id: value, or None to leave the field out}
+    per scenario. Free cells take the least used state, a class gives its values in turn.
+    """
+    used = [[0] * len(domain) for _, _, domain in parameters]
+    for row in rows:
+        for p, v in row.items():
+            used[p][v] += 1
+
+    cursors = {}
+    assignments = []
+    for row in rows:
+        assignment = {}
+        for p, (field_id, default, domain) in enumerate(parameters):
+            v = row.get(p)
+            if v is None:
+                v = min(range(len(domain)), key=used[p].__getitem__)
+                used[p][v] += 1
+            state = domain[v]
+            if state == IMPLICIT:
+                assignment[field_id] = None
+            elif state == EXPLICIT:
+                assignment[field_id] = default
+            else:
+                key, values = state
+                turn = cursors.get(key, 0)
+                # The default is not a value of its classes (it is the EXPLICIT state)
+                while values[turn % len(values)] == default:
+                    turn += 1
+                cursors[key] = turn + 1
+                assignment[field_id] = values[turn % len(values)]
+        assignments.append(assignment)
+    return assignments
+
+
+def pair_coverage(parameters, assignments):
+    """
+    Returns (covered, total) pairs of field states, checked on the final scenarios.
+    """
+    def state(p, value):
+        field_id, default, domain = parameters[p]
+        if value is None:
+            return domain.index(IMPLICIT)
+        if value == default:
+            return domain.index(EXPLICIT)
+        return next(i for i, s in enumerate(domain) if s not in (IMPLICIT, EXPLICIT) and value in s[1])
+
+    rows = [[state(p, a[field_id]) for p, (field_id, _, _) in enumerate(parameters)] for a in assignments]
+    sizes = [len(domain) for _, _, domain in parameters]
+    covered = total = 0
+    for p in range(len(parameters)):
+        for q in range(p + 1, len(parameters)):
+            total += sizes[p] * sizes[q]
+            covered += len({(row[p], row[q]) for row in rows})
+    return covered, total
+
+
+# --- Output ---
+
+_worker_base = None
+
+
+def init_worker(base):
+    global _worker_base
+    _worker_base = base
+
+
+def scenario_data(task, base):
+    # Pairwise tasks carry their assignment, which is applied to the non-default values
+    data = task[2]
+    if isinstance(data, tuple):
+        _, assignment = data
+        data = {k: assignment.get(k, v) for k, v in base.items()}
+        data = {k: v for k, v in data.items() if v is not None}
+    return data
+
+
+def render_scenario(task):
+    """
+    Serializes one scenario as an element of the (indent 2) scenario list.
+    """
+    name, label = task[:2]
+    data = scenario_data(task, _worker_base)
+    text = json.dumps({"name": name, "label": label, "data": data}, indent=2, ensure_ascii=False)
+    return '  ' + text.replace('\n', '\n  ')
+
+
+def write_scenarios(path, tasks, base, jobs=1):
+    """
+    Streams the scenarios into `path` as they are rendered, in order; the file is
+    the same as json.dump(scenarios, f, indent=2, ensure_ascii=False) would write.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        if not tasks:
+            f.write('[]')
             return
 
-        is_leaf = "children" not in nodes or not nodes["children"]
-        if is_leaf:
-            field_id = nodes.get("id")
-            widget = nodes.get("widget", "input")
-            
-            # Identify Default
-            default_val = nodes.get("default_value", "")
-            if field_id == '10067': 
-                default_val = "CZ"
-                
-            has_default = default_val != ""
-            
-            should_add = True
-            final_val = None
-            
-            if field_id and widget not in ['separator', 'markdown', 'title', 'label', 'html']:
-                if has_default:
-                    if mode == 'implicit_default':
-                        should_add = False
-                    elif mode == 'explicit_default':
-                        final_val = default_val
-                    elif mode == 'non_default':
-                        final_val = generate_value(nodes, enums, exclude_vals=[default_val])
-                else:
-                    final_val = generate_value(nodes, enums)
-                
-                if should_add and final_val is not None:
-                    data[field_id] = final_val
-
-        if "children" in nodes:
-            traverse_and_fill(nodes["children"], enums, data, mode)
-
-try:
-    with open('../docs/regzec_form.json', 'r') as f:
-        structure = json.load(f)
-    with open('../docs/regzec_enums.json', 'r') as f:
-        enums = json.load(f)
-
-    scenarios = []
-    modes = [
-        ("non_default", "Set 1 (Non-Default)"),
-        ("explicit_default", "Set 2 (Explicit Default)"),
-        ("implicit_default", "Set 3 (Implicit Default)")
-    ]
-
-    for m, label in modes:
-        d = {}
-        traverse_and_fill(structure, enums, d, m)
-        scenarios.append({
-            "name": m,
-            "label": label,
-            "data": d
-        })
-    
-    with open('test_scenarios.json', 'w') as f:
-        json.dump(scenarios, f, indent=2, ensure_ascii=False)
-        
-    print("Scenarios generated.")
-
-except Exception as e:
-    import traceback
-    traceback.print_exc()
+        def emit(chunks):
+            f.write('[\n')
+            for i, chunk in enumerate(chunks):
+                f.write(',\n' if i else '')
+                f.write(chunk)
+            f.write('\n]')
+
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(base,)) as pool:
+                emit(pool.map(render_scenario, tasks, chunksize=max(1, len(tasks) // (4 * jobs))))
+        else:
+            init_worker(base)
+            emit(map(render_scenario, tasks))
+
+
+# --- Shards ---
+
+def form_profile(structure, enums, show_new_only=SPEC_SHOWS_NEW_ONLY):
+    """
+    Tabs of the rendered form (the ts-form bundle): [{field name: is a file upload}].
+    """
+    bundle = build_metadata(structure, enums, show_new_only)
+    tabs = []
+    for tab in bundle['layout']['tabs']:
+        names = [item['field'] for row in tab['rows'] for item in row if item['type'] == 'field']
+        tabs.append({name: bundle['fields'][name]['type'] == 'file' for name in names})
+    return tabs
+
+
+def scenario_cost(data, tabs):
+    """
+    Estimated seconds the spec needs for a scenario: every tab is opened and scanned,
+    the fields present in the data are filled (values not on the form cost nothing).
+    """
+    cost = FLOW_COST
+    for fields in tabs:
+        cost += TAB_COST + FIELD_COST * len(fields)
+        for name, is_file in fields.items():
+            if name in data:
+                cost += UPLOAD_COST if is_file else FILL_COST
+    return cost
+
+
+def balance_shards(costs, count):
+    """
+    Longest-processing-time partitioning: the costliest scenarios first, each to the
+    shard with the least work so far. Returns the scenario indices per shard, in order.
+    """
+    shards = [[] for _ in range(min(count, len(costs)))]
+    if not shards:
+        return shards
+    loads = [(0.0, k) for k in range(len(shards))]
+    for i in sorted(range(len(costs)), key=lambda i: (-costs[i], i)):
+        load, k = heapq.heappop(loads)
+        shards[k].append(i)
+        heapq.heappush(loads, (load + costs[i], k))
+    return [sorted(shard) for shard in shards]
+
+
+def write_shards(directory, tasks, base, tabs, count, jobs=1):
+    os.makedirs(directory, exist_ok=True)
+    # Shards of a previous run with more shards must not be picked up
+    for path in glob.glob(os.path.join(directory, 'shard_*.json')):
+        os.remove(path)
+
+    costs = [scenario_cost(scenario_data(task, base), tabs) for task in tasks]
+    shards = balance_shards(costs, count)
+    loads = [sum(costs[i] for i in shard) for shard in shards]
+    for k, shard in enumerate(shards, 1):
+        path = os.path.join(directory, f"shard_{k}.json")
+        write_scenarios(path, [tasks[i] for i in shard], base, jobs)
+        print(f"  {path}: {len(shard)} scenarios, ~{loads[k - 1]:.0f} s")
+    if loads:
+        print(f"{len(shards)} shards: slowest ~{max(loads):.0f} s, average ~{sum(loads) / len(loads):.0f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the form test scenarios (run from tests/).")
+    parser.add_argument("--output", default=OUTPUT_FILE, help=f"Scenario file (default: {OUTPUT_FILE})")
+    parser.add_argument("--classes", type=int, default=CLASSES,
+                        help=f"Value classes per codelist in the pairwise scenarios, 0 for none (default: {CLASSES})")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes rendering the scenarios (default: 1)")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="Also split the scenarios into this many shard files of balanced run time")
+    parser.add_argument("--shard-dir", default=SHARD_DIR, help=f"Directory of the shard files (default: {SHARD_DIR})")
+    args = parser.parse_args()
+
+    try:
+        with open(FORM_FILE, 'r', encoding='utf-8') as f:
+            structure = json.load(f)
+        with open(ENUMS_FILE, 'r', encoding='utf-8') as f:
+            enums = json.load(f)
+
+        leaves = leaf_table(structure)
+        codelists = Codelists(enums)
+
+        tasks = []
+        modes = [
+            ("non_default", "Set 1 (Non-Default)"),
+            ("explicit_default", "Set 2 (Explicit Default)"),
+            ("implicit_default", "Set 3 (Implicit Default)")
+        ]
+        for m, label in modes:
+            d = {}
+            fill_leaves(leaves, codelists, d, m)
+            tasks.append((m, label, d))
+
+        # Pairwise scenarios start from the non-default values (tasks[0])
+        base = tasks[0][2]
+        if args.classes > 0:
+            parameters = pairwise_parameters(leaves, codelists, args.classes)
+            rows = covering_array([len(domain) for _, _, domain in parameters])
+            assignments = pairwise_assignments(parameters, rows)
+            width = len(str(len(assignments)))
+            for n, assignment in enumerate(assignments, 1):
+                tasks.append((f"pairwise_{n:0{width}d}", f"Pairwise {n}", ('pairwise', assignment)))
+
+            covered, total = pair_coverage(parameters, assignments)
+            codelist_of = {leaf[0]: leaf[3] for leaf in leaves if leaf[3] in enums}
+            seen = {(codelist_of[f], v) for a in assignments for f, v in a.items() if f in codelist_of and v is not None}
+            possible = sum(len(codelists.candidates(key)) for key in set(codelist_of.values()))
+            print(f"{len(assignments)} pairwise scenarios over {len(parameters)} fields: "
+                  f"{covered}/{total} state pairs, {len(seen)}/{possible} codelist values")
+
+        write_scenarios(args.output, tasks, base, args.jobs)
+        print("Scenarios generated.")
+
+        if args.shards > 0:
+            write_shards(args.shard_dir, tasks, base, form_profile(structure, enums), args.shards, args.jobs)
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    main()
@@ -67,18 +67,21 @@ def traverse_and_fill(nodes, enums, data):
         if "children" in nodes:
             traverse_and_fill(nodes["children"], enums, data)
 
-# Main execution
-try:
-    with open('docs/regzec_form.json', 'r') as f:
-        structure = json.load(f)
-    with open('docs/regzec_enums.json', 'r') as f:
-        enums = json.load(f)
+def main():
+    try:
+        with open('docs/regzec_form.json', 'r') as f:
+            structure = json.load(f)
+        with open('docs/regzec_enums.json', 'r') as f:
+            enums = json.load(f)
         
-    full_data = {}
-    traverse_and_fill(structure, enums, full_data)
+        full_data = {}
+        traverse_and_fill(structure, enums, full_data)
     
-    print(json.dumps(full_data, indent=2, ensure_ascii=False))
+        print(json.dumps(full_data, indent=2, ensure_ascii=False))
     
-except Exception as e:
-    import traceback
-    traceback.print_exc()
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    main()
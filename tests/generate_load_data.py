@@ -0,0 +1,433 @@
+#!/usr/bin/env -S uv run --script
+#
+# /// script
+# requires-python = ">=3.12"
+# dependencies = ["numpy"]
+# ///
+"""
+Seeded generator of realistic, valid questionnaires for load testing.
+
+Fields come from docs/regzec_form.json, values are generated column-wise per
+batch with numpy. Rodné číslo, birth date and sex are computed together, the
+conditional rules of docs/regzec_rules.json are applied per questionnaire.
+Output goes to a JSONL file or to a directory of saveForm-like files.
+
+Examples (from the repository root):
+    python tests/generate_load_data.py -n 1000000 --jsonl load.jsonl --jobs 8
+    python tests/generate_load_data.py -n 5000 --out-dir load/ --attachments 0.3
+"""
+
+import argparse
+import base64
+import datetime
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from compile_rules import COMPARE, RuleTable, is_empty
+
+FORM_FILE = os.path.join(ROOT, 'docs', 'regzec_form.json')
+ENUMS_FILE = os.path.join(ROOT, 'docs', 'regzec_enums.json')
+RULES_FILE = os.path.join(ROOT, 'docs', 'regzec_rules.json')
+
+# Evaluations of one rule per questionnaire (a fix can enable another rule)
+RULE_PASSES = 3
+
+IGNORED_WIDGETS = {'separator', 'markdown', 'title', 'label', 'html'}
+
+# Share of the weight given to listed values, the rest is spread over the other values
+ENUM_WEIGHTS = {
+    'state': {'CZ': 0.86, 'SK': 0.05, 'UA': 0.04, 'PL': 0.01, 'VN': 0.01, 'DE': 0.005},
+    'zdravotni_pojistovny': {'111': 0.55, '201': 0.06, '205': 0.12, '207': 0.12, '209': 0.02, '211': 0.1, '213': 0.03},
+    'bool': {'N': 0.85, 'A': 0.15},
+}
+
+# Sections filled only for foreign citizens (10067 <> CZ)
+FOREIGNER_ONLY_PATHS = ('employee.nocitizen', 'employee.client.proofid')
+
+FIRST_NAMES = {
+    'M': ['Jan', 'Petr', 'Jiří', 'Josef', 'Pavel', 'Martin', 'Tomáš', 'Jaroslav', 'Miroslav', 'Lukáš'],
+    'Ž': ['Jana', 'Marie', 'Eva', 'Hana', 'Anna', 'Lenka', 'Kateřina', 'Lucie', 'Věra', 'Alena'],
+}
+SURNAMES = {
+    'M': ['Novák', 'Svoboda', 'Novotný', 'Dvořák', 'Černý', 'Procházka', 'Kučera', 'Veselý', 'Horák', 'Němec'],
+    'Ž': ['Nováková', 'Svobodová', 'Novotná', 'Dvořáková', 'Černá', 'Procházková', 'Kučerová', 'Veselá', 'Horáková', 'Němcová'],
+}
+CITIES = ['Praha', 'Brno', 'Ostrava', 'Plzeň', 'Liberec', 'Olomouc', 'České Budějovice', 'Hradec Králové', 'Ústí nad Labem', 'Pardubice']
+STREETS = ['Hlavní', 'Nádražní', 'Školní', 'Krátká', 'Lipová', 'Polní', 'Sadová', 'Zahradní', 'Husova', 'Komenského']
+WORDS = ['alfa', 'beta', 'gama', 'delta', 'sever', 'jih', 'most', 'les', 'pole', 'voda']
+
+
+def load_leaves(show_new_only=True):
+    """
+    Returns the list of fillable leaves (one precomputed row per field).
+    """
+    with open(FORM_FILE, 'r', encoding='utf-8') as f:
+        structure = json.load(f)
+
+    leaves = []
+    stack = [(n, '') for n in reversed(structure)]
+    while stack:
+        node, parent_path = stack.pop()
+        if not isinstance(node, dict) or node.get('skip') is True:
+            continue
+        if not show_new_only and node.get('new_only'):
+            continue
+        path = node.get('original_path') or parent_path
+        if node.get('children'):
+            stack.extend((c, path) for c in reversed(node['children']))
+            continue
+        field_id = node.get('id')
+        widget = node.get('widget', 'input')
+        if not field_id or widget in IGNORED_WIDGETS:
+            continue
+        leaves.append({
+            'id': field_id,
+            'key': node.get('key', ''),
+            'path': path,
+            'widget': widget,
+            'ciselnik': node.get('ciselnik') or '',
+            'dat_typ': (node.get('dat_typ') or '').replace(' ', ''),
+            'delka': node.get('delka') or '',
+            'required': node.get('mandatory') == 'P',
+            'multiple': bool(node.get('multiple')),
+            'default_value': node.get('default_value') or '',
+            'foreigner_only': path.startswith(FOREIGNER_ONLY_PATHS),
+        })
+    return leaves
+
+
+def enum_distribution(key, options, default_value=''):
+    values = np.array([o['value'] for o in options if o['value'] != ''], dtype=object)
+    explicit = dict(ENUM_WEIGHTS.get(key, {}))
+    if default_value and default_value not in explicit:
+        explicit[default_value] = 0.7
+    if explicit:
+        rest = max(0.0, 1.0 - sum(explicit.values()))
+        others = sum(1 for v in values if v not in explicit)
+        weights = np.array([explicit.get(v, rest / others if others else 0.0) for v in values], dtype=float)
+    else:
+        # Zipf-like: earlier codelist entries are more frequent
+        weights = 1.0 / np.arange(1, len(values) + 1)
+    return values, weights / weights.sum()
+
+
+def length_range(delka, fallback=(3, 20)):
+    parts = delka.replace('–', '-').split('-')
+    try:
+        low, high = (int(parts[0]), int(parts[-1]))
+    except ValueError:
+        return fallback
+    return max(low, 1), max(high, 1)
+
+
+def rodne_cislo(rng, birth, is_female):
+    """
+    Vectorized rodné číslo for births from 1954: YYMMDD + 3-digit serial + check digit,
+    the whole number divisible by 11. Women have month + 50.
+    """
+    years = birth.astype('datetime64[Y]').astype(int) + 1970
+    months = birth.astype('datetime64[M]').astype(int) % 12 + 1
+    days = (birth - birth.astype('datetime64[M]')).astype(int) + 1
+    months = months + np.where(is_female, 50, 0)
+    prefix = (years % 100) * 10000 + months * 100 + days
+
+    serial = rng.integers(0, 999, size=len(birth))
+    base = prefix.astype(np.int64) * 1000 + serial
+    check = base % 11
+    # Remainder 10 has no check digit since 1986: take the next serial (remainder then is 0)
+    base = np.where(check == 10, base + 1, base)
+    check = base % 11
+    return np.char.zfill((base * 10 + check).astype(str), 10)
+
+
+def text_values(rng, leaf, size):
+    key = leaf['key']
+    dat_typ = leaf['dat_typ']
+    low, high = length_range(leaf['delka'])
+
+    if key == 'pnu':
+        return rng.integers(10000, 80000, size=size).astype(str)
+    if key in ('num', 'onum'):
+        return rng.integers(1, min(10 ** min(high, 4), 9999), size=size).astype(str)
+    if key == 'cit':
+        return rng.choice(np.array(CITIES, dtype=object), size=size)
+    if key == 'str':
+        return rng.choice(np.array(STREETS, dtype=object), size=size)
+
+    if dat_typ in ('N', 'NN'):
+        lengths = rng.integers(low, high + 1, size=size)
+        numbers = rng.integers(0, 10 ** 9, size=size).astype(str)
+        numbers = np.char.zfill(numbers, high)
+        values = np.array([n[:l] for n, l in zip(numbers, lengths)], dtype=object)
+        if dat_typ == 'N':
+            # N must not start with zero
+            values = np.array(['1' + v[1:] if v.startswith('0') else v for v in values], dtype=object)
+        return values
+
+    words = rng.choice(np.array(WORDS, dtype=object), size=(size, 2))
+    values = np.array([f"{a.capitalize()} {b}" for a, b in words], dtype=object)
+    if dat_typ and 'SP' not in dat_typ and 'L2' not in dat_typ:
+        values = np.array([v.replace(' ', '') for v in values], dtype=object)
+    return np.array([v[:high].strip() for v in values], dtype=object)
+
+
+def date_values(rng, size, start='2016-01-01', end='2026-01-01'):
+    start, end = np.datetime64(start), np.datetime64(end)
+    return (start + rng.integers(0, int((end - start).astype(int)), size=size)).astype(str)
+
+
+def attachment(rng, size_bytes, index):
+    payload = rng.bytes(size_bytes)
+    return {
+        'name': f"sken_{index}.pdf",
+        'type': 'application/pdf',
+        'size': size_bytes,
+        'lastModified': 1767225600000 + int(index),
+        'data': 'data:application/pdf;base64,' + base64.b64encode(payload).decode('ascii'),
+        '_is_file': True,
+    }
+
+
+def apply_rules(record, complete, index, rules):
+    """
+    Makes questionnaire `index` satisfy the rule table: fields made mandatory
+    are taken from the `complete` columns (the values before optional fields
+    were dropped), conflicting values are dropped. After every change only the
+    rules depending on the changed field are checked again. Returns True if
+    fields were added.
+    """
+    added = False
+
+    def fill(field):
+        column = complete.get(field)
+        if is_empty(record.get(field)) and column is not None and column[index] is not None:
+            set_value(field, column[index])
+
+    def set_value(field, value):
+        nonlocal added
+        added = added or field not in record
+        if value is None:
+            del record[field]
+        else:
+            record[field] = value
+        for i in rules.dependents.get(field, ()):
+            if i not in queued and runs[i] < RULE_PASSES:
+                queued.add(i)
+                pending.append(i)
+
+    pending = list(range(len(rules.rules)))
+    queued = set(pending)
+    runs = [0] * len(pending)
+    while pending:
+        i = pending.pop()
+        queued.discard(i)
+        runs[i] += 1
+        rule = rules.rules[i]
+        kind = rule['kind']
+        if kind == 'group':
+            if any(not is_empty(record.get(f)) for f in rule['targets']):
+                for field in rule['targets']:
+                    fill(field)
+            continue
+        if not rules.applies(i, record):
+            continue
+        if kind == 'required':
+            for field in rule['targets']:
+                fill(field)
+            continue
+        if kind == 'one_of':
+            if all(is_empty(record.get(f)) for f in rule['targets']):
+                fill(rule['targets'][0])
+            continue
+        other = record.get(rule.get('other'))
+        for field in rule['targets']:
+            value = record.get(field)
+            if is_empty(value):
+                continue
+            if kind == 'forbidden' or (kind == 'requires' and is_empty(other)) or \
+                    (kind == 'compare' and not is_empty(other) and not COMPARE[rule['op']](value, other)):
+                set_value(field, None)
+            elif kind == 'equals' and not is_empty(other) and value != other:
+                set_value(field, other)
+    return added
+
+
+class Generator:
+    def __init__(self, leaves, enums, fill_rate=0.8, attachment_rate=0.0, attachment_size=4096, rules=None):
+        self.leaves = leaves
+        self.rules = rules
+        self.fill_rate = fill_rate
+        self.attachment_rate = attachment_rate
+        self.attachment_size = attachment_size
+        # Candidate lists per codelist (and default value) are built once
+        self.distributions = {}
+        for leaf in leaves:
+            if leaf['ciselnik'] in enums:
+                key = (leaf['ciselnik'], leaf['default_value'])
+                if key not in self.distributions:
+                    self.distributions[key] = enum_distribution(leaf['ciselnik'], enums[leaf['ciselnik']], leaf['default_value'])
+
+    def batch(self, seed_seq, size, first_index=0):
+        rng = np.random.default_rng(seed_seq)
+        columns = {}
+
+        # Person: birth date, sex and rodné číslo are consistent
+        birth = np.datetime64('1956-01-01') + rng.integers(0, 365 * 52, size=size)
+        is_female = rng.random(size) < 0.5
+        sex = np.where(is_female, 'Ž', 'M').astype(object)
+        columns['10056'] = birth.astype(str).astype(object)
+        columns['10059'] = sex
+        columns['10057'] = rodne_cislo(rng, birth, is_female).astype(object)
+        first = np.where(is_female, rng.choice(np.array(FIRST_NAMES['Ž'], dtype=object), size),
+                         rng.choice(np.array(FIRST_NAMES['M'], dtype=object), size))
+        last = np.where(is_female, rng.choice(np.array(SURNAMES['Ž'], dtype=object), size),
+                        rng.choice(np.array(SURNAMES['M'], dtype=object), size))
+        columns['10054'] = first
+        columns['10053'] = last
+
+        citizenship = None
+        complete = {}
+        for leaf in self.leaves:
+            field_id = leaf['id']
+            if field_id in columns:
+                continue
+            if leaf['ciselnik'] and (leaf['ciselnik'], leaf['default_value']) in self.distributions:
+                values, weights = self.distributions[(leaf['ciselnik'], leaf['default_value'])]
+                column = rng.choice(values, size=size, p=weights)
+            elif leaf['widget'] == 'date':
+                column = date_values(rng, size).astype(object)
+            elif leaf['widget'] == 'file':
+                column = np.full(size, None, dtype=object)
+                if self.attachment_rate > 0:
+                    for i in np.nonzero(rng.random(size) < self.attachment_rate)[0]:
+                        item = attachment(rng, self.attachment_size, first_index + i)
+                        column[i] = [item] if leaf['multiple'] else item
+                columns[field_id] = column
+                continue
+            else:
+                column = text_values(rng, leaf, size)
+
+            if field_id == '10067':
+                citizenship = column
+            complete[field_id] = column
+
+            if not leaf['required']:
+                column = np.where(rng.random(size) < self.fill_rate, column, None)
+            columns[field_id] = column
+
+        if citizenship is not None:
+            # Foreigner sections stay empty for Czech citizens
+            is_cz = citizenship == 'CZ'
+            for leaf in self.leaves:
+                if leaf['foreigner_only'] and leaf['id'] in columns:
+                    columns[leaf['id']] = np.where(is_cz, None, columns[leaf['id']])
+
+        order = [leaf['id'] for leaf in self.leaves if leaf['id'] in columns]
+        rows = zip(*(columns[field_id] for field_id in order))
+        records = [{k: v for k, v in zip(order, row) if v is not None} for row in rows]
+        if self.rules is not None:
+            for i, record in enumerate(records):
+                if apply_rules(record, complete, i, self.rules):
+                    # Keep the form order of the fields
+                    records[i] = {k: record[k] for k in order if k in record}
+        return records
+
+
+def filename_for(record, index, date):
+    surname = record.get('10053') or 'Prijmeni'
+    name = record.get('10054') or 'Jmeno'
+    return f"{date} Osobní dotazník {surname} {name} ({index}).json"
+
+
+# --- Worker side ---
+
+_generator = None
+
+
+def init_worker(leaves, enums, fill_rate, attachment_rate, attachment_size, rules):
+    global _generator
+    _generator = Generator(leaves, enums, fill_rate, attachment_rate, attachment_size, rules)
+
+
+def run_batch(task):
+    seed_seq, size, first_index, out_dir = task
+    records = _generator.batch(seed_seq, size, first_index)
+    if out_dir is None:
+        return ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records)
+
+    date = datetime.date.today().isoformat()
+    for i, record in enumerate(records):
+        path = os.path.join(out_dir, filename_for(record, first_index + i, date))
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, indent=2, ensure_ascii=False)
+    return len(records)
+
+
+def generate(count, seed, batch_size, jobs, out_dir=None, jsonl=None, **options):
+    leaves = load_leaves(show_new_only=not options.pop('standard', False))
+    with open(ENUMS_FILE, 'r', encoding='utf-8') as f:
+        enums = json.load(f)
+
+    batches = []
+    seeds = np.random.SeedSequence(seed).spawn((count + batch_size - 1) // batch_size)
+    for n, seed_seq in enumerate(seeds):
+        first = n * batch_size
+        batches.append((seed_seq, min(batch_size, count - first), first, out_dir))
+
+    rules = RuleTable.load(RULES_FILE)
+    initargs = (leaves, enums, options['fill_rate'], options['attachment_rate'], options['attachment_size'], rules)
+    out = open(jsonl, 'w', encoding='utf-8') if jsonl and jsonl != '-' else sys.stdout if jsonl else None
+    try:
+        if jobs == 1:
+            init_worker(*initargs)
+            for result in map(run_batch, batches):
+                if out:
+                    out.write(result)
+        else:
+            with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=initargs) as pool:
+                # Results arrive in batch order, so the output is the same for any number of jobs
+                for result in pool.map(run_batch, batches):
+                    if out:
+                        out.write(result)
+    finally:
+        if out and out is not sys.stdout:
+            out.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate valid synthetic questionnaires for load testing.")
+    parser.add_argument("-n", "--count", type=int, default=1000, help="Number of questionnaires (default: 1000)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--jsonl", help="Write one questionnaire per line to this file ('-' for stdout)")
+    target.add_argument("--out-dir", help="Write one saveForm-like JSON file per questionnaire into this directory")
+    parser.add_argument("--standard", action="store_true", help="Only fields of the standard form (no new_only fields)")
+    parser.add_argument("--fill-rate", type=float, default=0.8, help="Probability of filling optional fields (default: 0.8)")
+    parser.add_argument("--attachments", type=float, default=0.0, dest="attachment_rate",
+                        help="Probability of an attachment per file field (default: 0)")
+    parser.add_argument("--attachment-size", type=int, default=4096, help="Attachment size in bytes (default: 4096)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Questionnaires per batch (default: 5000)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    start = datetime.datetime.now()
+    generate(args.count, args.seed, args.batch_size, args.jobs, out_dir=args.out_dir, jsonl=args.jsonl,
+             standard=args.standard, fill_rate=args.fill_rate, attachment_rate=args.attachment_rate,
+             attachment_size=args.attachment_size)
+    elapsed = (datetime.datetime.now() - start).total_seconds()
+    print(f"Generated {args.count} questionnaires in {elapsed:.2f} s "
+          f"({args.count / elapsed if elapsed else 0:.0f}/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,10 @@ import * as fs from 'fs';
 import * as path from 'path';
 
 // Load Generated Scenarios
-const scenarios = require('./test_scenarios.json');
+// SCENARIO_SHARD=tests/shards/shard_<k>.json runs one shard (create_scenarios.py --shards N)
+const scenarios = process.env.SCENARIO_SHARD
+    ? JSON.parse(fs.readFileSync(path.resolve(process.env.SCENARIO_SHARD), 'utf8'))
+    : require('./test_scenarios.json');
 
 // File Fields to handle specially during validation
 const fileFields = ['999102', '999103', '999104', '999146', '999145', '999105'];
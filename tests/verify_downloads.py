@@ -0,0 +1,216 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from compare_jsons import structural_diff
+
+SCENARIOS_FILE = 'tests/test_scenarios.json'
+DOWNLOADS_DIR = 'test-results/downloads'
+
+FILE_FIELDS = ['999102', '999103', '999104', '999146', '999145', '999105']
+
+# <safeTitle>_step<N>.json, as saved by tests/regzec_form.spec.js
+DOWNLOAD_RE = re.compile(r'^(?P<title>.+)_step(?P<step>\d+)\.json$')
+
+
+def safe_title(label):
+    # Same as testInfo.title.replace(/[^a-z0-9]/gi, '_').toLowerCase() in the spec
+    return re.sub(r'[^a-z0-9]', '_', f"Scenario: {label}", flags=re.IGNORECASE).lower()
+
+
+def canonical_hash(obj):
+    text = json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def expected_data(data, ignore=FILE_FIELDS):
+    return {k: v for k, v in data.items() if k not in ignore}
+
+
+def discover_downloads(root=DOWNLOADS_DIR):
+    """
+    Returns {(browser, title): {step: path}} for every scenario download.
+    """
+    found = {}
+    for path in sorted(glob.glob(os.path.join(root, '*', '*.json'))):
+        match = DOWNLOAD_RE.match(os.path.basename(path))
+        if not match:
+            continue
+        browser = os.path.basename(os.path.dirname(path))
+        found.setdefault((browser, match.group('title')), {})[int(match.group('step'))] = path
+    return found
+
+
+# --- Worker ---
+
+_worker_scenarios = None
+_worker_options = None
+
+
+def init_worker(scenarios, options):
+    global _worker_scenarios, _worker_options
+    _worker_scenarios = scenarios
+    _worker_options = options
+
+
+def check_file_fields(saved, scenario_data, ignore):
+    # File fields are not compared by value, only checked to hold an uploaded file
+    errors = []
+    for f in ignore:
+        if f not in scenario_data:
+            continue
+        value = saved.get(f)
+        items = value if isinstance(value, list) else [value]
+        if not items or not all(isinstance(i, dict) and i.get('_is_file') for i in items):
+            errors.append({'op': 'file', 'path': f"root.{f}", 'message': "Uploaded file missing"})
+    return errors
+
+
+def verify_download(job):
+    """
+    Compares one download with its scenario. Equal canonical hashes pass at once,
+    otherwise the structural diff lists the differences.
+    """
+    title, browser, step, path = job
+    scenario = _worker_scenarios[title]
+    ignore = _worker_options['ignore']
+    result = {'browser': browser, 'scenario': scenario['label'], 'step': step, 'file': path}
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+    except (OSError, ValueError) as e:
+        result.update(valid=False, hash=None, differences=[{'op': 'error', 'message': str(e)}])
+        return result
+
+    expected = expected_data(scenario['data'], ignore)
+    if _worker_options['exact']:
+        actual = expected_data(saved, ignore)
+    else:
+        # Like toMatchObject in the spec: extra saved fields (e.g. defaults) are fine
+        actual = {k: saved[k] for k in expected if k in saved}
+
+    differences = []
+    if canonical_hash(actual) != scenario['hash']:
+        differences = structural_diff(expected, actual)
+    differences.extend(check_file_fields(saved, scenario['data'], ignore))
+
+    result.update(valid=not differences, hash=canonical_hash(saved), differences=differences)
+    return result
+
+
+# --- Driver ---
+
+def load_scenarios(path=SCENARIOS_FILE, ignore=FILE_FIELDS):
+    with open(path, 'r', encoding='utf-8') as f:
+        scenarios = json.load(f)
+    by_title = {}
+    for scenario in scenarios:
+        expected = expected_data(scenario['data'], ignore)
+        by_title[safe_title(scenario['label'])] = {
+            'label': scenario['label'],
+            'data': scenario['data'],
+            'hash': canonical_hash(expected),
+        }
+    return by_title
+
+
+def verify_all(scenarios, downloads, ignore=FILE_FIELDS, exact=False, jobs=None):
+    jobs_list = []
+    orphans = []
+    for (browser, title), steps in sorted(downloads.items()):
+        if title not in scenarios:
+            orphans.extend(steps.values())
+            continue
+        jobs_list.extend((title, browser, step, path) for step, path in sorted(steps.items()))
+
+    options = {'ignore': ignore, 'exact': exact}
+    if jobs == 1 or len(jobs_list) < 2:
+        init_worker(scenarios, options)
+        results = [verify_download(job) for job in jobs_list]
+    else:
+        jobs = jobs or os.cpu_count() or 1
+        chunksize = max(1, len(jobs_list) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                                 initargs=(scenarios, options)) as pool:
+            results = list(pool.map(verify_download, jobs_list, chunksize=chunksize))
+
+    # Every step of a scenario must save the same document (result1 == result2 in the spec)
+    consistency = []
+    by_run = {}
+    for r in results:
+        by_run.setdefault((r['browser'], r['scenario']), []).append(r)
+    for (browser, label), runs in sorted(by_run.items()):
+        hashes = {r['hash'] for r in runs if r['hash']}
+        if len(hashes) > 1:
+            consistency.append({'browser': browser, 'scenario': label,
+                                'steps': [r['step'] for r in runs], 'message': "Steps saved different data"})
+
+    browsers = sorted({browser for browser, _ in downloads})
+    missing = [{'browser': browser, 'scenario': s['label']}
+               for browser in browsers for title, s in sorted(scenarios.items())
+               if (browser, title) not in downloads]
+
+    return results, consistency, missing, orphans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify all Playwright scenario downloads against tests/test_scenarios.json.")
+    parser.add_argument("--downloads", default=DOWNLOADS_DIR, help=f"Downloads root with one directory per browser (default: {DOWNLOADS_DIR})")
+    parser.add_argument("--scenarios", default=SCENARIOS_FILE, help=f"Scenarios file (default: {SCENARIOS_FILE})")
+    parser.add_argument("--ignore", nargs='*', default=FILE_FIELDS, help="Fields not compared by value (default: file fields)")
+    parser.add_argument("--exact", action="store_true", help="Saved data must not contain fields beyond the scenario")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--report", help="Write the JSON report to this file (default: stdout)")
+    args = parser.parse_args()
+
+    try:
+        scenarios = load_scenarios(args.scenarios, args.ignore)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error reading scenarios: {e}", file=sys.stderr)
+        sys.exit(2)
+    downloads = discover_downloads(args.downloads)
+
+    start = time.perf_counter()
+    results, consistency, missing, orphans = verify_all(scenarios, downloads, args.ignore, args.exact, args.jobs)
+    elapsed = time.perf_counter() - start
+
+    failed = [r for r in results if not r['valid']]
+    report = {
+        'summary': {
+            'browsers': sorted({browser for browser, _ in downloads}),
+            'files': len(results),
+            'passed': len(results) - len(failed),
+            'failed': len(failed),
+            'inconsistent': len(consistency),
+            'missing': len(missing),
+            'orphans': len(orphans),
+        },
+        'failed': failed,
+        'inconsistent': consistency,
+        'missing': missing,
+        'orphans': orphans,
+    }
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+
+    print(f"Verified {len(results)} downloads ({len(failed)} failed, {len(consistency)} inconsistent, "
+          f"{len(missing)} missing) in {elapsed:.2f} s", file=sys.stderr)
+
+    if failed or consistency or missing or not results:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
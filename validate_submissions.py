@@ -0,0 +1,334 @@
+import argparse
+import datetime
+import glob
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from compile_rules import RULES_FILE, RuleTable
+from submission_reader import read_submission
+
+FORM_FILE = 'docs/regzec_form.json'
+ENUMS_FILE = 'docs/regzec_enums.json'
+
+# Submissions larger than this are read with the streaming reader
+STREAMING_THRESHOLD = 1 << 20
+
+# Character sets of the data types (sheet 'Datové typy' in regzec.xlsx)
+CHARSETS = {
+    'A': "A-Za-zŠŚŤŽŹšśťžźŁĄŞŻłąşĽľżŔÁÂĂÄĹĆÇČÉĘËĚÍÎĎĐŃŇÓÔŐÖŘŮÚŰÜÝŢßŕáâăäĺćçčéęëěíîďđńňóôőöřůúűüýţ ",
+    'N': "0-9",
+    'NN': "0-9",
+    'ZL': r"\-,.+'‘",
+    'ZX': r"\-.'‘,",
+    'ZZ': r"\-,.+/\\'‘",
+    'SP': " ",
+}
+
+# Whole-value patterns (L, N, ND, D) and the "delka" length spec
+BOOLEAN_VALUES = {'A', 'N'}
+DELKA_RE = re.compile(r'^\s*(\d+)\s*(?:[-–]\s*(\d+))?\s*$')
+DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+NUMBER_RE = re.compile(r'^[1-9][0-9]*$')
+DECIMAL_RE = re.compile(r'^[+-]?\d+([.,]\d+)?$')
+
+
+def is_empty(value):
+    return value is None or value == '' or (isinstance(value, list) and len(value) == 0)
+
+
+def compile_dat_typ(dat_typ):
+    """
+    Compiles a 'dat_typ' spec such as 'A,NN,ZZ,SP' into a checker description:
+    (kind, compiled regex or None, spaces allowed at the edges).
+    """
+    parts = [p.strip() for p in dat_typ.split(',') if p.strip()]
+    if not parts:
+        return None
+    if parts == ['D']:
+        return ('date', None, True)
+    if parts == ['L']:
+        return ('bool', None, True)
+    if parts == ['N']:
+        return ('regex', NUMBER_RE, True)
+    if parts == ['ND']:
+        return ('regex', DECIMAL_RE, True)
+    if 'L2' in parts:
+        return ('latin2', None, True)
+    if any(p not in CHARSETS for p in parts):
+        # Unknown types (e.g. Base64) are not checked
+        return None
+
+    chars = ''.join(CHARSETS[p] for p in parts)
+    # SP: space must not be the first or the last character
+    return ('regex', re.compile(f'^[{chars}]*$'), 'SP' not in parts)
+
+
+def compile_delka(delka):
+    match = DELKA_RE.match(delka or '')
+    if not match:
+        return None
+    low = int(match.group(1))
+    high = int(match.group(2)) if match.group(2) else low
+    return (low, high)
+
+
+def compile_schema(structure, enums, show_new_only=False):
+    """
+    Compiles the form structure into {field_id: spec} for the fields visible in the form.
+    Skipped subtrees (and new_only ones in the standard form) are left out, like in the browser.
+    """
+    root = next((n for n in structure if n.get('key') == 'employee'), None)
+    if root is None:
+        raise ValueError("Root 'employee' node not found")
+
+    fields = {}
+    stack = list(reversed(root.get('children') or []))
+    while stack:
+        node = stack.pop()
+        if node.get('skip') or (not show_new_only and node.get('new_only')):
+            continue
+        if node.get('children'):
+            stack.extend(reversed(node['children']))
+            continue
+
+        widget = node.get('widget') or 'input'
+        if widget in ('markdown', 'separator'):
+            continue
+        field_id = node.get('id') or node.get('original_path') or node.get('key')
+
+        options = None
+        if widget == 'selection' and node.get('ciselnik') in enums:
+            options = frozenset(opt['value'] for opt in enums[node['ciselnik']])
+
+        fields[field_id] = {
+            'label': node.get('description') or node.get('key'),
+            'widget': widget,
+            'required': node.get('mandatory') == 'P',
+            'options': options,
+            'ciselnik': node.get('ciselnik') or '',
+            'dat_typ': compile_dat_typ(node.get('dat_typ') or ''),
+            'delka': compile_delka(node.get('delka')),
+        }
+
+    return fields
+
+
+def load_validator(form_file=FORM_FILE, enums_file=ENUMS_FILE, show_new_only=False):
+    with open(form_file, 'r', encoding='utf-8') as f:
+        structure = json.load(f)
+    with open(enums_file, 'r', encoding='utf-8') as f:
+        enums = json.load(f)
+    return compile_schema(structure, enums, show_new_only)
+
+
+def check_dat_typ(checker, value):
+    kind, regex, edges_ok = checker
+    if kind == 'date':
+        if not DATE_RE.match(value):
+            return False
+        try:
+            datetime.date.fromisoformat(value)
+        except ValueError:
+            return False
+        return True
+    if kind == 'bool':
+        return value in BOOLEAN_VALUES
+    if kind == 'latin2':
+        try:
+            value.encode('iso8859-2')
+        except UnicodeEncodeError:
+            return False
+        return True
+    if not edges_ok and value != value.strip(' '):
+        return False
+    return bool(regex.match(value))
+
+
+def validate_data(fields, data, rules=None, warnings=None):
+    """
+    Validates one submission (dict keyed by field ID). Returns a list of errors.
+    With a RuleTable (see compile_rules.py) the conditional rules apply as well;
+    their warnings are appended to `warnings` if given. The citizenship rule is
+    checked with or without the table.
+    """
+    errors = []
+
+    def error(field_id, code, message):
+        errors.append({'field': field_id, 'code': code, 'message': message})
+
+    rule_required = rules.required_fields(data) if rules else set()
+
+    # Custom rule: Rodné číslo (10057) is mandatory if Citizenship (10067) is CZ or not filled
+    if '10057' in fields:
+        citizenship = data.get('10067')
+        if not citizenship or citizenship == 'CZ':
+            rule_required.add('10057')
+    if rules:
+        for issue in rules.check(data):
+            if issue['field'] not in fields:
+                continue
+            if issue['severity'] == 'error':
+                error(issue['field'], 'rule', f"{issue['rule']}: {issue['message']}")
+            elif warnings is not None:
+                warnings.append({'field': issue['field'], 'code': 'rule',
+                                 'message': f"{issue['rule']}: {issue['message']}"})
+
+    for field_id, spec in fields.items():
+        value = data.get(field_id)
+        required = spec['required'] or field_id in rule_required
+
+        if is_empty(value):
+            if required:
+                error(field_id, 'required', "Field is required")
+            continue
+
+        if spec['widget'] == 'file':
+            files = value if isinstance(value, list) else [value]
+            if not all(isinstance(f, dict) and f.get('_is_file') for f in files):
+                error(field_id, 'invalid_file', "Expected an uploaded file")
+            continue
+
+        if not isinstance(value, str):
+            error(field_id, 'invalid_type', f"Expected text, got {type(value).__name__}")
+            continue
+
+        if spec['options'] is not None:
+            if value not in spec['options']:
+                error(field_id, 'not_in_codelist', f"Value {value!r} is not in codelist '{spec['ciselnik']}'")
+            continue
+
+        if spec['dat_typ'] and not check_dat_typ(spec['dat_typ'], value):
+            error(field_id, 'invalid_format', f"Value {value!r} does not match the data type")
+        if spec['delka']:
+            low, high = spec['delka']
+            if len(value) < low:
+                error(field_id, 'too_short', f"Length {len(value)} is below {low}")
+            elif len(value) > high:
+                error(field_id, 'too_long', f"Length {len(value)} is above {high}")
+
+    return errors
+
+
+# --- Batch processing ---
+
+_worker_fields = None
+_worker_rules = None
+
+
+def init_worker(fields, rules=None):
+    global _worker_fields, _worker_rules
+    _worker_fields = fields
+    _worker_rules = rules
+
+
+def validate_file(path):
+    return check_file(path, _worker_fields, _worker_rules)
+
+
+def check_file(path, fields, rules=None):
+    """
+    Reads and validates one submission file. Returns {'file', 'valid', 'errors'[, 'warnings']}.
+    """
+    try:
+        if os.path.getsize(path) > STREAMING_THRESHOLD:
+            # Large attachments are decoded chunk-wise and not kept in memory
+            data = read_submission(path)
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+    except (OSError, ValueError) as e:
+        return {'file': path, 'valid': False, 'errors': [{'field': None, 'code': 'invalid_json', 'message': str(e)}]}
+
+    if not isinstance(data, dict):
+        return {'file': path, 'valid': False,
+                'errors': [{'field': None, 'code': 'invalid_json', 'message': "Top level value is not an object"}]}
+
+    warnings = []
+    errors = validate_data(fields, data, rules, warnings)
+    result = {'file': path, 'valid': not errors, 'errors': errors}
+    if warnings:
+        result['warnings'] = warnings
+    return result
+
+
+def find_submissions(paths, pattern='*.json'):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, '**', pattern), recursive=True)))
+        else:
+            files.append(path)
+    return files
+
+
+def validate_files(fields, files, jobs=None, rules=None):
+    if jobs == 1:
+        init_worker(fields, rules)
+        return [validate_file(path) for path in files]
+
+    jobs = jobs or os.cpu_count() or 1
+    chunksize = max(1, min(256, len(files) // (jobs * 4) or 1))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(fields, rules)) as pool:
+        return list(pool.map(validate_file, files, chunksize=chunksize))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate submitted questionnaire JSON files against the form schema.")
+    parser.add_argument("paths", nargs='+', help="Submission files or directories")
+    parser.add_argument("--new", action="store_true", help="Validate against the new employee form (new_only fields)")
+    parser.add_argument("--form", default=FORM_FILE, help=f"Form structure JSON (default: {FORM_FILE})")
+    parser.add_argument("--enums", default=ENUMS_FILE, help=f"Enums JSON (default: {ENUMS_FILE})")
+    parser.add_argument("--rules", default=RULES_FILE, help=f"Compiled rule table, see compile_rules.py (default: {RULES_FILE})")
+    parser.add_argument("--no-rules", action="store_true", help="Check the schema and the citizenship rule only, without the rule table")
+    parser.add_argument("--pattern", default='*.json', help="File pattern inside directories (default: *.json)")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--report", help="Write the JSON report to this file (default: stdout)")
+    parser.add_argument("--all", action="store_true", help="Include valid files in the report")
+    args = parser.parse_args()
+
+    fields = load_validator(args.form, args.enums, show_new_only=args.new)
+    try:
+        rules = None if args.no_rules else RuleTable.load(args.rules)
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot load the rules {args.rules}: {e}", file=sys.stderr)
+        sys.exit(1)
+    files = find_submissions(args.paths, args.pattern)
+
+    start = time.perf_counter()
+    results = validate_files(fields, files, jobs=args.jobs, rules=rules)
+    elapsed = time.perf_counter() - start
+
+    invalid = [r for r in results if not r['valid']]
+    report = {
+        'summary': {
+            'files': len(results),
+            'valid': len(results) - len(invalid),
+            'invalid': len(invalid),
+            'errors': sum(len(r['errors']) for r in invalid),
+            'warnings': sum(len(r.get('warnings', ())) for r in results),
+            'form': 'new' if args.new else 'standard',
+        },
+        'files': results if args.all else invalid,
+    }
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+
+    rate = len(results) / elapsed if elapsed > 0 else 0.0
+    print(f"Validated {len(results)} files ({len(invalid)} invalid) in {elapsed:.2f} s, {rate:.1f} files/s",
+          file=sys.stderr)
+
+    if invalid:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import argparse
+import hashlib
+import os
+import pickle
+import tempfile
+
+import pandas as pd
+
+CACHE_DIR = '.workbook_cache'
+# Least recently used sheets are evicted above this size
+MAX_BYTES = 64 << 20
+
+# Part of every key: a new format or pandas release invalidates the cache
+CACHE_VERSION = 1
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class WorkbookCache:
+    """
+    Parsed sheets (pandas.read_excel(..., header=None) frames) pickled in `root`,
+    keyed by the sha256 of the workbook content and the sheet name. Editing the
+    workbook changes the hash, so stale entries are never read; they age out by
+    the LRU eviction that keeps the directory below `max_bytes`.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, digest, sheet):
+        text = f"{CACHE_VERSION}\0{pd.__version__}\0{digest}\0{sheet}"
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+    def path(self, key):
+        return os.path.join(self.root, f"{key}.pkl")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                df = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Damaged or written by an incompatible version: parse again
+            self.remove(path)
+            return None
+        # The modification time is the LRU clock
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return df
+
+    def put(self, key, df):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # Atomic, so parallel extractors never read a partial entry
+        os.replace(tmp, self.path(key))
+        self.evict()
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def entries(self):
+        # [(mtime, size, path)], oldest first
+        entries = []
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, path))
+        return sorted(entries)
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        # The newest entry stays even if it alone exceeds the limit
+        for _, size, path in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            self.remove(path)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            self.remove(path)
+
+    def open(self, workbook):
+        """
+        Cached stand-in for pandas.ExcelFile(workbook): the workbook is only
+        opened if parse() misses.
+        """
+        return CachedWorkbook(self, workbook)
+
+    def read_sheet(self, workbook, sheet, **kwargs):
+        # Same as pandas.read_excel(workbook, sheet_name=sheet, **kwargs)
+        with self.open(workbook) as xls:
+            return xls.parse(sheet, **kwargs)
+
+
+class CachedWorkbook:
+    def __init__(self, cache, workbook):
+        self.cache = cache
+        self.workbook = workbook
+        self.digest = file_sha256(workbook)
+        self.xls = None
+
+    def parse(self, sheet, **kwargs):
+        # The parse options are part of the key (header=None and header=0 are different frames)
+        key = self.cache.key(self.digest, f"{sheet}\0{sorted(kwargs.items())!r}")
+        df = self.cache.get(key)
+        if df is not None:
+            self.cache.hits += 1
+            return df
+        self.cache.misses += 1
+        if self.xls is None:
+            self.xls = pd.ExcelFile(self.workbook)
+        # Parse errors propagate and are not cached
+        df = self.xls.parse(sheet, **kwargs)
+        self.cache.put(key, df)
+        return df
+
+    def close(self):
+        if self.xls is not None:
+            self.xls.close()
+            self.xls = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def add_cache_arguments(parser):
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"Parse the workbooks without the parsed-sheet cache ({CACHE_DIR})")
+
+
+def cache_from_args(args):
+    return None if args.no_cache else WorkbookCache()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or clear the parsed-sheet cache of the extractors.")
+    parser.add_argument("--dir", default=CACHE_DIR, help=f"Cache directory (default: {CACHE_DIR})")
+    parser.add_argument("--clear", action="store_true", help="Remove all cached sheets")
+    args = parser.parse_args()
+
+    cache = WorkbookCache(args.dir)
+    if args.clear:
+        cache.clear()
+        print(f"Cleared {args.dir}")
+        return
+    entries = cache.entries()
+    total = sum(size for _, size, _ in entries)
+    print(f"{len(entries)} cached sheets, {total / (1 << 20):.2f} MiB of {cache.max_bytes / (1 << 20):.0f} MiB in {args.dir}")
+
+
+if __name__ == "__main__":
+    main()